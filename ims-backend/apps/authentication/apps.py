@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.authentication'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete
+        from .autocomplete import handle_employee_saved, handle_employee_deleted
+        from .models import Employee
+
+        # Keep every worker's autocomplete index in step with employee changes
+        post_save.connect(handle_employee_saved, sender=Employee, dispatch_uid='autocomplete_employee_save')
+        post_delete.connect(handle_employee_deleted, sender=Employee, dispatch_uid='autocomplete_employee_delete')
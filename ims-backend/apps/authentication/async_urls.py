@@ -0,0 +1,11 @@
+"""
+Authentication Async URLs
+
+Mounted ahead of the regular URLs when ASYNC_READ_VIEWS is enabled.
+"""
+from django.urls import path
+from .async_views import current_employee
+
+urlpatterns = [
+    path('me/', current_employee, name='async_current_employee'),
+]
@@ -0,0 +1,127 @@
+"""
+Async Authentication Views
+
+Async-native read handlers used when the project is served over ASGI.
+Requests with any other HTTP method fall back to the regular DRF views.
+"""
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from config.renderers import FastJSONRenderer
+from .models import Employee
+from .serializers import EmployeeSerializer
+from .views import CurrentEmployeeView
+
+
+jwt_authentication = JWTAuthentication()
+
+
+def json_response(data, status=200, headers=None):
+    """Render `data` exactly like a DRF JSON response"""
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type='application/json',
+        headers=headers,
+    )
+
+
+async def authenticate_request(request, read_ticket=None):
+    """
+    Return the employee for the request's bearer token, or None
+
+    With `read_ticket` a `?ticket=` parameter is accepted as well, for
+    clients such as EventSource that cannot set request headers.
+    `read_ticket` returns the ticket's user id, or None if it isn't valid.
+    """
+    header = jwt_authentication.get_header(request)
+    if header is not None:
+        raw_token = jwt_authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        # Signature and expiry checks are pure CPU; only the user lookup hits the DB
+        validated_token = jwt_authentication.get_validated_token(raw_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    elif read_ticket is not None and request.GET.get('ticket'):
+        user_id = read_ticket(request.GET['ticket'])
+    else:
+        user_id = None
+
+    if user_id is None:
+        return None
+
+    try:
+        return await Employee.objects.aget(
+            **{api_settings.USER_ID_FIELD: user_id},
+            is_active=True
+        )
+    except Employee.DoesNotExist:
+        return None
+
+
+def exception_response(exc):
+    """JSON response for a DRF APIException, shaped like DRF's exception handler"""
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = {}
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = str(int(exc.wait))
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+def async_read_view(sync_view=None, read_ticket=None):
+    """
+    Serve GET requests from the decorated coroutine with JWT authentication,
+    and every other method from `sync_view`. APIExceptions raised by the
+    reused viewset logic (e.g. a ValidationError) are rendered as DRF would
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                if sync_view is None:
+                    return json_response(
+                        {'detail': f'Method "{request.method}" not allowed.'},
+                        status=405,
+                        headers={'Allow': 'GET'}
+                    )
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+            try:
+                user = await authenticate_request(request, read_ticket)
+            except InvalidToken as e:
+                return json_response(
+                    e.detail,
+                    status=401,
+                    headers={'WWW-Authenticate': 'Bearer realm="api"'}
+                )
+
+            if user is None:
+                return json_response(
+                    {'detail': 'Authentication credentials were not provided.'},
+                    status=401,
+                    headers={'WWW-Authenticate': 'Bearer realm="api"'}
+                )
+
+            request.user = user
+            try:
+                return await handler(request, *args, **kwargs)
+            except APIException as e:
+                return exception_response(e)
+
+        # Read from replicas whenever the equivalent DRF view would
+        view.read_replica = getattr(getattr(sync_view, 'cls', None), 'read_replica', False)
+        return csrf_exempt(view)
+
+    return decorator
+
+
+@async_read_view(CurrentEmployeeView.as_view())
+async def current_employee(request):
+    """Get current employee profile"""
+    serializer = EmployeeSerializer(request.user, context={'request': request})
+    return json_response(serializer.data)
@@ -0,0 +1,183 @@
+"""
+Employee Autocomplete
+
+Prefix suggestions for employee pickers, matching the start of a first
+name, last name, full name, email or employee ID, case-insensitively.
+
+Each worker keeps an in-memory prefix index of active employees. It is a
+flattened trie: the keys of each kind are sorted, so every trie node (all
+keys under a prefix) is one contiguous range found by bisection. A lookup
+costs O(log n + limit), and there is no node per character to keep in
+memory: the index of 100k employees takes about 50 MB, most of it the
+rows themselves. Names are suggested before emails, and emails before
+employee IDs; within a kind, keys come in alphabetical order.
+
+Saving or deleting an employee bumps a version counter in the database
+(employee_directory_version), in the same transaction as the change, so
+every worker sees it once the change commits. A worker whose index is
+older rebuilds it in a background thread and answers from the database
+until the rebuild is done. The database path uses prefix indexes on the
+four columns (UPPER(...) text_pattern_ops on PostgreSQL, COLLATE NOCASE on
+SQLite).
+"""
+import re
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from django.db import connection
+from django.db.models import F, Q
+from .models import DIRECTORY_VERSION_ROW, Employee, EmployeeDirectoryVersion
+
+
+# Changes to any other field (e.g. last_login on every sign-in) leave the index as it is
+INDEXED_FIELDS = {'first_name', 'last_name', 'email', 'employee_id', 'department', 'is_active'}
+
+SUGGESTION_FIELDS = ['id', 'employee_id', 'first_name', 'last_name', 'email', 'department']
+
+
+def normalize(text):
+    return re.sub(r'\s+', ' ', text or '').strip().casefold()
+
+
+def suggestion(row):
+    pk, employee_id, first_name, last_name, email, department = row
+    return {
+        'id': pk,
+        'employee_id': employee_id,
+        'full_name': f'{first_name} {last_name}',
+        'email': email,
+        'department': department,
+    }
+
+
+def index_keys(row):
+    """Keys of each kind an employee can be found by, in suggestion order"""
+    _, employee_id, first_name, last_name, email, _ = row
+    full_name = normalize(f'{first_name} {last_name}')
+    names = set(full_name.split(' ')) | {full_name}
+    return [names, [normalize(email)], [normalize(employee_id)]]
+
+
+class PrefixIndex:
+    """Sorted keys per kind of match, with the employee each key belongs to"""
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.rows = rows
+        kinds = [[], [], []]
+        for position, row in enumerate(rows):
+            for entries, keys in zip(kinds, index_keys(row)):
+                # Names repeat across employees, so share one string per name
+                entries.extend((sys.intern(key), position) for key in keys if key)
+        self.kinds = []
+        for entries in kinds:
+            entries.sort()
+            self.kinds.append((
+                [key for key, _ in entries],
+                array('I', (position for _, position in entries)),
+            ))
+
+    def search(self, prefix, limit):
+        prefix = normalize(prefix)
+        seen = set()
+        results = []
+        for keys, positions in self.kinds:
+            index = bisect_left(keys, prefix)
+            while index < len(keys) and len(results) < limit and keys[index].startswith(prefix):
+                position = positions[index]
+                if position not in seen:
+                    seen.add(position)
+                    results.append(suggestion(self.rows[position]))
+                index += 1
+        return results
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def active_rows(using=None):
+    return [
+        (str(row[0]), *row[1:])
+        for row in Employee.objects.using(using).filter(is_active=True).order_by().values_list(*SUGGESTION_FIELDS)
+    ]
+
+
+def database_search(prefix, limit, using=None):
+    """Suggestions straight from the database, through the prefix indexes"""
+    prefix = normalize(prefix)
+    condition = Q(email__istartswith=prefix) | Q(employee_id__istartswith=prefix)
+    if ' ' in prefix:
+        first, last = prefix.split(' ', 1)
+        condition |= Q(first_name__iexact=first, last_name__istartswith=last)
+    else:
+        condition |= Q(first_name__istartswith=prefix) | Q(last_name__istartswith=prefix)
+    rows = Employee.objects.using(using).filter(condition, is_active=True).order_by(
+        'first_name', 'last_name', 'id'
+    ).values_list(*SUGGESTION_FIELDS)[:limit]
+    return [suggestion(row) for row in rows]
+
+
+def current_version():
+    """The version employees are at (a primary key lookup)"""
+    versions = EmployeeDirectoryVersion.objects.filter(pk=DIRECTORY_VERSION_ROW)
+    return versions.values_list('version', flat=True).first() or 0
+
+
+def bump_version():
+    """Move the version on; call inside the transaction that changes employees"""
+    if not EmployeeDirectoryVersion.objects.filter(pk=DIRECTORY_VERSION_ROW).update(version=F('version') + 1):
+        EmployeeDirectoryVersion.objects.get_or_create(pk=DIRECTORY_VERSION_ROW, defaults={'version': 1})
+
+
+class EmployeeAutocomplete:
+    """Per-worker prefix index, rebuilt in the background when employees change"""
+
+    def __init__(self):
+        self.index = None
+        self.lock = threading.Lock()
+        self.rebuilding = False
+
+    def current_index(self):
+        """The index if it matches the current version, else None after starting a rebuild"""
+        version = current_version()
+        index = self.index
+        if index is not None and index.version == version:
+            return index
+
+        with self.lock:
+            if not self.rebuilding:
+                self.rebuilding = True
+                threading.Thread(
+                    target=self.rebuild, args=(version,), name='ims-employee-autocomplete', daemon=True
+                ).start()
+        return None
+
+    def rebuild(self, version):
+        try:
+            self.index = PrefixIndex(active_rows(), version)
+        except Exception as e:
+            print(f"Error building employee autocomplete index: {str(e)}")
+        finally:
+            connection.close()
+            with self.lock:
+                self.rebuilding = False
+
+    def search(self, prefix, limit, using=None):
+        index = self.current_index()
+        if index is None:
+            return database_search(prefix, limit, using)
+        return index.search(prefix, limit)
+
+
+autocomplete = EmployeeAutocomplete()
+
+
+def handle_employee_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    bump_version()
+
+
+def handle_employee_deleted(sender, instance, **kwargs):
+    bump_version()
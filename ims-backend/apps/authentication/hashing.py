@@ -0,0 +1,56 @@
+"""
+Password Hashing Helpers
+
+PBKDF2 is CPU bound, so bulk operations hash passwords across a process
+pool instead of one at a time in the request thread.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _init_worker(settings_module):
+    """Configure Django inside a freshly spawned worker process"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _hash_chunk(passwords):
+    """Hash a chunk of raw passwords (None produces an unusable password)"""
+    from django.contrib.auth.hashers import make_password
+    return [make_password(password) for password in passwords]
+
+
+def hash_passwords(passwords, workers=None, chunk_size=25):
+    """
+    Hash a list of raw passwords, preserving order
+
+    Args:
+        passwords: Raw passwords; None entries get an unusable password
+        workers: Number of worker processes (defaults to CPU count)
+        chunk_size: Passwords sent to a worker per task
+
+    Returns:
+        list: Encoded password hashes
+    """
+    passwords = list(passwords)
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or len(passwords) <= chunk_size:
+        return _hash_chunk(passwords)
+
+    chunks = [
+        passwords[i:i + chunk_size]
+        for i in range(0, len(passwords), chunk_size)
+    ]
+    settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+    hashed = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(settings_module,)
+    ) as executor:
+        for chunk in executor.map(_hash_chunk, chunks):
+            hashed.extend(chunk)
+    return hashed
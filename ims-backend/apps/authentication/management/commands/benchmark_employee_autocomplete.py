@@ -0,0 +1,124 @@
+"""
+Management command to benchmark employee autocomplete
+
+Inserts synthetic employees inside a transaction that is rolled back
+afterwards, builds the in-memory prefix index and times the same random
+prefixes against it and against the database path, e.g.:
+
+    python manage.py benchmark_employee_autocomplete --count 100000
+"""
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from apps.authentication.autocomplete import PrefixIndex, active_rows, database_search
+from apps.authentication.models import Employee
+
+
+BATCH_SIZE = 2000
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Amara', 'Chidi', 'Ngozi', 'Tunde', 'Wei', 'Mei', 'Arjun', 'Priya', 'Sofia', 'Mateo',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Okafor', 'Adeyemi', 'Nwosu', 'Chen', 'Wang', 'Patel', 'Sharma', 'Rossi', 'Novak', 'Kowalski',
+]
+
+
+def create_employees(count):
+    run = uuid.uuid4().hex[:6]
+    joined = timezone.now()
+    for start in range(0, count, BATCH_SIZE):
+        Employee.objects.bulk_create([
+            Employee(
+                email=f'{FIRST_NAMES[n % 30].lower()}.{LAST_NAMES[n % 20].lower()}{n}@{run}.example.com',
+                first_name=FIRST_NAMES[n % 30],
+                last_name=f'{LAST_NAMES[n % 20]}{"" if n % 3 else "-" + LAST_NAMES[n // 7 % 20]}',
+                employee_id=f'B{run}{n:07d}',
+                department='IT',
+                password='!',
+                date_joined=joined,
+            )
+            for n in range(start, min(start + BATCH_SIZE, count))
+        ])
+
+
+def prefixes(count, rows):
+    """Prefixes of 1 to 6 characters cut from real keys, as a user types them"""
+    picker = random.Random(0)
+    result = []
+    for _ in range(count):
+        _, employee_id, first_name, last_name, email, _ = picker.choice(rows)
+        key = picker.choice([first_name, last_name, f'{first_name} {last_name}', email, employee_id])
+        result.append(key[:picker.randint(1, 6)])
+    return result
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return (
+        statistics.median(timings) * 1000,
+        timings[int(len(timings) * 0.99) - 1] * 1000,
+        timings[-1] * 1000,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Time employee autocomplete from the in-memory prefix index and from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000, help='Synthetic employees to insert')
+        parser.add_argument('--queries', type=int, default=2000, help='Random prefixes to look up')
+        parser.add_argument('--limit', type=int, default=settings.EMPLOYEE_AUTOCOMPLETE_LIMIT)
+
+    def time_lookups(self, search, queries, limit):
+        timings = []
+        for prefix in queries:
+            started = time.perf_counter()
+            search(prefix, limit)
+            timings.append(time.perf_counter() - started)
+        return percentiles(timings)
+
+    def handle(self, *args, **options):
+        if options['count'] < 1 or options['queries'] < 1:
+            raise CommandError('--count and --queries must be positive')
+
+        with transaction.atomic():
+            self.stdout.write(f'Creating {options["count"]} employees...')
+            create_employees(options['count'])
+
+            started = time.perf_counter()
+            rows = active_rows()
+            loaded = time.perf_counter() - started
+            started = time.perf_counter()
+            index = PrefixIndex(rows)
+            built = time.perf_counter() - started
+            # Loaded and built again under tracemalloc, which slows it down, to measure the index's size
+            tracemalloc.start()
+            traced = PrefixIndex(active_rows())
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del traced
+            self.stdout.write(
+                f'Index of {len(index)} employees: rows loaded in {loaded:.2f}s, '
+                f'built in {built:.2f}s, {memory / 1024 / 1024:.1f} MB'
+            )
+
+            queries = prefixes(options['queries'], rows)
+            for label, search in [('Prefix index', index.search), ('Database', database_search)]:
+                median, p99, slowest = self.time_lookups(search, queries, options['limit'])
+                self.stdout.write(
+                    f'  {label:<13} median {median:7.3f} ms   p99 {p99:7.3f} ms   max {slowest:7.3f} ms'
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark rows rolled back'))
@@ -0,0 +1,49 @@
+"""
+Management command to benchmark bulk employee import throughput
+"""
+import io
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.authentication.bulk_import import import_employees, IMPORT_COLUMNS
+
+
+class Command(BaseCommand):
+    help = 'Import synthetic employees inside a rolled back transaction and report employees/second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Synthetic rows to import')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            nargs='+',
+            default=[1, None],
+            help='Worker counts to compare (0 = CPU count)'
+        )
+
+    def build_csv(self, rows):
+        run = uuid.uuid4().hex[:8]
+        lines = [','.join(IMPORT_COLUMNS)]
+        for i in range(rows):
+            lines.append(
+                f"bench-{run}-{i}@example.com,Bench,User{i},IT,,employee,Bench-{run}-{i}!"
+            )
+        return '\n'.join(lines).encode()
+
+    def handle(self, *args, **options):
+        for workers in options['workers']:
+            data = self.build_csv(options['rows'])
+
+            with transaction.atomic():
+                result = import_employees(
+                    io.BytesIO(data),
+                    workers=workers or None,
+                    send_emails=False,
+                )
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"workers={workers or 'auto':>4}  rows={result['created']}  "
+                f"elapsed={result['elapsed_seconds']}s  "
+                f"{result['employees_per_second']} employees/second"
+            )
@@ -0,0 +1,57 @@
+"""
+Management command to bulk import employees from a CSV file
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.authentication.bulk_import import import_employees, IMPORT_COLUMNS
+
+
+class Command(BaseCommand):
+    help = f"Bulk import employees from a CSV file (columns: {', '.join(IMPORT_COLUMNS)})"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the CSV file')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Password hashing processes (defaults to CPU count)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per INSERT statement'
+        )
+        parser.add_argument(
+            '--no-email',
+            action='store_true',
+            help='Do not queue welcome emails'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                result = import_employees(
+                    csv_file,
+                    workers=options['workers'],
+                    batch_size=options['batch_size'],
+                    send_emails=not options['no_email'],
+                )
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['csv_path']}: {e}")
+
+        for error in result['errors']:
+            self.stdout.write(
+                self.style.ERROR(f"Line {error['line']}: {error['error']}")
+            )
+        for email in result['skipped']:
+            self.stdout.write(
+                self.style.WARNING(f'Employee {email} already exists, skipping...')
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nCreated {result['created']} employees in {result['elapsed_seconds']}s "
+                f"({result['employees_per_second']} employees/second)"
+            )
+        )
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+PREFIX_FIELDS = ['first_name', 'last_name', 'email', 'employee_id']
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # Serve the case-insensitive istartswith lookups of employees/autocomplete/
+    for field in PREFIX_FIELDS:
+        if schema_editor.connection.vendor == 'postgresql':
+            expression = f'UPPER({field}::text) text_pattern_ops'
+        elif schema_editor.connection.vendor == 'sqlite':
+            expression = f'{field} COLLATE NOCASE'
+        else:
+            return
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS employees_{field}_prefix_idx ON employees ({expression})'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in ['postgresql', 'sqlite']:
+        for field in PREFIX_FIELDS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS employees_{field}_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.10 on 2026-10-19 13:02
+
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    # The one row employee autocomplete bumps on every employee change
+    EmployeeDirectoryVersion = apps.get_model('authentication', 'EmployeeDirectoryVersion')
+    EmployeeDirectoryVersion.objects.using(schema_editor.connection.alias).get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_employee_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeDirectoryVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'employee_directory_version',
+            },
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
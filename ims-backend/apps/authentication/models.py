@@ -2,11 +2,18 @@
 Authentication Models
 """
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat
 from django.utils import timezone
 import uuid
 
 
+def full_name_expression(prefix=''):
+    """SQL equivalent of Employee.full_name, e.g. full_name_expression('employee__')"""
+    return Concat(f'{prefix}first_name', Value(' '), f'{prefix}last_name', output_field=models.CharField())
+
+
 class EmployeeManager(BaseUserManager):
     """Custom manager for Employee model"""
     
@@ -34,6 +41,22 @@ class EmployeeManager(BaseUserManager):
             raise ValueError('Superuser must have is_superuser=True')
         
         return self.create_user(email, password, **extra_fields)
+    
+    def allocate_employee_ids(self, count=1):
+        """
+        Return the next `count` employee IDs (EMP001, EMP002, ...)
+
+        Call inside the transaction that inserts the employees: it locks the
+        employee directory row first, so a signup and an import allocating at
+        the same time take turns instead of both getting the next ID.
+        """
+        lock_employee_directory()
+        last_employee = self.model.objects.only('employee_id').order_by('date_joined').last()
+        if last_employee and last_employee.employee_id:
+            start = int(last_employee.employee_id[3:]) + 1
+        else:
+            start = 1
+        return [f"EMP{str(number).zfill(3)}" for number in range(start, start + count)]
 
 
 class Employee(AbstractBaseUser, PermissionsMixin):
@@ -101,12 +124,12 @@ class Employee(AbstractBaseUser, PermissionsMixin):
         """Override save to generate employee_id if not exists"""
         if not self.employee_id:
             # Generate employee ID like EMP001, EMP002, etc.
-            last_employee = Employee.objects.all().order_by('date_joined').last()
-            if last_employee and last_employee.employee_id:
-                last_id = int(last_employee.employee_id[3:])
-                self.employee_id = f"EMP{str(last_id + 1).zfill(3)}"
-            else:
-                self.employee_id = "EMP001"
+            with transaction.atomic(using=kwargs.get('using')):
+                self.employee_id = Employee.objects.allocate_employee_ids()[0]
+                # IDs follow date_joined order, so join after any ID allocated while waiting for the lock
+                self.date_joined = timezone.now()
+                super().save(*args, **kwargs)
+            return
         super().save(*args, **kwargs)
 
 
@@ -129,4 +152,28 @@ class PasswordResetToken(models.Model):
     
     def is_valid(self):
         """Check if token is still valid"""
-        return not self.is_used and timezone.now() < self.expires_at
\ No newline at end of file
+        return not self.is_used and timezone.now() < self.expires_at
+
+
+DIRECTORY_VERSION_ROW = 1
+
+
+class EmployeeDirectoryVersion(models.Model):
+    """
+    Single row counting changes to the employee fields autocomplete indexes.
+    Its lock also serializes employee ID allocation.
+    """
+    
+    version = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'employee_directory_version'
+    
+    def __str__(self):
+        return f"Employee directory version {self.version}"
+
+
+def lock_employee_directory():
+    """Hold the directory row's write lock until the current transaction ends"""
+    # An UPDATE rather than select_for_update(), which SQLite ignores
+    EmployeeDirectoryVersion.objects.filter(pk=DIRECTORY_VERSION_ROW).update(version=F('version'))
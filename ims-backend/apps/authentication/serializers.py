@@ -4,10 +4,11 @@ Authentication Serializers
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
-from .models import Employee
+from config.fieldsets import SparseFieldsetSerializerMixin
+from .models import Employee, full_name_expression
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()
 
     class Meta:
@@ -31,6 +32,12 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'employee_id',
             'date_joined',
         ]
+        sparse_sources = {
+            'full_name': ['first_name', 'last_name'],
+        }
+        values_expressions = {
+            'full_name': full_name_expression(),
+        }
 
 
 class SignupSerializer(serializers.ModelSerializer):
@@ -208,11 +215,7 @@ class EmployeeCreateUpdateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         password = validated_data.pop('password', None)
-        user = Employee.objects.create_user(**validated_data)
-        if password:
-            user.set_password(password)
-            user.save()
-        return user
+        return Employee.objects.create_user(password=password, **validated_data)
 
     def update(self, instance, validated_data):
         password = validated_data.pop('password', None)
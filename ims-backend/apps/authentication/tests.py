@@ -1,3 +1,60 @@
 from django.test import TestCase
+from .autocomplete import current_version
+from .bulk_import import import_employees
+from .models import Employee
 
-# Create your tests here.
+
+class AutocompleteVersionTests(TestCase):
+    """The autocomplete version lives in the database, shared by every worker"""
+
+    def setUp(self):
+        self.employee = Employee.objects.create_user(
+            email='jo@example.com', password='pw', first_name='Jo', last_name='Smith'
+        )
+
+    def test_indexed_change_bumps_version(self):
+        version = current_version()
+        self.employee.last_name = 'Smithers'
+        self.employee.save()
+        self.assertEqual(current_version(), version + 1)
+
+    def test_delete_bumps_version(self):
+        version = current_version()
+        self.employee.delete()
+        self.assertEqual(current_version(), version + 1)
+
+    def test_login_keeps_version(self):
+        version = current_version()
+        self.employee.save(update_fields=['last_login'])
+        self.assertEqual(current_version(), version)
+
+
+class EmployeeImportTests(TestCase):
+    """Rows that would fail model validation are reported, not inserted"""
+
+    def test_invalid_rows_are_line_errors(self):
+        csv = (
+            'email,first_name,last_name,phone_number,password\n'
+            'ok@example.com,Ok,Row,,\n'
+            'not-an-email,Bad,Email,,\n'
+            f'long@example.com,{"x" * 101},Name,,\n'
+            'phone@example.com,Long,Phone,0123456789012345,\n'
+            'weak@example.com,Weak,Password,,123\n'
+        )
+        result = import_employees(csv.encode(), workers=1, send_emails=False)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([error['line'] for error in result['errors']], [3, 4, 5, 6])
+        self.assertTrue(result['errors'][0]['error'].startswith('email:'))
+        self.assertTrue(result['errors'][1]['error'].startswith('first_name:'))
+        self.assertTrue(result['errors'][2]['error'].startswith('phone_number:'))
+        self.assertTrue(result['errors'][3]['error'].startswith('password:'))
+        self.assertEqual(list(Employee.objects.values_list('email', flat=True)), ['ok@example.com'])
+
+    def test_ids_continue_after_signups(self):
+        Employee.objects.create_user(email='first@example.com', password='pw', first_name='A', last_name='B')
+        import_employees(b'email,first_name,last_name\nsecond@example.com,C,D\n', workers=1, send_emails=False)
+        third = Employee.objects.create_user(email='third@example.com', password='pw', first_name='E', last_name='F')
+        self.assertEqual(
+            sorted(Employee.objects.values_list('employee_id', flat=True)), ['EMP001', 'EMP002', 'EMP003']
+        )
+        self.assertEqual(third.employee_id, 'EMP003')
@@ -3,10 +3,13 @@ Authentication URLs
 """
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
+from apps.inventory.history import EmployeeHistoryView
 from .views import (
     EmployeeDetailView,
     EmployeeListCreateView,
     EmployeeListView,
+    EmployeeAutocompleteView,
+    EmployeeImportView,
     SignupView,
     LoginView,
     LogoutView,
@@ -35,5 +38,8 @@ urlpatterns = [
 
     # Employees
     path('employees/', EmployeeListView.as_view(), name='employee_list'),
+    path('employees/autocomplete/', EmployeeAutocompleteView.as_view(), name='employee_autocomplete'),
+    path('employees/import/', EmployeeImportView.as_view(), name='employee_import'),
     path('employees/<uuid:pk>/', EmployeeDetailView.as_view(), name='employee_detail'),
+    path('employees/<uuid:pk>/history/', EmployeeHistoryView.as_view(), name='employee_history'),
 ]
\ No newline at end of file
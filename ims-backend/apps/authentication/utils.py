@@ -6,6 +6,7 @@ import requests
 from datetime import timedelta
 from django.utils import timezone
 from django.conf import settings
+from config.background import submit
 from .models import PasswordResetToken
 
 
@@ -161,6 +162,11 @@ def send_welcome_email(employee):
     )
 
 
+def queue_welcome_emails(employees):
+    """Send welcome emails on a background thread pool without blocking the caller"""
+    return [submit('email', send_welcome_email, employee) for employee in employees]
+
+
 def send_password_reset_email(employee, reset_token):
     """Send password reset email"""
     reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token.token}"
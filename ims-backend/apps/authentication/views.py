@@ -5,7 +5,9 @@ from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth import logout
 from .models import Employee, PasswordResetToken
 from .serializers import (
@@ -17,8 +19,12 @@ from .serializers import (
     ChangePasswordSerializer
 )
 from .permissions import IsAdmin
+from config.fieldsets import SparseFieldsetMixin
+from config.values_serializers import ValuesListMixin
 from .serializers import EmployeeSerializer, EmployeeCreateUpdateSerializer
 
+from .autocomplete import autocomplete
+from .bulk_import import import_employees
 from .utils import (
     create_password_reset_token,
     send_welcome_email,
@@ -117,12 +123,38 @@ class LogoutView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class EmployeeListView(generics.ListAPIView):
+class EmployeeListView(SparseFieldsetMixin, ValuesListMixin, generics.ListAPIView):
     """List all employees"""
     
     permission_classes = [IsAuthenticated]
     serializer_class = EmployeeSerializer
     queryset = Employee.objects.filter(is_active=True).order_by('-date_joined')
+    read_replica = True
+
+
+class EmployeeAutocompleteView(APIView):
+    """Employees whose name, email or employee ID starts with `q`, for pickers"""
+    
+    permission_classes = [IsAuthenticated]
+    read_replica = True
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({
+                'error': 'q is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            limit = int(request.query_params.get('limit', settings.EMPLOYEE_AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= settings.EMPLOYEE_AUTOCOMPLETE_MAX_LIMIT:
+            return Response({
+                'error': f'limit must be between 1 and {settings.EMPLOYEE_AUTOCOMPLETE_MAX_LIMIT}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'results': autocomplete.search(query, limit)})
 
 
 class CurrentEmployeeView(generics.RetrieveUpdateAPIView):
@@ -333,3 +365,28 @@ class EmployeeDetailView(generics.RetrieveUpdateDestroyAPIView):
     def perform_destroy(self, instance):
         instance.is_active = False
         instance.save()
+
+
+class EmployeeImportView(APIView):
+    """Bulk import employees from an uploaded CSV file"""
+    
+    permission_classes = [IsAdmin]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request):
+        csv_file = request.FILES.get('file')
+        
+        if not csv_file:
+            return Response({
+                'error': 'CSV file is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = import_employees(
+            csv_file.read(),
+            send_emails=request.data.get('send_emails', 'true').lower() != 'false'
+        )
+        
+        return Response({
+            'message': f"{result['created']} employees imported successfully",
+            **result
+        }, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
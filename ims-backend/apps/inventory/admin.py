@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Device, Assignment, TicketRequest
+from .models import Device, Assignment, TicketRequest, UploadSession
 
 @admin.register(Device)
 class DeviceAdmin(admin.ModelAdmin):
@@ -17,4 +17,10 @@ class AssignmentAdmin(admin.ModelAdmin):
 class TicketRequestAdmin(admin.ModelAdmin):
     list_display = ['ticket_number', 'requested_by', 'ticket_type', 'priority', 'status']
     list_filter = ['ticket_type', 'priority', 'status']
-    search_fields = ['ticket_number', 'subject']
\ No newline at end of file
+    search_fields = ['ticket_number', 'subject']
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'owner', 'target', 'received', 'size', 'status', 'updated_at']
+    list_filter = ['target', 'status']
+    search_fields = ['filename', 'owner__email']
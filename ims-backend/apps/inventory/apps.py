@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventory'
+
+    def ready(self):
+        from django.db.models.signals import post_init, post_save, post_delete
+        from .events import snapshot_status, handle_saved, handle_deleted
+        from .storage import (
+            models_with_references,
+            snapshot_references,
+            handle_references_saved,
+            handle_references_deleted,
+        )
+        from .models import Device, Assignment, TicketRequest
+
+        for model in (Device, Assignment, TicketRequest):
+            post_init.connect(snapshot_status, sender=model, dispatch_uid=f'domain_event_init_{model.__name__}')
+            post_save.connect(handle_saved, sender=model, dispatch_uid=f'change_event_save_{model.__name__}')
+            post_delete.connect(handle_deleted, sender=model, dispatch_uid=f'change_event_delete_{model.__name__}')
+
+        # Media reference counts for every model with file fields
+        for model in models_with_references():
+            post_init.connect(snapshot_references, sender=model, dispatch_uid=f'media_init_{model.__name__}')
+            post_save.connect(handle_references_saved, sender=model, dispatch_uid=f'media_save_{model.__name__}')
+            post_delete.connect(handle_references_deleted, sender=model, dispatch_uid=f'media_delete_{model.__name__}')
@@ -0,0 +1,25 @@
+"""
+Inventory Async URLs
+
+Mounted ahead of the router when ASYNC_READ_VIEWS is enabled.
+"""
+from django.urls import path
+from .async_views import (
+    device_list,
+    device_detail,
+    device_available,
+    my_assignments,
+    my_tickets,
+    dashboard_stats,
+    event_stream,
+)
+
+urlpatterns = [
+    path('devices/', device_list, name='async_device_list'),
+    path('devices/available/', device_available, name='async_device_available'),
+    path('devices/<uuid:pk>/', device_detail, name='async_device_detail'),
+    path('assignments/my_assignments/', my_assignments, name='async_my_assignments'),
+    path('tickets/my_tickets/', my_tickets, name='async_my_tickets'),
+    path('dashboard/stats/', dashboard_stats, name='async_dashboard_stats'),
+    path('events/stream/', event_stream, name='event_stream'),
+]
@@ -0,0 +1,296 @@
+"""
+Async Inventory Views
+
+Async-native handlers for the read-heavy inventory endpoints, used when
+the project is served over ASGI. Querysets are built by the existing
+viewsets so filtering, search and ordering behave identically; only the
+database round-trips go through Django's async ORM.
+"""
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Prefetch, Q
+from django.http import StreamingHttpResponse
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from apps.authentication.async_views import async_read_view, json_response
+from apps.authentication.models import Employee
+from config.streaming import ajson_array_chunks, arow_batches, batch_source, pinned, streaming_json_response, wants_page
+from .events import broker, is_visible_to, missed_events, stream_ticket_user_id
+from .models import Device, Assignment, TicketRequest
+from .serializers import (
+    DeviceSerializer,
+    DashboardStatsSerializer,
+)
+from .views import DeviceViewSet, AssignmentViewSet, TicketRequestViewSet, DashboardViewSet
+
+
+def build_viewset(viewset_class, request, action):
+    """Instantiate a viewset so its queryset and filter logic can be reused"""
+    drf_request = Request(request)
+    drf_request.user = request.user
+    return viewset_class(
+        request=drf_request,
+        action=action,
+        format_kwarg=None,
+        args=(),
+        kwargs={}
+    )
+
+
+async def paginate(request, queryset, represent, extra=None):
+    """
+    Async equivalent of PageNumberPagination with the same response shape;
+    `represent` turns the page's rows into dicts, `extra` adds keys such as facets
+    """
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    count = await queryset.acount()
+    num_pages = max(1, -(-count // page_size))
+
+    page_param = request.GET.get('page', 1)
+    try:
+        page_number = num_pages if page_param == 'last' else int(page_param)
+    except ValueError:
+        page_number = 0
+    if page_number < 1 or page_number > num_pages:
+        return json_response({'detail': 'Invalid page.'}, status=404)
+
+    offset = (page_number - 1) * page_size
+    # values_list() querysets can't be iterated on the event loop (see arow_batches)
+    rows = await sync_to_async(list)(queryset[offset:offset + page_size])
+
+    url = request.build_absolute_uri()
+    next_link = None
+    if page_number < num_pages:
+        next_link = replace_query_param(url, 'page', page_number + 1)
+    previous_link = None
+    if page_number > 1:
+        previous_link = (
+            remove_query_param(url, 'page') if page_number == 2
+            else replace_query_param(url, 'page', page_number - 1)
+        )
+
+    return json_response({
+        'count': count,
+        'next': next_link,
+        'previous': previous_link,
+        'results': represent(rows),
+        **(extra or {}),
+    })
+
+
+async def list_response(request, view, queryset):
+    """Async equivalent of StreamingListMixin.list_response"""
+    queryset, represent = batch_source(
+        queryset,
+        view.get_serializer_class(),
+        view.get_serializer_context()
+    )
+    if wants_page(request):
+        return await paginate(request, queryset, represent)
+
+    return streaming_json_response(ajson_array_chunks(arow_batches(pinned(queryset), represent)))
+
+
+# Device handlers
+
+@async_read_view(DeviceViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def device_list(request):
+    """List devices, with the values_list() rows and ?facets= of DeviceViewSet.list"""
+    view = build_viewset(DeviceViewSet, request, 'list')
+    queryset = view.filter_queryset(view.get_queryset())
+    rows, represent = batch_source(queryset, view.get_serializer_class(), view.get_serializer_context())
+
+    extra = None
+    fields = view.get_requested_facets()
+    if fields:
+        extra = {'facets': await sync_to_async(view.get_facets)(queryset, fields)}
+    return await paginate(request, rows, represent, extra)
+
+
+@async_read_view(DeviceViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+}))
+async def device_detail(request, pk):
+    """Get device details"""
+    view = build_viewset(DeviceViewSet, request, 'retrieve')
+    queryset = view.filter_queryset(view.get_queryset()).select_related(
+        'created_by'
+    ).prefetch_related(
+        Prefetch(
+            'assignments',
+            queryset=Assignment.objects.filter(status='active').select_related('employee'),
+            to_attr='active_assignments'
+        )
+    )
+
+    try:
+        device = await queryset.aget(pk=pk)
+    except Device.DoesNotExist:
+        return json_response({'detail': 'Not found.'}, status=404)
+
+    serializer = DeviceSerializer(device, context=view.get_serializer_context())
+    return json_response(serializer.data)
+
+
+@async_read_view(DeviceViewSet.as_view({'get': 'available'}))
+async def device_available(request):
+    """Get all available devices"""
+    view = build_viewset(DeviceViewSet, request, 'available')
+    return await list_response(request, view, Device.objects.filter(status='available'))
+
+
+# Assignment handlers
+
+@async_read_view(AssignmentViewSet.as_view({'get': 'my_assignments'}))
+async def my_assignments(request):
+    """Get current user's assignments"""
+    view = build_viewset(AssignmentViewSet, request, 'my_assignments')
+    return await list_response(request, view, Assignment.objects.filter(employee=request.user, status='active'))
+
+
+# Ticket handlers
+
+@async_read_view(TicketRequestViewSet.as_view({'get': 'my_tickets'}))
+async def my_tickets(request):
+    """Get current user's tickets"""
+    view = build_viewset(TicketRequestViewSet, request, 'my_tickets')
+    return await list_response(request, view, TicketRequest.objects.filter(requested_by=request.user))
+
+
+# Dashboard handlers
+
+@async_read_view(DashboardViewSet.as_view({'get': 'stats'}))
+async def dashboard_stats(request):
+    """Get dashboard statistics"""
+    device_stats = await Device.objects.aaggregate(
+        total_devices=Count('id'),
+        available_devices=Count('id', filter=Q(status='available')),
+        assigned_devices=Count('id', filter=Q(status='assigned')),
+        maintenance_devices=Count('id', filter=Q(status='maintenance')),
+        retired_devices=Count('id', filter=Q(status='retired')),
+    )
+
+    total_employees = await Employee.objects.filter(is_active=True).acount()
+    active_employees = await Employee.objects.filter(
+        is_active=True,
+        device_assignments__status='active'
+    ).distinct().acount()
+
+    assignment_stats = await Assignment.objects.aaggregate(
+        total_assignments=Count('id'),
+        active_assignments=Count('id', filter=Q(status='active')),
+    )
+
+    ticket_stats = await TicketRequest.objects.aaggregate(
+        total_tickets=Count('id'),
+        pending_tickets=Count('id', filter=Q(status='pending')),
+        in_progress_tickets=Count('id', filter=Q(status='in_progress')),
+        resolved_tickets=Count('id', filter=Q(status='resolved')),
+    )
+
+    device_by_type = {
+        device_type: count
+        async for device_type, count in Device.objects.values('device_type').annotate(
+            count=Count('id')
+        ).values_list('device_type', 'count')
+    }
+
+    recent_assignments = [
+        assignment async for assignment in Assignment.objects.select_related(
+            'device', 'employee', 'assignment_approved_by'
+        )[:5]
+    ]
+    recent_tickets = [
+        ticket async for ticket in TicketRequest.objects.select_related(
+            'requested_by', 'device'
+        )[:5]
+    ]
+
+    stats_data = {
+        **device_stats,
+        'total_employees': total_employees,
+        'active_employees': active_employees,
+        **assignment_stats,
+        **ticket_stats,
+        'device_by_type': device_by_type,
+        'recent_assignments': recent_assignments,
+        'recent_tickets': recent_tickets,
+    }
+
+    serializer = DashboardStatsSerializer(stats_data)
+    return json_response(serializer.data)
+
+
+# Live change events
+
+HEARTBEAT_SECONDS = 15
+
+
+def format_event(event):
+    """Encode a ChangeEvent as a server-sent event frame"""
+    data = json.dumps({
+        'action': event.action,
+        'id': str(event.object_id),
+        **event.payload,
+    }, separators=(',', ':'))
+    return f"id: {event.id}\nevent: {event.resource}\ndata: {data}\n\n"
+
+
+# Sent instead of a replay the client is too far behind for; it reloads its data
+RESET_FRAME = "event: reset\ndata: {}\n\n"
+
+
+async def stream_events(user, last_event_id):
+    """Yield visible change events, resuming after `last_event_id` if given"""
+    queue = await broker.subscribe()
+    sent_id = 0
+
+    try:
+        yield "retry: 3000\n\n"
+
+        if last_event_id is not None:
+            missed = await sync_to_async(missed_events)(last_event_id, settings.EVENT_STREAM_REPLAY_LIMIT)
+            if missed is None:
+                yield RESET_FRAME
+            for event in missed or []:
+                sent_id = event.id
+                if is_visible_to(event, user):
+                    yield format_event(event)
+
+        while True:
+            if queue.empty() and getattr(queue, 'overflowed', False):
+                break
+
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if event.id > sent_id and is_visible_to(event, user):
+                sent_id = event.id
+                yield format_event(event)
+    finally:
+        broker.unsubscribe(queue)
+
+
+@async_read_view(read_ticket=stream_ticket_user_id)
+async def event_stream(request):
+    """Server-sent events for device, assignment and ticket changes"""
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET['last_event_id'])
+    except (KeyError, ValueError):
+        last_event_id = None
+
+    response = StreamingHttpResponse(
+        stream_events(request.user, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,152 @@
+"""
+Batch Request View
+
+Executes several GET requests against the existing API views in one round
+trip. Sub-requests skip the middleware stack and reuse the batch request's
+authenticated user, so the token is decoded and the employee loaded once.
+Identical sub-requests in a batch are run once and share the response.
+
+Parallel sub-requests run on worker threads in a copy of the batch
+request's context, so they use the same database routing (see
+config.replicas) as sequential ones.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve, Resolver404
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+BATCH_PATH = '/api/batch/'
+
+logger = logging.getLogger(__name__)
+
+
+class BatchView(APIView):
+    """Run multiple GET sub-requests and return their responses together"""
+
+    def post(self, request):
+        sub_requests = request.data.get('requests')
+
+        if not isinstance(sub_requests, list) or not sub_requests:
+            return Response({
+                'error': 'A non-empty list of requests is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(sub_requests) > settings.BATCH_MAX_REQUESTS:
+            return Response({
+                'error': f'At most {settings.BATCH_MAX_REQUESTS} requests are allowed per batch'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        sub_requests = [sub if isinstance(sub, dict) else {} for sub in sub_requests]
+        keys = [self.cache_key(sub) for sub in sub_requests]
+        unique = {}
+        for key, sub in zip(keys, sub_requests):
+            unique.setdefault(key, sub)
+
+        if request.data.get('parallel') and len(unique) > 1:
+            with ThreadPoolExecutor(max_workers=settings.BATCH_MAX_WORKERS) as executor:
+                # One context copy per task: a context can't be entered by two threads at once
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self.run_in_thread, request, sub)
+                    for sub in unique.values()
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [self.run(request, sub) for sub in unique.values()]
+
+        results = dict(zip(unique, results))
+        responses = [{**results[key], 'id': sub.get('id')} for key, sub in zip(keys, sub_requests)]
+        return Response({'responses': responses})
+
+    def cache_key(self, sub):
+        return str(sub.get('method', 'GET')).upper(), str(sub.get('url', ''))
+
+    def run_in_thread(self, request, sub):
+        try:
+            return self.run(request, sub)
+        finally:
+            # Worker threads open their own connection; don't leak it
+            connections.close_all()
+
+    def run(self, request, sub):
+        """Execute one sub-request and return {'id', 'status', 'body'}"""
+        sub_id = sub.get('id')
+        method = str(sub.get('method', 'GET')).upper()
+        url = urlsplit(str(sub.get('url', '')))
+
+        if method != 'GET':
+            return self.error(sub_id, status.HTTP_405_METHOD_NOT_ALLOWED, 'Only GET requests can be batched')
+
+        if not url.path.startswith('/api/') or url.path.startswith(BATCH_PATH):
+            return self.error(sub_id, status.HTTP_400_BAD_REQUEST, 'Invalid request URL')
+
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return self.error(sub_id, status.HTTP_404_NOT_FOUND, 'Not found.')
+
+        sub_request = self.build_request(request, url, match)
+
+        try:
+            if asyncio.iscoroutinefunction(match.func):
+                response = async_to_sync(match.func)(sub_request, *match.args, **match.kwargs)
+            else:
+                response = match.func(sub_request, *match.args, **match.kwargs)
+            body = self.body(response)
+        except Exception:
+            logger.exception('Error in batch sub-request %s', url.path)
+            return self.error(sub_id, status.HTTP_500_INTERNAL_SERVER_ERROR, 'Server error.')
+
+        return {'id': sub_id, 'status': response.status_code, 'body': body}
+
+    def body(self, response):
+        """Decoded body of a sub-response; streamed lists are read in full"""
+        if hasattr(response, 'data'):
+            return response.data
+
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+
+        try:
+            return json.loads(content)
+        except ValueError:
+            return content.decode(errors='replace')
+
+    def build_request(self, request, url, match):
+        """Clone the batch request as a GET for `url`"""
+        parent = request._request
+        sub_request = HttpRequest()
+        sub_request.method = 'GET'
+        sub_request.path = sub_request.path_info = url.path
+        sub_request.META = {
+            **parent.META,
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'CONTENT_LENGTH': '0',
+        }
+        sub_request.META.pop('CONTENT_TYPE', None)
+        sub_request.GET = QueryDict(url.query)
+        sub_request.COOKIES = parent.COOKIES
+        sub_request.resolver_match = match
+        sub_request.user = request.user
+
+        # Picked up by DRF's Request so sub-views skip re-authentication
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        return sub_request
+
+    def error(self, sub_id, status_code, message):
+        return {'id': sub_id, 'status': status_code, 'body': {'detail': message}}
@@ -0,0 +1,207 @@
+"""
+Domain Event Log
+
+An append-only DomainEvent row records every state transition of a
+device, assignment or ticket: creations, status changes, workflow actions
+such as approve_assignment or resolve, and deletions. Each row has the
+status before and after, the employee who made the change and a few
+identifying fields. Rows are never updated or deleted, so the table is
+the source for audit trails, delta sync (`event-log/?after=<id>`) and
+analytics. ChangeEvent only feeds the live stream and is pruned (see
+events for why the two are separate); this log is kept. Bulk updates and
+deletes are refused by the queryset and by database triggers.
+
+Ids are allocated when an INSERT starts, so on PostgreSQL a batch can
+commit after a later one. Delta sync therefore only serves ids below the
+oldest event the database recorded within DOMAIN_EVENT_SETTLE_SECONDS.
+That covers batches that take less than DOMAIN_EVENT_SETTLE_SECONDS from
+INSERT to commit; one that takes longer can land below a cursor a client
+has already moved past.
+
+Events are handed over when their transaction commits, so rolled-back
+changes log nothing. A background writer thread appends them with
+bulk_create in batches of up to DOMAIN_EVENT_BATCH_SIZE, so requests
+never wait on the insert. A failed batch is retried with backoff, then
+inserted one event at a time so a single bad row doesn't take the rest
+with it. Whatever is still buffered is written when the process exits
+normally; a killed process loses its last batch.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Min
+from django.db.models.functions import Now
+from rest_framework import viewsets, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .models import ChangeEvent, DomainEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+class DomainEventWriter:
+    """Buffers committed events and appends them from a background thread"""
+
+    def __init__(self, batch_size=100, flush_interval=0.5, retries=3, retry_delay=0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def enqueue(self, events):
+        for event in events:
+            self.queue.put(event)
+        self.ensure_running()
+
+    def ensure_running(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='ims-domain-events', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Give a burst of transitions a moment to share one INSERT
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self.write(batch)
+
+    def write(self, batch):
+        try:
+            if not self.write_batch(batch):
+                self.write_each(batch)
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def write_batch(self, batch):
+        """bulk_create, retried with exponential backoff; False if every attempt failed"""
+        delay = self.retry_delay
+        for attempt in range(1, self.retries + 2):
+            try:
+                close_old_connections()
+                DomainEvent.objects.bulk_create(batch)
+                return True
+            except Exception:
+                logger.warning(
+                    'Writing %d domain events failed (attempt %d of %d)',
+                    len(batch), attempt, self.retries + 1, exc_info=True
+                )
+            if attempt <= self.retries:
+                time.sleep(delay)
+                delay *= 2
+        return False
+
+    def write_each(self, batch):
+        """Insert events one at a time, so only the ones the database refuses are lost"""
+        for event in batch:
+            try:
+                close_old_connections()
+                event.save(force_insert=True)
+            except Exception:
+                logger.exception('Dropped domain event: %s', event)
+
+    def flush(self):
+        """Block until every queued event has been written"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+
+writer = DomainEventWriter(
+    batch_size=getattr(settings, 'DOMAIN_EVENT_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'DOMAIN_EVENT_FLUSH_INTERVAL', 0.5),
+    retries=getattr(settings, 'DOMAIN_EVENT_WRITE_RETRIES', 3),
+    retry_delay=getattr(settings, 'DOMAIN_EVENT_RETRY_DELAY', 0.5),
+)
+atexit.register(writer.flush)
+
+
+def settled_rows(model, recorded_field, seconds):
+    """
+    Rows of `model` below the lowest id recorded (by the database, in
+    `recorded_field`) within the last `seconds`. A row whose INSERT takes
+    less than `seconds` to commit is in place before any higher id shows
+    up here, so reading after an id doesn't skip it. A commit that lags by
+    longer can still land below ids that were already read
+    """
+    settling = model.objects.filter(
+        **{f'{recorded_field}__gte': Now() - timedelta(seconds=seconds)}
+    ).aggregate(first=Min('id'))['first']
+    rows = model.objects.all()
+    if settling is not None:
+        rows = rows.filter(id__lt=settling)
+    return rows
+
+
+def settled_events():
+    """Domain events past DOMAIN_EVENT_SETTLE_SECONDS; see settled_rows for the limit"""
+    return settled_rows(DomainEvent, 'recorded_at', settings.DOMAIN_EVENT_SETTLE_SECONDS)
+
+
+class EventLogViewSet(viewsets.ViewSet):
+    """Read the domain event log in id order, for audit and delta sync"""
+
+    permission_classes = [IsAuthenticated]
+    read_replica = True
+
+    def list(self, request):
+        if request.user.role not in ['admin', 'manager']:
+            return Response({
+                'error': 'Only admin/manager can read the event log'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            after = int(request.query_params.get('after', 0))
+            limit = int(request.query_params.get('limit', settings.DOMAIN_EVENT_PAGE_SIZE))
+        except ValueError:
+            return Response({
+                'error': 'after and limit must be whole numbers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= settings.DOMAIN_EVENT_PAGE_SIZE:
+            return Response({
+                'error': f'limit must be between 1 and {settings.DOMAIN_EVENT_PAGE_SIZE}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        events = settled_events().filter(id__gt=after)
+        resource = request.query_params.get('resource')
+        if resource:
+            if resource not in dict(ChangeEvent.RESOURCE_CHOICES):
+                return Response({
+                    'error': f'resource must be one of {", ".join(dict(ChangeEvent.RESOURCE_CHOICES))}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            events = events.filter(resource=resource)
+        object_id = request.query_params.get('object_id')
+        if object_id:
+            try:
+                events = events.filter(object_id=uuid.UUID(object_id))
+            except ValueError:
+                return Response({
+                    'error': 'object_id must be a UUID'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        results = list(events.order_by('id').values(
+            'id', 'resource', 'object_id', 'action', 'from_status', 'to_status',
+            'actor_id', 'data', 'occurred_at'
+        )[:limit + 1])
+        has_more = len(results) > limit
+        results = results[:limit]
+        return Response({
+            'next_after': results[-1]['id'] if results else after,
+            'has_more': has_more,
+            'results': results,
+        })
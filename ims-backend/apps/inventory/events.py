@@ -0,0 +1,281 @@
+"""
+Inventory Change Events
+
+Saves of devices, assignments and tickets are recorded as compact
+ChangeEvent rows once their transaction commits. Each worker process runs
+a single broker task that polls for new rows and fans them out to the
+event stream connections it is serving, so clients on any worker see
+changes made on every other worker.
+
+Transitions among those saves are also appended to the domain event log
+(see event_log), but the stream doesn't read from it. The stream needs
+every save, including edits that leave the status alone, and each row's
+audience (who may see it). It only needs them for as long as a client
+might reconnect, so change_events is pruned (prune_change_events).
+The domain log keeps transitions only and keeps them for good, without
+per-user visibility. Serving the stream from it would either fill the
+permanent log with every edit or hide edits from live clients.
+
+Ids are allocated when an INSERT starts, so a row can commit after one
+with a higher id. The broker and Last-Event-ID resumption only read rows
+below the newest EVENT_STREAM_SETTLE_SECONDS of events, so a commit that
+lags by less than that is delivered late rather than skipped. One that
+lags by longer can still be passed over.
+
+EventSource can't send an Authorization header, so a client first POSTs
+to `events/ticket/` for a signed stream ticket that only opens the stream
+and expires after EVENT_STREAM_TICKET_SECONDS, and passes it as
+`?ticket=`. The access token itself never appears in a URL.
+"""
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Max, Min
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .models import Device, Assignment, TicketRequest, ChangeEvent, DomainEvent
+from .event_log import settled_rows, writer
+
+
+def describe_change(instance):
+    """Return (resource, payload, audience) for a changed instance"""
+    if isinstance(instance, Device):
+        return 'device', {
+            'device_id': instance.device_id,
+            'status': instance.status,
+        }, []
+
+    if isinstance(instance, Assignment):
+        return 'assignment', {
+            'device': str(instance.device_id),
+            'employee': str(instance.employee_id),
+            'status': instance.status,
+        }, [str(instance.employee_id)]
+
+    if isinstance(instance, TicketRequest):
+        audience = [str(instance.requested_by_id)]
+        if instance.assigned_to_id:
+            audience.append(str(instance.assigned_to_id))
+        return 'ticket', {
+            'ticket_number': instance.ticket_number,
+            'status': instance.status,
+            'priority': instance.priority,
+            'assigned_to': str(instance.assigned_to_id) if instance.assigned_to_id else None,
+        }, audience
+
+    return None
+
+
+def change_event(instance, action):
+    """Unsaved ChangeEvent for `instance`, or None if it isn't tracked"""
+    description = describe_change(instance)
+    if description is None:
+        return None
+
+    resource, payload, audience = description
+    return ChangeEvent(
+        resource=resource,
+        action=action,
+        object_id=instance.pk,
+        payload=payload,
+        audience=audience,
+    )
+
+
+def record_change(instance, action):
+    """Queue a ChangeEvent for `instance`, written when the transaction commits"""
+    event = change_event(instance, action)
+    if event is not None:
+        transaction.on_commit(event.save)
+
+
+def record_changes(instances, action):
+    """Queue ChangeEvents for rows changed by one bulk update, inserted together"""
+    events = [event for event in (change_event(instance, action) for instance in instances) if event]
+    if events:
+        transaction.on_commit(lambda: ChangeEvent.objects.bulk_create(events))
+
+
+def domain_event(instance, action, from_status, actor=None):
+    """Unsaved DomainEvent for `instance` moving out of `from_status`, or None if it isn't tracked"""
+    description = describe_change(instance)
+    if description is None:
+        return None
+
+    resource, payload, _ = description
+    to_status = payload.pop('status', '')
+    return DomainEvent(
+        resource=resource,
+        object_id=instance.pk,
+        action=action,
+        from_status=from_status or '',
+        to_status=to_status if action != 'deleted' else '',
+        actor_id=actor.pk if actor is not None else None,
+        data=payload,
+    )
+
+
+def record_transitions(changes, action, actor=None):
+    """Log (instance, previous status) pairs to the domain event log once the transaction commits"""
+    events = [
+        event for event in (
+            domain_event(instance, action, from_status, actor) for instance, from_status in changes
+        ) if event
+    ]
+    if events:
+        transaction.on_commit(lambda: writer.enqueue(events))
+
+
+def snapshot_status(sender, instance, **kwargs):
+    """post_init receiver: remember the status the row was loaded with"""
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+def handle_saved(sender, instance, created, **kwargs):
+    """
+    post_save receiver; views label state transitions via `_change_action`
+    and name who made them via `_change_actor`
+    """
+    label = instance.__dict__.pop('_change_action', None)
+    actor = instance.__dict__.pop('_change_actor', None)
+    action = label or ('created' if created else 'updated')
+    record_change(instance, action)
+
+    previous = None if created else instance.__dict__.get('_loaded_status')
+    current = instance.__dict__.get('status')
+    if created or label or previous != current:
+        record_transitions([(instance, previous)], label or ('created' if created else 'status_changed'), actor)
+    instance._loaded_status = current
+
+
+def handle_deleted(sender, instance, **kwargs):
+    """post_delete receiver"""
+    record_change(instance, 'deleted')
+    record_transitions([(instance, instance.__dict__.get('status'))], 'deleted')
+
+
+def change_events_after(last_id, limit):
+    """Settled change events after `last_id`, in id order"""
+    events = settled_rows(ChangeEvent, 'created_at', settings.EVENT_STREAM_SETTLE_SECONDS)
+    return list(events.filter(id__gt=last_id).order_by('id')[:limit])
+
+
+def missed_events(last_id, limit):
+    """
+    Change events a client resuming after `last_id` missed, or None when it
+    can't catch up: more than `limit` of them, or some already pruned
+    """
+    events = change_events_after(last_id, limit + 1)
+    if len(events) > limit:
+        return None
+    oldest = ChangeEvent.objects.aggregate(oldest=Min('id'))['oldest']
+    if oldest is not None and last_id < oldest - 1:
+        return None
+    return events
+
+
+def settled_head():
+    events = settled_rows(ChangeEvent, 'created_at', settings.EVENT_STREAM_SETTLE_SECONDS)
+    return events.aggregate(latest=Max('id'))['latest'] or 0
+
+
+STREAM_TICKET_SALT = 'inventory.events.stream'
+
+
+def issue_stream_ticket(user):
+    return signing.dumps(str(user.pk), salt=STREAM_TICKET_SALT)
+
+
+def stream_ticket_user_id(ticket):
+    """The user id in a valid stream ticket, or None if it is forged or expired"""
+    try:
+        return signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=settings.EVENT_STREAM_TICKET_SECONDS)
+    except signing.BadSignature:
+        return None
+
+
+class StreamTicketView(APIView):
+    """Issue a short-lived ticket that opens the event stream"""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            'ticket': issue_stream_ticket(request.user),
+            'expires_in': settings.EVENT_STREAM_TICKET_SECONDS,
+        })
+
+
+def is_visible_to(event, user):
+    """Admins and managers see everything, employees only their own rows"""
+    if user.role in ['admin', 'manager']:
+        return True
+    return not event.audience or str(user.id) in event.audience
+
+
+class ChangeEventBroker:
+    """Per-process fan-out of new ChangeEvent rows to subscriber queues"""
+
+    def __init__(self, poll_interval=1.0, queue_size=1000):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.last_id = 0
+        self.task = None
+
+    async def subscribe(self):
+        """Register a subscriber queue, starting the poller if needed"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+
+        if not self.is_running():
+            # Start from the current head so only new events are broadcast
+            latest = await sync_to_async(settled_head)()
+            if not self.is_running():
+                self.last_id = latest
+                self.task = asyncio.ensure_future(self.run())
+
+        return queue
+
+    def is_running(self):
+        return (
+            self.task is not None
+            and not self.task.done()
+            and self.task.get_loop() is asyncio.get_running_loop()
+        )
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    async def run(self):
+        """Poll for new events while anyone is subscribed"""
+        while self.subscribers:
+            try:
+                events = await sync_to_async(change_events_after)(self.last_id, 500)
+            except Exception as e:
+                print(f"Error polling change events: {str(e)}")
+                events = []
+
+            for event in events:
+                for queue in list(self.subscribers):
+                    try:
+                        queue.put_nowait(event)
+                    except asyncio.QueueFull:
+                        # Slow client: drop it, it resyncs from Last-Event-ID on reconnect
+                        self.unsubscribe(queue)
+                        queue.overflowed = True
+
+            if events:
+                self.last_id = events[-1].id
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+        self.task = None
+
+
+broker = ChangeEventBroker(
+    poll_interval=getattr(settings, 'EVENT_STREAM_POLL_INTERVAL', 1.0)
+)
@@ -0,0 +1,223 @@
+"""
+Assignment History Timelines
+
+The custody chain of a device, or the device history of an employee, as
+one chronological list of events: assignments, approvals, returns and
+the tickets raised about the device or by the employee.
+
+Each kind of event comes from its own query, which joins in the device
+and people it mentions and reads at most one page past the cursor. A page
+therefore costs one query per event kind, whatever the length of the
+history. Pages are keyset paginated on (time, kind, id), and `next` is an
+opaque cursor for the event after the last one returned.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from django.conf import settings
+from django.db.models import Case, F, Q, When
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from apps.authentication.models import Employee, full_name_expression
+from .models import Assignment, TicketRequest
+
+
+def person_name(relation):
+    """Full name of the employee behind `relation`, or None when the relation is empty"""
+    return Case(
+        When(**{f'{relation}__isnull': False}, then=full_name_expression(f'{relation}__')),
+        default=None,
+    )
+
+
+ASSIGNMENT_FIELDS = {
+    'device_pk': 'device_id',
+    'device_code': 'device__device_id',
+    'device_name': 'device__name',
+    'employee_pk': 'employee_id',
+    'employee_name': full_name_expression('employee__'),
+}
+
+TICKET_FIELDS = {
+    'ticket_number': 'ticket_number',
+    'device_pk': 'device_id',
+    'device_code': 'device__device_id',
+    'device_name': 'device__name',
+    'employee_pk': 'requested_by_id',
+    'employee_name': full_name_expression('requested_by__'),
+}
+
+# (event, model, time field, fields beyond the shared ones); the position is the tie-break rank.
+# Fields map output names to model fields or expressions
+EVENT_KINDS = [
+    ('assigned', Assignment, 'assigned_date', {
+        'by': person_name('assigned_by'),
+        'status': 'status',
+        'expected_return_date': 'expected_return_date',
+        'notes': 'assignment_notes',
+    }),
+    ('assignment_approved', Assignment, 'assignment_approved_date', {
+        'by': person_name('assignment_approved_by'),
+        'undertaking': 'assignment_undertaking',
+    }),
+    ('returned', Assignment, 'return_date', {
+        'by': person_name('return_approved_by'),
+        'condition': 'device_condition_on_return',
+        'broken': 'device_broken',
+        'notes': 'return_notes',
+    }),
+    ('ticket_opened', TicketRequest, 'created_at', {
+        'ticket_type': 'ticket_type',
+        'priority': 'priority',
+        'subject': 'subject',
+        'status': 'status',
+    }),
+    ('ticket_resolved', TicketRequest, 'resolved_at', {
+        'by': person_name('assigned_to'),
+        'status': 'status',
+        'notes': 'resolution_notes',
+    }),
+]
+
+
+def selected_fields(fields):
+    """values() arguments for {output name: field name or expression}"""
+    names = [name for name, source in fields.items() if source == name]
+    expressions = {
+        name: F(source) if isinstance(source, str) else source
+        for name, source in fields.items() if source != name
+    }
+    return names, expressions
+
+
+class InvalidTimelineQuery(ValueError):
+    pass
+
+
+def encode_cursor(at, rank, pk):
+    key = [at.isoformat(), rank, pk]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(time, rank, id) from a `next` cursor"""
+    try:
+        at, rank, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(at), int(rank), uuid.UUID(pk)
+    except (TypeError, ValueError, AttributeError):
+        raise InvalidTimelineQuery('Invalid cursor')
+
+
+def after_cursor(queryset, rank, cursor, descending):
+    """Limit one event kind to the events that sort after `cursor`"""
+    at, cursor_rank, pk = cursor
+    after = 'lt' if descending else 'gt'
+    if rank == cursor_rank:
+        return queryset.filter(Q(**{f'at__{after}': at}) | Q(at=at, **{f'id__{after}': pk}))
+
+    # At the cursor's time, kinds ranked after it come later (earlier when descending)
+    if descending:
+        lookup = 'lte' if rank < cursor_rank else 'lt'
+    else:
+        lookup = 'gte' if rank > cursor_rank else 'gt'
+    return queryset.filter(**{f'at__{lookup}': at})
+
+
+def represent(kind, model, row):
+    event = {'event': kind, 'at': row.pop('at')}
+    if model is Assignment:
+        event['assignment'] = row.pop('id')
+    else:
+        event['ticket'] = row.pop('id')
+        event['ticket_number'] = row.pop('ticket_number')
+    device_pk = row.pop('device_pk')
+    device = {'id': device_pk, 'device_id': row.pop('device_code'), 'name': row.pop('device_name')}
+    event['device'] = device if device_pk else None
+    event['employee'] = {'id': row.pop('employee_pk'), 'name': row.pop('employee_name')}
+    event.update(row)
+    return event
+
+
+def timeline(assignments, tickets, cursor=None, limit=None, descending=False):
+    """
+    One page of events from the `assignments` and `tickets` querysets, and
+    the cursor for the next page (None on the last one)
+    """
+    limit = limit or settings.HISTORY_PAGE_SIZE
+    sources = {Assignment: assignments, TicketRequest: tickets}
+    order = ['-at', '-id'] if descending else ['at', 'id']
+
+    events = []
+    for rank, (kind, model, time_field, fields) in enumerate(EVENT_KINDS):
+        queryset = sources[model].filter(**{f'{time_field}__isnull': False}).annotate(at=F(time_field))
+        if cursor is not None:
+            queryset = after_cursor(queryset, rank, cursor, descending)
+        shared = ASSIGNMENT_FIELDS if model is Assignment else TICKET_FIELDS
+        names, expressions = selected_fields({**shared, **fields})
+        for row in queryset.order_by(*order).values('id', 'at', *names, **expressions)[:limit + 1]:
+            events.append((row['at'], rank, str(row['id']), kind, model, row))
+
+    events.sort(key=lambda event: event[:3], reverse=descending)
+    page = events[:limit]
+    results = [represent(kind, model, row) for _, _, _, kind, model, row in page]
+
+    next_cursor = None
+    if len(events) > limit:
+        next_cursor = encode_cursor(*page[-1][:3])
+    return results, next_cursor
+
+
+def timeline_response_data(request, assignments, tickets):
+    """Page of the timeline for `request`'s ?cursor=, ?page_size= and ?order=, with the next page's URL"""
+    cursor = request.query_params.get('cursor')
+    cursor = decode_cursor(cursor) if cursor else None
+
+    try:
+        limit = int(request.query_params.get('page_size', settings.HISTORY_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.HISTORY_MAX_PAGE_SIZE:
+        raise InvalidTimelineQuery(f'page_size must be between 1 and {settings.HISTORY_MAX_PAGE_SIZE}')
+
+    order = request.query_params.get('order', 'asc')
+    if order not in ['asc', 'desc']:
+        raise InvalidTimelineQuery('order must be asc or desc')
+
+    results, next_cursor = timeline(assignments, tickets, cursor, limit, descending=order == 'desc')
+    next_url = None
+    if next_cursor:
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+    return {'next': next_url, 'results': results}
+
+
+class EmployeeHistoryView(APIView):
+    """Timeline of an employee's assignments and the tickets they raised"""
+    
+    permission_classes = [IsAuthenticated]
+    read_replica = True
+    
+    def get(self, request, pk):
+        # Admins and managers see anyone's history, employees only their own
+        if request.user.role not in ['admin', 'manager'] and request.user.pk != pk:
+            return Response({
+                'error': 'You can only view your own history'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        if not Employee.objects.filter(pk=pk).exists():
+            return Response({
+                'error': 'Employee not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            data = timeline_response_data(
+                request,
+                Assignment.objects.filter(employee_id=pk),
+                TicketRequest.objects.filter(requested_by_id=pk),
+            )
+        except InvalidTimelineQuery as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
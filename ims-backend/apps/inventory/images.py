@@ -0,0 +1,174 @@
+"""
+Assignment Photo Processing
+
+Handover and return photos are kept exactly as uploaded. Once the
+approval commits, a background thread renders upright, EXIF-free WebP and
+JPEG renditions at fixed sizes next to the original and records them on
+the assignment, so lists can link a thumbnail instead of the full photo.
+"""
+import io
+import os
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+from config.background import submit_after_commit
+from .models import Assignment
+from .storage import adjust_references
+
+
+# Longest edge in pixels for each rendition
+RENDITION_SIZES = {
+    'large': 1600,
+    'thumb': 320,
+}
+
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+IMAGE_FIELDS = ['assignment_image', 'return_image']
+
+
+def render_renditions(source):
+    """
+    Render every rendition size and format of an image
+
+    Args:
+        source: Path or binary file object of the original image
+
+    Returns:
+        dict: {size: {'width', 'height', 'webp': bytes, 'jpeg': bytes}}
+    """
+    largest = max(RENDITION_SIZES.values())
+
+    with Image.open(source) as original:
+        # JPEGs can be decoded straight at a reduced scale
+        original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    renditions = {}
+    # Largest first, so each smaller size is resized from the previous one
+    for size_name, size in sorted(RENDITION_SIZES.items(), key=lambda item: -item[1]):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        rendition = {'width': image.width, 'height': image.height}
+        for extension, (image_format, options) in RENDITION_FORMATS.items():
+            # Metadata is only written when passed explicitly, so EXIF is dropped
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, **options)
+            rendition[extension] = buffer.getvalue()
+        renditions[size_name] = rendition
+
+    return renditions
+
+
+def _render_bytes(data):
+    """Process pool task: render an encoded image, or None if it can't be read"""
+    try:
+        return render_renditions(io.BytesIO(data))
+    except (OSError, Image.DecompressionBombError) as e:
+        print(f"Error rendering image: {str(e)}")
+        return None
+
+
+def render_many(images, workers=None):
+    """Render renditions for a list of encoded images across a process pool"""
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or len(images) <= 1:
+        return [_render_bytes(data) for data in images]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_render_bytes, images))
+
+
+def rendition_name(name, size_name, extension):
+    """assignments/photo.jpg -> assignments/renditions/photo_thumb.webp"""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'renditions', f'{stem}_{size_name}.{extension}')
+
+
+def store_renditions(name, renditions):
+    """Save rendered files next to `name` and return the record kept on the model"""
+    record = {'source': name}
+    for size_name, rendition in renditions.items():
+        entry = {'width': rendition['width'], 'height': rendition['height']}
+        for extension in RENDITION_FORMATS:
+            entry[extension] = default_storage.save(
+                rendition_name(name, size_name, extension),
+                ContentFile(rendition[extension])
+            )
+        record[size_name] = entry
+    return record
+
+
+def rendition_names(record):
+    """Storage names of every file in a renditions record"""
+    return [
+        entry[extension]
+        for size_name, entry in record.items() if size_name != 'source'
+        for extension in RENDITION_FORMATS
+    ]
+
+
+def pending_fields(assignment, fields=IMAGE_FIELDS):
+    """Image fields of `assignment` whose renditions are missing or stale"""
+    return [
+        field for field in fields
+        if getattr(assignment, field)
+        and getattr(assignment, f'{field}_renditions').get('source') != getattr(assignment, field).name
+    ]
+
+
+def save_renditions(assignment_id, records):
+    """Record renditions without Assignment.save(), which touches the device and emits change events"""
+    fields = {f'{field}_renditions': record for field, record in records.items()}
+
+    with transaction.atomic():
+        previous = Assignment.objects.select_for_update().filter(pk=assignment_id).values(*fields).first()
+        if previous is None:
+            return
+        Assignment.objects.filter(pk=assignment_id).update(**fields)
+
+        # update() skips the signals that keep media reference counts
+        adjust_references([name for record in fields.values() for name in rendition_names(record)], 1)
+        adjust_references([name for record in previous.values() for name in rendition_names(record)], -1)
+
+
+def process_assignment_images(assignment_id, fields=IMAGE_FIELDS):
+    """Render and record missing renditions for an assignment's photos"""
+    assignment = Assignment.objects.filter(pk=assignment_id).first()
+    if assignment is None:
+        return 0
+
+    records = {}
+    for field in pending_fields(assignment, fields):
+        image = getattr(assignment, field)
+        try:
+            with image.open('rb') as source:
+                records[field] = store_renditions(image.name, render_renditions(source))
+        except (OSError, Image.DecompressionBombError) as e:
+            print(f"Error processing {image.name}: {str(e)}")
+
+    if records:
+        save_renditions(assignment_id, records)
+    return len(records)
+
+
+def _process_in_background(assignment_id, fields):
+    try:
+        process_assignment_images(assignment_id, fields)
+    except Exception as e:
+        print(f"Error processing images for assignment {assignment_id}: {str(e)}")
+
+
+def queue_image_processing(assignment, fields):
+    """Render renditions on a background thread once the current transaction commits"""
+    submit_after_commit(
+        'images', _process_in_background, assignment.pk, fields, workers=settings.IMAGE_PIPELINE_WORKERS
+    )
@@ -0,0 +1,36 @@
+"""
+Management command to rebuild the daily device utilization rollups for a range of days
+"""
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.inventory.rollups import build_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild device utilization rollups from --since (default: 90 days ago) to yesterday'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            help='First day to rebuild (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--until',
+            type=date.fromisoformat,
+            help='Last day to rebuild (YYYY-MM-DD), default yesterday'
+        )
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        last_day = options['until'] or yesterday
+        first_day = options['since'] or last_day - timedelta(days=89)
+
+        if last_day > yesterday:
+            raise CommandError('--until must be a day that has ended')
+        if first_day > last_day:
+            raise CommandError('--since must not be after --until')
+
+        rows = build_rollups(first_day, last_day)
+        self.stdout.write(self.style.SUCCESS(f'Built {rows} rollup rows for {first_day} to {last_day}'))
@@ -0,0 +1,93 @@
+"""
+Management command to benchmark PostgreSQL connection acquisition under burst
+
+Run it once per DB_CONNECTION_MODE against the same database to compare
+them, e.g.:
+
+    DB_CONNECTION_MODE=persistent python manage.py benchmark_db_connections
+    DB_CONNECTION_MODE=pool python manage.py benchmark_db_connections
+    DB_CONNECTION_MODE=pgbouncer DATABASE_URL=postgres://...:6432/... python manage.py benchmark_db_connections
+
+Each simulated request runs SELECT 1 between the same connection cleanup
+Django performs on request_started and request_finished.
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, close_old_connections
+
+
+class Command(BaseCommand):
+    help = 'Measure database connection-acquire latency for bursts of concurrent requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent request threads')
+        parser.add_argument('--bursts', type=int, default=10, help='Number of bursts')
+        parser.add_argument('--requests', type=int, default=5, help='Requests per thread per burst')
+        parser.add_argument('--pause', type=float, default=0.5, help='Idle seconds between bursts')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('This benchmark needs a PostgreSQL DATABASE_URL')
+
+        barrier = threading.Barrier(options['threads'])
+
+        def simulate_request():
+            close_old_connections()
+            started = time.perf_counter()
+            connection.ensure_connection()
+            acquired = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            finished = time.perf_counter()
+            # Persistent connections stay open, pooled ones go back to the pool
+            close_old_connections()
+            return acquired - started, finished - started
+
+        def worker(last_burst):
+            barrier.wait()
+            results = [simulate_request() for _ in range(options['requests'])]
+            if last_burst:
+                # Threads keep persistent connections open; close them before exiting
+                connection.close()
+            return results
+
+        acquire_latencies, request_latencies = [], []
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            for burst in range(options['bursts']):
+                last_burst = burst == options['bursts'] - 1
+                for results in executor.map(worker, [last_burst] * options['threads']):
+                    for acquire, total in results:
+                        acquire_latencies.append(acquire)
+                        request_latencies.append(total)
+                if not last_burst:
+                    time.sleep(options['pause'])
+
+        elapsed = time.perf_counter() - started
+        acquire_latencies.sort()
+        request_latencies.sort()
+
+        self.stdout.write(f'Mode:          {settings.DB_CONNECTION_MODE}')
+        self.stdout.write(f'Threads:       {options["threads"]}')
+        self.stdout.write(f'Requests:      {len(request_latencies)} in {elapsed:.2f}s')
+        self.stdout.write(self.style.SUCCESS(
+            f'Acquire p50:   {statistics.median(acquire_latencies) * 1000:.2f} ms'
+        ))
+        self.stdout.write(f'Acquire p95:   {acquire_latencies[int(len(acquire_latencies) * 0.95) - 1] * 1000:.2f} ms')
+        self.stdout.write(f'Acquire max:   {acquire_latencies[-1] * 1000:.2f} ms')
+        self.stdout.write(f'Request p50:   {statistics.median(request_latencies) * 1000:.2f} ms')
+
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            stats = pool.get_stats()
+            self.stdout.write(
+                f'Pool:          size {stats.get("pool_size", 0)}, '
+                f'queued {stats.get("requests_queued", 0)}, '
+                f'wait {stats.get("requests_wait_ms", 0)} ms total'
+            )
@@ -0,0 +1,66 @@
+"""
+Management command to benchmark the assignment photo pipeline
+
+Renders every image in a directory serially and then across a process
+pool, without writing anything to storage, e.g.:
+
+    python manage.py benchmark_image_pipeline ~/sample-photos --workers 4
+"""
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.images import render_many
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+class Command(BaseCommand):
+    help = 'Measure image rendition throughput over a directory of sample photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory of sample photos')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (defaults to CPU count)')
+
+    def run(self, label, images, workers):
+        started = time.perf_counter()
+        rendered = render_many(images, workers=workers)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f'  Elapsed:       {elapsed:.2f}s')
+        self.stdout.write(self.style.SUCCESS(f'  Throughput:    {len(images) / elapsed:.1f} photos/s'))
+        self.stdout.write(f'  Input:         {sum(map(len, images)) / elapsed / 1024 / 1024:.1f} MB/s')
+        return rendered
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f'{directory} is not a directory')
+
+        images = []
+        for filename in sorted(os.listdir(directory)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(directory, filename), 'rb') as f:
+                    images.append(f.read())
+
+        if not images:
+            raise CommandError(f'No images found in {directory}')
+
+        workers = options['workers'] or os.cpu_count() or 1
+        original_bytes = sum(map(len, images))
+        self.stdout.write(f'{len(images)} photos, {original_bytes / 1024 / 1024:.1f} MB')
+
+        self.run('Serial', images, workers=1)
+        rendered = self.run(f'Process pool ({workers} workers)', images, workers=workers)
+
+        rendered = [renditions for renditions in rendered if renditions is not None]
+        if len(rendered) < len(images):
+            self.stdout.write(self.style.WARNING(f'  {len(images) - len(rendered)} photos could not be read'))
+
+        self.stdout.write('Average rendition size:')
+        for size_name in rendered[0] if rendered else []:
+            for extension in ('webp', 'jpeg'):
+                average = sum(len(r[size_name][extension]) for r in rendered) / len(rendered)
+                self.stdout.write(f'  {size_name} {extension}: {average / 1024:.1f} KB')
+        self.stdout.write(f'  original: {original_bytes / len(images) / 1024:.1f} KB')
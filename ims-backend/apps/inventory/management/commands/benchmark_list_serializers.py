@@ -0,0 +1,153 @@
+"""
+Management command to benchmark values-based list serialization
+
+Inserts synthetic employees, devices, assignments and tickets inside a
+transaction that is rolled back afterwards, then builds list pages of each
+size with the DRF list serializers and with their compiled .values_list()
+form, e.g.:
+
+    python manage.py benchmark_list_serializers --sizes 1000,10000,100000
+
+Run it against a development database: the transaction holds the write
+lock while it runs.
+"""
+import time
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.authentication.models import Employee
+from apps.inventory.models import Device, Assignment, TicketRequest
+from apps.inventory.serializers import (
+    DeviceListSerializer,
+    AssignmentListSerializer,
+    TicketRequestListSerializer,
+)
+from config.fieldsets import project_queryset
+from config.renderers import FastJSONRenderer
+from config.values_serializers import ValuesSerializer
+
+
+BATCH_SIZE = 2000
+
+
+def create_rows(count):
+    """Synthetic rows; every other ticket has no device and half the assignments no approver"""
+    now = timezone.now()
+    run = uuid.uuid4().hex[:6]
+
+    employees = Employee.objects.bulk_create([
+        Employee(
+            email=f'bench-{run}-{n}@example.com',
+            first_name='Bench',
+            last_name=f'Employee {n}',
+            employee_id=f'B{run}{n:03d}',
+            department='Engineering',
+        )
+        for n in range(100)
+    ])
+
+    devices = Device.objects.bulk_create([
+        Device(
+            device_id=f'B{run}{n:07d}',
+            name=f'Laptop {n}',
+            device_type='laptop',
+            brand='Lenovo',
+            model='ThinkPad T14',
+            serial_number=f'SN{run}{n:08d}',
+            status='assigned',
+            condition='good',
+            location='Head office',
+            specifications={'cpu': 'i7-1265U', 'ram_gb': 16},
+            notes='Issued with charger',
+        )
+        for n in range(count)
+    ], batch_size=BATCH_SIZE)
+
+    Assignment.objects.bulk_create([
+        Assignment(
+            device=device,
+            employee=employees[n % len(employees)],
+            assignment_approved_by=employees[0] if n % 2 else None,
+            expected_return_date=(now + timedelta(days=90)).date(),
+            status='active',
+            assignment_notes='Standard issue',
+        )
+        for n, device in enumerate(devices)
+    ], batch_size=BATCH_SIZE)
+
+    TicketRequest.objects.bulk_create([
+        TicketRequest(
+            ticket_number=f'B{run}{n:07d}',
+            requested_by=employees[n % len(employees)],
+            ticket_type='repair',
+            device=devices[n] if n % 2 else None,
+            subject=f'Keyboard issue {n}',
+            description='Several keys stopped working after the latest update.',
+        )
+        for n in range(count)
+    ], batch_size=BATCH_SIZE)
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/second of DRF list serializers and the values-based fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated page sizes')
+
+    def time_page(self, build):
+        started = time.perf_counter()
+        data = build()
+        return time.perf_counter() - started, data
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+
+        request = Request(APIRequestFactory().get('/api/inventory/'))
+        context = {'request': request}
+        renderer = FastJSONRenderer()
+        lists = [
+            ('Devices', DeviceListSerializer, Device.objects.order_by('-created_at')),
+            ('Assignments', AssignmentListSerializer, Assignment.objects.order_by('-assigned_date')),
+            ('Tickets', TicketRequestListSerializer, TicketRequest.objects.order_by('-created_at')),
+        ]
+
+        with transaction.atomic():
+            self.stdout.write(f'Creating {sizes[-1]} devices, assignments and tickets...')
+            create_rows(sizes[-1])
+
+            for label, serializer_class, queryset in lists:
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                serializer = serializer_class(context=context)
+                compiled = ValuesSerializer(serializer, queryset.model)
+                if not compiled.supported:
+                    raise CommandError(f'{serializer_class.__name__} cannot be compiled to .values_list()')
+
+                for size in sizes:
+                    drf_time, drf_data = self.time_page(lambda: serializer_class(
+                        project_queryset(queryset, serializer)[:size],
+                        many=True,
+                        context=context
+                    ).data)
+                    fast_time, fast_data = self.time_page(lambda: compiled.to_representation(
+                        compiled.values_queryset(queryset)[:size]
+                    ))
+
+                    if renderer.render(drf_data) != renderer.render(fast_data):
+                        raise CommandError(f'{label}: values output differs from the serializer')
+
+                    self.stdout.write(
+                        f'  {size:>7} rows   DRF {size / drf_time:>9,.0f} rows/s'
+                        f'   values {size / fast_time:>9,.0f} rows/s'
+                        f'   {drf_time / fast_time:4.1f}x'
+                    )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Output identical for every page; benchmark rows rolled back'))
@@ -0,0 +1,94 @@
+"""
+Management command to benchmark read throughput under concurrent clients
+
+Run it once against the WSGI server and once against the ASGI server to
+compare the two deployment modes, e.g.:
+
+    gunicorn config.wsgi:application -w 4 --bind 127.0.0.1:8000
+    gunicorn config.asgi:application -w 4 -k uvicorn.workers.UvicornWorker --bind 127.0.0.1:8001
+
+    python manage.py benchmark_read_concurrency --url http://127.0.0.1:8000 --email ... --password ...
+    python manage.py benchmark_read_concurrency --url http://127.0.0.1:8001 --email ... --password ...
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_ENDPOINTS = [
+    '/api/inventory/devices/',
+    '/api/inventory/devices/available/',
+    '/api/inventory/assignments/my_assignments/',
+    '/api/inventory/tickets/my_tickets/',
+    '/api/inventory/dashboard/stats/',
+    '/api/auth/me/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Fire concurrent authenticated GET requests at a running server and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', required=True, help='Base URL of the running server')
+        parser.add_argument('--email', required=True, help='Login email')
+        parser.add_argument('--password', required=True, help='Login password')
+        parser.add_argument('--clients', type=int, default=200, help='Concurrent clients')
+        parser.add_argument('--requests', type=int, default=20, help='Requests per client')
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            dest='endpoints',
+            help='Endpoint path to hit (repeatable, defaults to the async read endpoints)'
+        )
+
+    def login(self, base_url, email, password):
+        response = requests.post(
+            f'{base_url}/api/auth/login/',
+            json={'email': email, 'password': password},
+            timeout=30
+        )
+        if response.status_code != 200:
+            raise CommandError(f'Login failed: {response.status_code} - {response.text}')
+        return response.json()['tokens']['access']
+
+    def handle(self, *args, **options):
+        base_url = options['url'].rstrip('/')
+        endpoints = options['endpoints'] or DEFAULT_ENDPOINTS
+        token = self.login(base_url, options['email'], options['password'])
+        headers = {'Authorization': f'Bearer {token}'}
+
+        local = threading.local()
+
+        def client(client_index):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            latencies, errors = [], 0
+            for i in range(options['requests']):
+                endpoint = endpoints[(client_index + i) % len(endpoints)]
+                started = time.perf_counter()
+                try:
+                    response = local.session.get(f'{base_url}{endpoint}', headers=headers, timeout=60)
+                    if response.status_code != 200:
+                        errors += 1
+                except requests.RequestException:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+            return latencies, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['clients']) as executor:
+            results = list(executor.map(client, range(options['clients'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+        errors = sum(client_errors for _, client_errors in results)
+
+        self.stdout.write(f'Clients:      {options["clients"]}')
+        self.stdout.write(f'Requests:     {len(latencies)} ({errors} errors)')
+        self.stdout.write(f'Elapsed:      {elapsed:.2f}s')
+        self.stdout.write(self.style.SUCCESS(f'Throughput:   {len(latencies) / elapsed:.1f} req/s'))
+        self.stdout.write(f'Latency p50:  {statistics.median(latencies) * 1000:.1f} ms')
+        self.stdout.write(f'Latency p95:  {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms')
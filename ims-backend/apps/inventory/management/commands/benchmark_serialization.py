@@ -0,0 +1,142 @@
+"""
+Management command to benchmark JSON rendering and parsing
+
+Serializes in-memory devices and assignments (nothing is read from or
+written to the database), then encodes and decodes the result with DRF's
+stock JSON classes and with the orjson-backed ones, e.g.:
+
+    python manage.py benchmark_serialization --rows 10000 --repeat 5
+"""
+import io
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from apps.authentication.models import Employee
+from apps.inventory.models import Device, Assignment
+from apps.inventory.serializers import DeviceSerializer, AssignmentSerializer
+from config import renderers
+
+
+def build_rows(count):
+    """Unsaved devices and assignments with every field type the API returns"""
+    now = timezone.now()
+    employees = [
+        Employee(
+            id=uuid.uuid4(),
+            email=f'employee{n}@example.com',
+            first_name='Employee',
+            last_name=str(n),
+            employee_id=f'EMP{n:05d}',
+            department='Engineering',
+            date_joined=now,
+        )
+        for n in range(50)
+    ]
+
+    devices, assignments = [], []
+    for n in range(count):
+        device = Device(
+            id=uuid.uuid4(),
+            device_id=f'DEV{n:06d}',
+            name=f'Laptop {n}',
+            device_type='laptop',
+            brand='Lenovo',
+            model='ThinkPad T14',
+            serial_number=f'SN{n:08d}',
+            status='assigned',
+            condition='good',
+            specifications={'cpu': 'i7-1265U', 'ram_gb': 16, 'storage': '512GB SSD', 'ports': ['usb-c', 'hdmi']},
+            purchase_date=(now - timedelta(days=n % 900)).date(),
+            purchase_price=Decimal('1249.99') + n % 100,
+            warranty_expiry=(now + timedelta(days=n % 700)).date(),
+            location='Head office – 3rd floor',
+            notes='Issued with charger and sleeve',
+            created_at=now,
+            updated_at=now,
+        )
+        employee = employees[n % len(employees)]
+        assignment = Assignment(
+            id=uuid.uuid4(),
+            device=device,
+            employee=employee,
+            assigned_by=employees[0],
+            assigned_date=now - timedelta(days=n % 300, microseconds=n),
+            expected_return_date=(now + timedelta(days=90)).date(),
+            status='active',
+            assignment_notes='Standard issue',
+            assignment_undertaking=True,
+        )
+        # DeviceSerializer reads the prefetched active assignment
+        device.active_assignments = [assignment]
+        devices.append(device)
+        assignments.append(assignment)
+
+    return devices, assignments
+
+
+class Command(BaseCommand):
+    help = 'Compare encode/decode time and peak memory of the stock and orjson JSON classes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Devices and assignments to serialize')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement (best is reported)')
+
+    def measure(self, func, repeat):
+        """(best seconds, peak traced bytes) for `func`"""
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return best, peak
+
+    def report(self, label, stock, fast):
+        (stock_time, stock_peak), (fast_time, fast_peak) = stock, fast
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f'  DRF:     {stock_time * 1000:8.1f} ms   peak {stock_peak / 1024 / 1024:6.1f} MB')
+        self.stdout.write(f'  orjson:  {fast_time * 1000:8.1f} ms   peak {fast_peak / 1024 / 1024:6.1f} MB')
+        self.stdout.write(self.style.SUCCESS(f'  Speedup: {stock_time / fast_time:.1f}x'))
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            raise CommandError('orjson is not installed; the fast renderer falls back to DRF')
+
+        devices, assignments = build_rows(options['rows'])
+        started = time.perf_counter()
+        data = {
+            'devices': DeviceSerializer(devices, many=True).data,
+            'assignments': AssignmentSerializer(assignments, many=True).data,
+        }
+        self.stdout.write(f'Serializer .data: {(time.perf_counter() - started) * 1000:.1f} ms (same for both)')
+
+        stock_renderer, fast_renderer = JSONRenderer(), renderers.FastJSONRenderer()
+        stock_output = stock_renderer.render(data)
+        fast_output = fast_renderer.render(data)
+        if stock_output != fast_output:
+            raise CommandError('Rendered output differs from DRF')
+        self.stdout.write(f'Response body: {len(fast_output) / 1024 / 1024:.1f} MB, identical to DRF')
+
+        repeat = options['repeat']
+        self.report(
+            'Render',
+            self.measure(lambda: stock_renderer.render(data), repeat),
+            self.measure(lambda: fast_renderer.render(data), repeat),
+        )
+
+        stock_parser, fast_parser = JSONParser(), renderers.FastJSONParser()
+        self.report(
+            'Parse',
+            self.measure(lambda: stock_parser.parse(io.BytesIO(fast_output)), repeat),
+            self.measure(lambda: fast_parser.parse(io.BytesIO(fast_output)), repeat),
+        )
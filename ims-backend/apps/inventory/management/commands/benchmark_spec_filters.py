@@ -0,0 +1,146 @@
+"""
+Management command to benchmark ?spec= filters with and without key indexes
+
+Inserts synthetic devices with varied specifications inside a transaction
+that is rolled back afterwards, then times the device list query (count
+and first page) for each filter, first without and then with the
+expression indexes for DEVICE_SPEC_INDEXED_KEYS, e.g.:
+
+    python manage.py benchmark_spec_filters --count 1000000
+
+The query plan of each filter is printed with the timings. Run it against
+a development database: the transaction holds the write lock while it runs.
+"""
+import time
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from apps.inventory.models import Device
+from apps.inventory.specifications import INDEX_PREFIX, filter_specifications, index_sql
+
+
+BATCH_SIZE = 2000
+PAGE_SIZE = 50
+
+FILTERS = [
+    ['ram_gb>=128'],
+    ['ram_gb>=32'],
+    ['storage_type=nvme'],
+    ['ram_gb=16', 'storage_type=ssd'],
+    ['storage_gb>=2000'],
+    ['display.size_in<13'],
+    ['touch'],
+]
+
+
+def specifications(n):
+    """Specs in the shapes devices really have: mixed keys, nesting and the odd string value"""
+    spec = {
+        'cpu': ['i5-1245U', 'i7-1265U', 'M2', 'Ryzen 7 7840U'][n % 4],
+        'ram_gb': [8, 16, 16, 32, 64][n % 5],
+        'storage_type': ['ssd', 'ssd', 'nvme', 'hdd'][n % 4 if n % 7 else 3],
+        'storage_gb': [256, 512, 1000, 2000][n % 4],
+    }
+    if n % 3:
+        spec['display'] = {'size_in': [13.3, 14, 15.6, 12.4][n % 4], 'resolution': '1920x1080'}
+    if n % 11 == 0:
+        spec['touch'] = bool(n % 2)
+    if n % 97 == 0:
+        spec['ram_gb'] = 128
+    if n % 101 == 0:
+        spec['ram_gb'] = f'{spec["ram_gb"]}GB'
+    return spec
+
+
+def create_devices(count):
+    run = uuid.uuid4().hex[:6]
+    for start in range(0, count, BATCH_SIZE):
+        Device.objects.bulk_create([
+            Device(
+                device_id=f'S{run}{n:08d}',
+                name=f'Laptop {n}',
+                device_type='laptop',
+                serial_number=f'SN{run}{n:09d}',
+                location='Head office',
+                specifications=specifications(n),
+            )
+            for n in range(start, min(start + BATCH_SIZE, count))
+        ])
+
+
+class Command(BaseCommand):
+    help = 'Time ?spec= device filters with and without the hot-key expression indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000000, help='Synthetic devices to insert')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per query; the fastest is reported')
+
+    def time_query(self, run, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def run_filters(self, repeat):
+        timings = {}
+        for clauses in FILTERS:
+            queryset = filter_specifications(Device.objects.order_by('-created_at'), clauses)
+            count_time, count = self.time_query(queryset.count, repeat)
+            page_time, _ = self.time_query(lambda: list(queryset[:PAGE_SIZE]), repeat)
+            timings[', '.join(clauses)] = (count_time, page_time, count)
+
+            self.stdout.write(f'  ?spec={"&spec=".join(clauses)}   {count} devices')
+            for line in queryset[:PAGE_SIZE].explain().splitlines():
+                self.stdout.write(f'      {line}')
+        return timings
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE devices')
+
+    def handle(self, *args, **options):
+        if options['count'] < 1:
+            raise CommandError('--count must be positive')
+
+        with transaction.atomic():
+            self.stdout.write(f'Creating {options["count"]} devices...')
+            create_devices(options['count'])
+
+            # Start from no key indexes, whatever sync_spec_indexes has created
+            with connection.cursor() as cursor:
+                for name in connection.introspection.get_constraints(cursor, 'devices'):
+                    if name.startswith(INDEX_PREFIX):
+                        cursor.execute(f'DROP INDEX {name}')
+            self.analyze()
+
+            self.stdout.write(self.style.MIGRATE_HEADING('Without key indexes'))
+            before = self.run_filters(options['repeat'])
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'With indexes on {", ".join(settings.DEVICE_SPEC_INDEXED_KEYS)}'
+            ))
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                for key in settings.DEVICE_SPEC_INDEXED_KEYS:
+                    # CONCURRENTLY can't run inside the benchmark's transaction
+                    cursor.execute(index_sql(connection.vendor, key).replace(' CONCURRENTLY', ''))
+            self.analyze()
+            self.stdout.write(f'  Built in {time.perf_counter() - started:.1f}s')
+            after = self.run_filters(options['repeat'])
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Count / first page, fastest of each'))
+        for label, (count_time, page_time, count) in before.items():
+            indexed_count, indexed_page, indexed_total = after[label]
+            if indexed_total != count:
+                raise CommandError(f'{label}: {indexed_total} devices with indexes, {count} without')
+            self.stdout.write(
+                f'  {label:<32} {count_time * 1000:>8.1f} / {page_time * 1000:>7.1f} ms'
+                f'  ->  {indexed_count * 1000:>8.1f} / {indexed_page * 1000:>7.1f} ms'
+            )
+        self.stdout.write(self.style.SUCCESS('Same results with and without indexes; benchmark rows rolled back'))
@@ -0,0 +1,133 @@
+"""
+Management command to benchmark concurrent SQLite access
+
+Runs the same multi-process read/write workload against a scratch database
+twice, once with SQLite's defaults and once with SQLITE_OPTIONS, e.g.:
+
+    python manage.py benchmark_sqlite --writers 4 --readers 4 --operations 200
+
+Writers run read-then-update transactions on devices, the pattern that
+fails with "database is locked" when a deferred transaction upgrades its
+lock; readers run device list queries alongside them.
+"""
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+DEVICE_COUNT = 200
+
+
+def _init_worker(settings_module, database):
+    """Configure Django against the scratch database in a spawned process"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    from django.conf import settings
+    settings.DATABASES = {'default': database}
+    settings.DATABASE_ROUTERS = []
+    import django
+    django.setup()
+
+
+def _prepare():
+    from django.core.management import call_command
+    from apps.inventory.models import Device
+
+    call_command('migrate', verbosity=0)
+    Device.objects.bulk_create([
+        Device(
+            device_id=f'BENCH{i:04d}',
+            name=f'Benchmark device {i}',
+            device_type='laptop',
+            brand='Bench',
+            model='B1',
+        )
+        for i in range(DEVICE_COUNT)
+    ])
+
+
+def _write(operations):
+    from django.db import transaction, OperationalError
+    from apps.inventory.models import Device
+
+    errors = 0
+    started = time.time()
+    for _ in range(operations):
+        try:
+            with transaction.atomic():
+                device = Device.objects.get(device_id=f'BENCH{random.randrange(DEVICE_COUNT):04d}')
+                device.status = 'maintenance' if device.status == 'available' else 'available'
+                device.save(update_fields=['status', 'updated_at'])
+        except OperationalError:
+            errors += 1
+    return started, time.time(), operations - errors, errors
+
+
+def _read(operations):
+    from django.db import OperationalError
+    from apps.inventory.models import Device
+
+    errors = 0
+    started = time.time()
+    for _ in range(operations):
+        try:
+            Device.objects.filter(status='available').count()
+            list(Device.objects.filter(status='available')[:20])
+        except OperationalError:
+            errors += 1
+    return started, time.time(), operations - errors, errors
+
+
+class Command(BaseCommand):
+    help = 'Compare default and tuned SQLite settings under concurrent writer and reader processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Writer processes')
+        parser.add_argument('--readers', type=int, default=4, help='Reader processes')
+        parser.add_argument('--operations', type=int, default=200, help='Operations per process')
+
+    def run_mode(self, label, database_options, options):
+        with tempfile.TemporaryDirectory() as directory:
+            database = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(directory, 'benchmark.sqlite3'),
+                'OPTIONS': database_options,
+            }
+            pool_args = {
+                'mp_context': multiprocessing.get_context('spawn'),
+                'initializer': _init_worker,
+                'initargs': (os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'), database),
+            }
+
+            with ProcessPoolExecutor(max_workers=1, **pool_args) as executor:
+                executor.submit(_prepare).result()
+
+            with ProcessPoolExecutor(max_workers=options['writers'] + options['readers'], **pool_args) as executor:
+                writes = [executor.submit(_write, options['operations']) for _ in range(options['writers'])]
+                reads = [executor.submit(_read, options['operations']) for _ in range(options['readers'])]
+                writes = [future.result() for future in writes]
+                reads = [future.result() for future in reads]
+
+        results = writes + reads
+        elapsed = max(end for _, end, _, _ in results) - min(start for start, _, _, _ in results)
+        committed = sum(ok for _, _, ok, _ in writes)
+        write_errors = sum(errors for _, _, _, errors in writes)
+        queries = sum(ok for _, _, ok, _ in reads)
+        read_errors = sum(errors for _, _, _, errors in reads)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f'  Elapsed:       {elapsed:.2f}s')
+        self.stdout.write(f'  Writes:        {committed / elapsed:.1f} tx/s ({write_errors} locked)')
+        self.stdout.write(f'  Reads:         {queries / elapsed:.1f} req/s ({read_errors} locked)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{options["writers"]} writers, {options["readers"]} readers, '
+            f'{options["operations"]} operations each'
+        )
+        self.run_mode('Default SQLite', {}, options)
+        self.run_mode('Tuned SQLite (SQLITE_OPTIONS)', settings.SQLITE_OPTIONS, options)
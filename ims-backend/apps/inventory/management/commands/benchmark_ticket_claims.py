@@ -0,0 +1,143 @@
+"""
+Management command to benchmark concurrent ticket claiming
+
+Queues synthetic tickets, then has several technician threads call
+claim_next_ticket() until the queue is empty, e.g.:
+
+    python manage.py benchmark_ticket_claims --tickets 2000 --technicians 8
+
+Every ticket must be claimed exactly once. Claims are committed, since
+each thread has its own connection, so the command refuses to run while
+real tickets are waiting, and deletes its tickets and technicians when it
+is done. Their domain events stay in the append-only log for good, so
+outside DEBUG it only runs with --i-know.
+
+The synthetic rows use EMP/TKT-shaped numbers and are dated 2000-01-01,
+so employee and ticket numbers allocated while the benchmark runs still
+follow on from the newest real ones.
+"""
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, close_old_connections
+from apps.authentication.models import Employee
+from apps.inventory.event_log import writer
+from apps.inventory.models import TicketRequest
+from apps.inventory.work_queue import claim_next_ticket, claimable_tickets
+
+
+PRIORITIES = ['low', 'medium', 'medium', 'high', 'urgent']
+
+# Older than any real row, so ID allocation never starts from a benchmark row
+BACKDATED = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def create_queue(tickets, technicians):
+    run = random.randrange(10 ** 6)
+    staff = Employee.objects.bulk_create([
+        Employee(
+            email=f'claims-{run:06d}-{n}@example.com',
+            first_name='Bench',
+            last_name=f'Technician {n}',
+            employee_id=f'EMP9{run:06d}{n:03d}',
+            role='manager',
+            password='!',
+            date_joined=BACKDATED,
+        )
+        for n in range(technicians + 1)
+    ])
+    TicketRequest.objects.bulk_create([
+        TicketRequest(
+            ticket_number=f'TKT9{run:06d}{n:06d}',
+            requested_by=staff[-1],
+            ticket_type='repair',
+            priority=PRIORITIES[n % len(PRIORITIES)],
+            subject=f'Benchmark ticket {n}',
+            description='Queued by benchmark_ticket_claims.',
+        )
+        for n in range(tickets)
+    ], batch_size=2000)
+    # created_at is auto_now_add, so it can only be backdated after the insert
+    TicketRequest.objects.filter(requested_by=staff[-1]).update(created_at=BACKDATED)
+    return staff
+
+
+class Command(BaseCommand):
+    help = 'Claim a queue of synthetic tickets from concurrent technician threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=2000, help='Tickets to queue')
+        parser.add_argument('--technicians', type=int, default=8, help='Concurrent claiming threads')
+        parser.add_argument(
+            '--i-know', action='store_true',
+            help='Run outside DEBUG, leaving the benchmark\'s domain events in the log'
+        )
+
+    def claim_all(self, technician, claimed):
+        timings = []
+        try:
+            while True:
+                started = time.perf_counter()
+                # Each technician claims far more than the in-progress limit
+                ticket = claim_next_ticket(technician, limit=0)
+                timings.append(time.perf_counter() - started)
+                if ticket is None:
+                    return timings
+                claimed.append((ticket.pk, ticket.priority_rank))
+        finally:
+            close_old_connections()
+
+    def handle(self, *args, **options):
+        if options['tickets'] < 1 or options['technicians'] < 1:
+            raise CommandError('--tickets and --technicians must be positive')
+        if not settings.DEBUG and not options['i_know']:
+            raise CommandError(
+                'The benchmark commits its rows and leaves a domain event per claim in the '
+                'append-only log; run it with DEBUG on, or pass --i-know'
+            )
+        if claimable_tickets().exists():
+            raise CommandError('The work queue must be empty: the benchmark would claim real tickets')
+
+        staff = create_queue(options['tickets'], options['technicians'])
+        technicians = staff[:-1]
+        mode = 'SKIP LOCKED' if connection.features.has_select_for_update_skip_locked else 'conditional UPDATE'
+        self.stdout.write(
+            f'{options["tickets"]} tickets, {len(technicians)} technicians, claiming with {mode}'
+        )
+
+        claimed = []
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(technicians)) as executor:
+                timings = [
+                    timing
+                    for result in executor.map(lambda technician: self.claim_all(technician, claimed), technicians)
+                    for timing in result
+                ]
+            elapsed = time.perf_counter() - started
+
+            assigned = TicketRequest.objects.filter(
+                assigned_to__in=technicians, status='in_progress'
+            ).count()
+        finally:
+            writer.flush()
+            Employee.objects.filter(pk__in=[employee.pk for employee in staff]).delete()
+
+        pks = [pk for pk, _ in claimed]
+        if len(pks) != options['tickets'] or len(set(pks)) != len(pks) or assigned != len(pks):
+            raise CommandError(
+                f'{len(set(pks))} distinct of {len(pks)} claims, {assigned} tickets assigned, '
+                f'{options["tickets"]} queued'
+            )
+
+        timings.sort()
+        self.stdout.write(f'  Claims:   {len(pks) / elapsed:,.0f}/s over {elapsed:.2f}s')
+        self.stdout.write(
+            f'  Latency:  median {statistics.median(timings) * 1000:.2f} ms'
+            f'   p99 {timings[int(len(timings) * 0.99) - 1] * 1000:.2f} ms'
+        )
+        self.stdout.write(self.style.SUCCESS('Every ticket was claimed exactly once; benchmark rows deleted'))
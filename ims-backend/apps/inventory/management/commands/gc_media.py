@@ -0,0 +1,68 @@
+"""
+Management command to garbage collect unreferenced media blobs
+
+    python manage.py gc_media --recount --dry-run
+    python manage.py gc_media --grace-hours 24
+"""
+from datetime import timedelta
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.storage import (
+    ContentAddressedStorage,
+    collect_garbage,
+    recount_references,
+    storage_stats,
+)
+from apps.inventory.uploads import expire_upload_sessions
+
+
+def format_bytes(size):
+    for unit in ['B', 'KB', 'MB']:
+        if abs(size) < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+class Command(BaseCommand):
+    help = 'Delete media blobs no longer referenced by any row and report deduplication savings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Keep unreferenced blobs uploaded within this many hours (in-flight uploads)'
+        )
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Rebuild reference counts from the database first'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report without deleting')
+
+    def handle(self, *args, **options):
+        if not isinstance(storages['default'], ContentAddressedStorage):
+            raise CommandError('MEDIA_DEDUPLICATION is disabled; there are no blobs to collect')
+
+        if options['recount']:
+            referenced = recount_references()
+            self.stdout.write(f'Recounted references: {referenced} blobs in use')
+
+        if not options['dry_run']:
+            expired = expire_upload_sessions()
+            if expired:
+                self.stdout.write(f'Expired {expired} abandoned upload sessions')
+
+        removed, freed = collect_garbage(
+            timedelta(hours=options['grace_hours']),
+            dry_run=options['dry_run']
+        )
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {removed} blobs ({format_bytes(freed)})'))
+
+        stats = storage_stats()
+        self.stdout.write(f'Blobs:         {stats["blobs"]} ({stats["unreferenced_blobs"]} unreferenced)')
+        self.stdout.write(f'Stored:        {format_bytes(stats["stored_bytes"])}')
+        self.stdout.write(f'Uploaded:      {format_bytes(stats["uploaded_bytes"])}')
+        self.stdout.write(f'Saved:         {format_bytes(stats["saved_bytes"])}')
@@ -0,0 +1,57 @@
+"""
+Management command to render missing assignment photo renditions
+
+Catches up on photos uploaded before the image pipeline existed, or whose
+background processing was lost to a restart.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from apps.inventory.images import (
+    IMAGE_FIELDS,
+    pending_fields,
+    render_many,
+    save_renditions,
+    store_renditions,
+)
+from apps.inventory.models import Assignment
+
+
+class Command(BaseCommand):
+    help = 'Render thumbnails for assignment and return photos that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (defaults to CPU count)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Photos loaded into memory at once')
+
+    def handle(self, *args, **options):
+        pending = [
+            (assignment.pk, field, getattr(assignment, field))
+            for assignment in Assignment.objects.filter(
+                Q(assignment_image__gt='') | Q(return_image__gt='')
+            ).only(*IMAGE_FIELDS, *[f'{field}_renditions' for field in IMAGE_FIELDS])
+            for field in pending_fields(assignment)
+        ]
+
+        processed = failed = 0
+        batch_size = options['batch_size']
+
+        for start in range(0, len(pending), batch_size):
+            batch = []
+            for assignment_id, field, image in pending[start:start + batch_size]:
+                try:
+                    with image.open('rb') as source:
+                        batch.append((assignment_id, field, image.name, source.read()))
+                except OSError as e:
+                    self.stderr.write(f'Cannot read {image.name}: {e}')
+                    failed += 1
+
+            rendered = render_many([data for _, _, _, data in batch], workers=options['workers'])
+
+            for (assignment_id, field, name, _), renditions in zip(batch, rendered):
+                if renditions is None:
+                    failed += 1
+                    continue
+                save_renditions(assignment_id, {field: store_renditions(name, renditions)})
+                processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} photos ({failed} failed)'))
@@ -0,0 +1,26 @@
+"""
+Management command to delete old live-stream change events
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.inventory.models import ChangeEvent
+
+
+class Command(BaseCommand):
+    help = 'Delete change events older than the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Keep events from the last N hours'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        deleted, _ = ChangeEvent.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} change events older than {options["hours"]} hours')
+        )
@@ -0,0 +1,27 @@
+"""
+Management command to build the daily device utilization rollups
+
+Meant to run shortly after midnight from cron or a scheduled job, e.g.:
+
+    15 0 * * * python manage.py rollup_device_utilization
+
+Builds every ended day after the latest rollup, so a missed night is
+caught up on the next run. The first run builds yesterday only; use
+backfill_device_utilization for older history.
+"""
+from django.core.management.base import BaseCommand
+from apps.inventory.rollups import build_rollups, pending_days
+
+
+class Command(BaseCommand):
+    help = 'Build device utilization rollups for the days since the latest one'
+
+    def handle(self, *args, **options):
+        days = pending_days()
+        if days is None:
+            self.stdout.write(self.style.SUCCESS('Rollups are up to date'))
+            return
+
+        first_day, last_day = days
+        rows = build_rollups(first_day, last_day)
+        self.stdout.write(self.style.SUCCESS(f'Built {rows} rollup rows for {first_day} to {last_day}'))
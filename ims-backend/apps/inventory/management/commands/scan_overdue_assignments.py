@@ -0,0 +1,82 @@
+"""
+Management command to remind people about overdue device returns
+
+Meant to run periodically from cron or a scheduled job, e.g.:
+
+    0 8 * * * python manage.py scan_overdue_assignments
+
+Only assignments that became overdue since the previous run, or whose
+reminder or digest failed, are picked up. Each employee gets one reminder
+and each department's managers one digest, however many devices are
+involved. The employee reminder and the manager digest are stamped
+separately, so whichever could not be sent is retried on the next run.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.inventory.overdue import collect_reminders, queue_overdue_reminders, mark_sent
+
+
+class Command(BaseCommand):
+    help = 'Send batched reminders for assignments that became overdue or failed to send since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.OVERDUE_SCAN_CHUNK_SIZE,
+            help='Assignments read per keyset page'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be sent without emailing or marking anything'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        employees, departments, ids = collect_reminders(timezone.localdate(), options['chunk_size'])
+        self.stdout.write(f'{len(ids)} overdue assignments to report, for {len(employees)} employees to remind')
+        for department, summary in departments.items():
+            self.stdout.write(f"  {department or 'No department'}: {summary['count']}")
+
+        if not ids:
+            self.stdout.write(self.style.SUCCESS('Nothing newly overdue, no reminders sent'))
+            return
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run, no reminders sent'))
+            return
+
+        reminders, digests = queue_overdue_reminders(employees, departments)
+        failed_reminders = {email for email, future in reminders.items() if not future.result()}
+        for email in failed_reminders:
+            self.stderr.write(f'Failed to send the overdue reminder to {email}')
+        failed_departments = set()
+        failed_digests = 0
+        for email, (future, covered) in digests.items():
+            if not future.result():
+                failed_digests += 1
+                failed_departments.update(covered)
+                self.stderr.write(f'Failed to send the overdue digest to {email}')
+
+        reminded = [
+            assignment_id
+            for reminder in employees.values() if reminder['email'] not in failed_reminders
+            for assignment_id in reminder['assignment_ids']
+        ]
+        # A department counts as notified once every digest covering it went out
+        notified = [
+            assignment_id
+            for department, summary in departments.items() if department not in failed_departments
+            for assignment_id in summary['assignment_ids']
+        ]
+        mark_sent(reminded, 'employee_reminded_at', options['chunk_size'])
+        mark_sent(notified, 'manager_notified_at', options['chunk_size'])
+
+        total = len(reminders) + len(digests)
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {total - len(failed_reminders) - failed_digests} of {total} emails; '
+            f'{len(reminded)} employee reminders and {len(notified)} manager notices recorded'
+        ))
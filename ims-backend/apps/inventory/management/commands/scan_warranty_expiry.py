@@ -0,0 +1,65 @@
+"""
+Management command to email admins a digest of expiring device warranties
+
+Meant to run once a day from cron or a scheduled job, e.g.:
+
+    0 7 * * * python manage.py scan_warranty_expiry --days 30
+
+Each active admin gets one email listing the devices grouped by location
+and device type, rather than one email per device.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.warranty import warranty_report, queue_warranty_digests
+
+
+class Command(BaseCommand):
+    help = 'Find devices whose warranty expires soon and send each admin one digest'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.WARRANTY_NOTICE_DAYS,
+            help='Report warranties expiring within N days'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.WARRANTY_SCAN_CHUNK_SIZE,
+            help='Devices read per keyset page'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print the report without sending any email'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['chunk_size'] < 1:
+            raise CommandError('--days must be zero or more and --chunk-size at least 1')
+
+        report = warranty_report(options['days'], chunk_size=options['chunk_size'])
+        self.stdout.write(
+            f"{report['total']} warranties expire between {report['from']} and {report['to']}"
+        )
+        for group in report['groups']:
+            self.stdout.write(
+                f"  {group['location'] or 'No location'} / {group['device_type']}: "
+                f"{group['count']} (earliest {group['earliest_expiry']})"
+            )
+
+        if not report['total']:
+            self.stdout.write(self.style.SUCCESS('Nothing to report, no digests sent'))
+            return
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run, no digests sent'))
+            return
+
+        futures = queue_warranty_digests(report)
+        failed = [email for email, future in futures.items() if not future.result()]
+        for email in failed:
+            self.stderr.write(f'Failed to send the warranty digest to {email}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Sent {len(futures) - len(failed)} of {len(futures)} admin digests')
+        )
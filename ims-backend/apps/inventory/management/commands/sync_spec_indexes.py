@@ -0,0 +1,53 @@
+"""
+Management command to create the expression indexes for hot specification keys
+
+Creates one index per key in DEVICE_SPEC_INDEXED_KEYS on the same
+expression ?spec= filters compile to, and drops indexes for keys that are
+no longer listed. Run it after deploys that change the setting:
+
+    python manage.py sync_spec_indexes --dry-run
+
+PostgreSQL builds the indexes CONCURRENTLY, so writes to devices carry on
+while they are created.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.inventory.specifications import INDEX_PREFIX, SpecificationFilterError, index_name, index_sql
+
+
+class Command(BaseCommand):
+    help = 'Create and drop expression indexes to match DEVICE_SPEC_INDEXED_KEYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Print the statements without running them')
+
+    def handle(self, *args, **options):
+        keys = [key.strip() for key in settings.DEVICE_SPEC_INDEXED_KEYS if key.strip()]
+        try:
+            wanted = {index_name(key): index_sql(connection.vendor, key) for key in keys}
+        except SpecificationFilterError as e:
+            raise CommandError(f'DEVICE_SPEC_INDEXED_KEYS: {e}')
+
+        with connection.cursor() as cursor:
+            existing = {
+                name for name in connection.introspection.get_constraints(cursor, 'devices')
+                if name.startswith(INDEX_PREFIX)
+            }
+
+        concurrently = 'CONCURRENTLY ' if connection.vendor == 'postgresql' else ''
+        statements = [f'DROP INDEX {concurrently}IF EXISTS {name}' for name in sorted(existing - set(wanted))]
+        statements += [sql for name, sql in wanted.items() if name not in existing]
+
+        for sql in statements:
+            self.stdout.write(sql)
+            if not options['dry_run']:
+                with connection.cursor() as cursor:
+                    cursor.execute(sql)
+
+        if not statements:
+            self.stdout.write(self.style.SUCCESS('Specification indexes are up to date'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing changed'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Ran {len(statements)} index statements'))
@@ -0,0 +1,208 @@
+"""
+Media Delivery
+
+Every file under MEDIA_URL goes through `serve_media`, which applies the
+same visibility rules as the inventory API before anything is sent:
+device photos and profile pictures are visible to any signed-in employee,
+assignment photos and ticket attachments only to the employees involved
+and to admins and managers. The transfer itself is handed to nginx
+(X-Accel-Redirect) or Apache (X-Sendfile) when MEDIA_SERVER is set, and
+streamed by Django with range support otherwise.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from apps.authentication.async_views import jwt_authentication, json_response
+from apps.authentication.models import Employee
+from .models import Assignment, Device, TicketRequest
+from .storage import is_blob
+
+
+BLOB_DIGEST = re.compile(r'([0-9a-f]{64})\.')
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Blob names change whenever the content does, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+MUTABLE_CACHE_CONTROL = 'private, max-age=3600'
+
+
+def request_user(request):
+    """
+    The employee behind the request's bearer token or `?token=` parameter
+    (for <img> tags, which cannot set headers), falling back to the
+    Django admin session
+    """
+    header = jwt_authentication.get_header(request)
+    if header is not None:
+        raw_token = jwt_authentication.get_raw_token(header)
+    elif request.GET.get('token'):
+        raw_token = request.GET['token'].encode()
+    else:
+        user = getattr(request, 'user', None)
+        return user if user is not None and user.is_authenticated else None
+
+    if raw_token is None:
+        return None
+    try:
+        return jwt_authentication.get_user(jwt_authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def can_view(user, name):
+    """Whether any row referencing `name` is visible to `user` through the API"""
+    if user.role in ['admin', 'manager'] or user.is_staff:
+        return True
+
+    # Identical uploads share one blob, so a file may be referenced from several
+    # places; the employee's own rows are checked first as they are the cheapest
+    own_photo = (
+        Q(assignment_image=name) | Q(return_image=name)
+        | Q(assignment_image_renditions__icontains=f'"{name}"')
+        | Q(return_image_renditions__icontains=f'"{name}"')
+    )
+    if Assignment.objects.filter(own_photo, employee=user).exists():
+        return True
+
+    if TicketRequest.objects.filter(
+        Q(requested_by=user) | Q(assigned_to=user),
+        attachment=name
+    ).exists():
+        return True
+
+    return (
+        Device.objects.filter(image=name).exists()
+        or Employee.objects.filter(profile_picture=name, is_active=True).exists()
+    )
+
+
+def file_etag(name, stat):
+    match = BLOB_DIGEST.search(os.path.basename(name))
+    if is_blob(name) and match:
+        return f'"{match.group(1)}"'
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    (start, end) for a single `bytes=` range, None to send the whole file,
+    or False when the range cannot be satisfied
+    """
+    match = RANGE_HEADER.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Multiple or malformed ranges: the whole file is a valid answer
+        return None
+
+    start, end = match.groups()
+    if start == '':
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """Deliver a media file to an employee allowed to see it"""
+    user = request_user(request)
+    if user is None:
+        return json_response(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=401,
+            headers={'WWW-Authenticate': 'Bearer realm="api"'}
+        )
+
+    # Partial uploads and other dot-directories are never served
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404
+    try:
+        full_path = default_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path) or not can_view(user, path):
+        # Same answer for missing and forbidden files, so names can't be probed
+        raise Http404
+
+    stat = os.stat(full_path)
+    etag = file_etag(path, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if is_blob(path) else MUTABLE_CACHE_CONTROL,
+        'Vary': 'Authorization, Cookie',
+    }
+
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    if content_type is None or encoding:
+        # Serve .gz attachments as-is rather than letting clients decompress them
+        content_type = 'application/octet-stream'
+
+    if settings.MEDIA_SERVER == 'nginx':
+        # nginx answers ranges and conditional requests itself from here on
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + quote(path)
+        return response
+    if settings.MEDIA_SERVER == 'apache':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Sendfile'] = full_path
+        return response
+
+    headers['Accept-Ranges'] = 'bytes'
+    byte_range = None
+    if 'Range' in request.headers and request.headers.get('If-Range', etag) == etag:
+        byte_range = parse_range(request.headers['Range'], stat.st_size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type, headers=headers)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(full_path, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+            headers=headers
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    return response
+
+
+serve_media.read_replica = True
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.10 on 2026-10-19 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_assignment_assignment_approved_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('resource', models.CharField(choices=[('device', 'Device'), ('assignment', 'Assignment'), ('ticket', 'Ticket')], max_length=20)),
+                ('action', models.CharField(max_length=30)),
+                ('object_id', models.UUIDField()),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('audience', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Change Event',
+                'verbose_name_plural': 'Change Events',
+                'db_table': 'change_events',
+                'ordering': ['id'],
+            },
+        ),
+    ]
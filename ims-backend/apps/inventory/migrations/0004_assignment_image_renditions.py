@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_change_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='assignment_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='return_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
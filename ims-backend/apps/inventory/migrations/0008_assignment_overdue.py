@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_device_warranty_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='overdue_notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['expected_return_date'], name='assignments_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('overdue_notified_at__isnull', True), ('status', 'active')), fields=['expected_return_date', 'id'], name='assignments_unnotified_due_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_assignment_overdue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('device_type', models.CharField(choices=[('laptop', 'Laptop'), ('desktop', 'Desktop'), ('monitor', 'Monitor'), ('keyboard', 'Keyboard'), ('mouse', 'Mouse'), ('headset', 'Headset'), ('phone', 'Phone'), ('tablet', 'Tablet'), ('other', 'Other')], max_length=20)),
+                ('location', models.CharField(blank=True, max_length=200)),
+                ('available', models.IntegerField(default=0)),
+                ('assigned', models.IntegerField(default=0)),
+                ('maintenance', models.IntegerField(default=0)),
+                ('retired', models.IntegerField(default=0)),
+                ('assignments_started', models.IntegerField(default=0)),
+                ('assignments_returned', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Device Daily Rollup',
+                'verbose_name_plural': 'Device Daily Rollups',
+                'db_table': 'device_daily_rollups',
+                'ordering': ['date', 'device_type', 'location'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['assigned_date'], name='assignments_assigned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['return_date'], name='assignments_returned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['created_at'], name='devices_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='devicedailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'device_type', 'location'), name='device_daily_rollups_unique_day'),
+        ),
+    ]
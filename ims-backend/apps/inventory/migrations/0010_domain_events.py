@@ -0,0 +1,35 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_device_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DomainEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('resource', models.CharField(choices=[('device', 'Device'), ('assignment', 'Assignment'), ('ticket', 'Ticket')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('action', models.CharField(max_length=30)),
+                ('from_status', models.CharField(blank=True, max_length=30)),
+                ('to_status', models.CharField(blank=True, max_length=30)),
+                ('actor_id', models.UUIDField(blank=True, null=True)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Domain Event',
+                'verbose_name_plural': 'Domain Events',
+                'db_table': 'domain_events',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['resource', 'object_id', 'id'], name='domain_events_object_idx'), models.Index(fields=['occurred_at'], name='domain_events_time_idx')],
+            },
+        ),
+    ]
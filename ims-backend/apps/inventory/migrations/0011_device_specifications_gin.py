@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_gin_index(apps, schema_editor):
+    # Serves ?spec=key=value containment filters; only PostgreSQL has GIN
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS devices_specifications_gin '
+            'ON devices USING gin (specifications jsonb_path_ops)'
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS devices_specifications_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_domain_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_device_specifications_gin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketrequest',
+            name='priority_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(priority='low', then=models.Value(1)), models.When(priority='medium', then=models.Value(2)), models.When(priority='high', then=models.Value(3)), models.When(priority='urgent', then=models.Value(4)), default=models.Value(0)), output_field=models.SmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='ticketrequest',
+            index=models.Index(condition=models.Q(('assigned_to__isnull', True), ('status', 'pending')), fields=['-priority_rank', 'created_at', 'id'], name='tickets_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.10 on 2026-10-19 13:09
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+def create_append_only_triggers(apps, schema_editor):
+    # Reject UPDATE and DELETE on domain_events however they are issued.
+    # SQLite drops triggers when a migration rebuilds the table, so re-create them after any such change
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE OR REPLACE FUNCTION domain_events_append_only() RETURNS trigger AS $$ "
+            "BEGIN RAISE EXCEPTION 'Domain events are append-only'; END; $$ LANGUAGE plpgsql"
+        )
+        schema_editor.execute(
+            'CREATE TRIGGER domain_events_append_only BEFORE UPDATE OR DELETE ON domain_events '
+            'FOR EACH ROW EXECUTE FUNCTION domain_events_append_only()'
+        )
+    elif vendor == 'sqlite':
+        for operation in ['UPDATE', 'DELETE']:
+            schema_editor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS domain_events_no_{operation.lower()} '
+                f'BEFORE {operation} ON domain_events '
+                "BEGIN SELECT RAISE(ABORT, 'Domain events are append-only'); END"
+            )
+
+
+def drop_append_only_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP TRIGGER IF EXISTS domain_events_append_only ON domain_events')
+        schema_editor.execute('DROP FUNCTION IF EXISTS domain_events_append_only()')
+    elif vendor == 'sqlite':
+        for operation in ['update', 'delete']:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS domain_events_no_{operation}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_ticket_work_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='domainevent',
+            name='recorded_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='domainevent',
+            index=models.Index(fields=['recorded_at'], name='domain_events_recorded_idx'),
+        ),
+        migrations.RunPython(create_append_only_triggers, drop_append_only_triggers),
+    ]
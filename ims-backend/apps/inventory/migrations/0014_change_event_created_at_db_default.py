@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-19 13:11
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_domain_event_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changeevent',
+            name='created_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), db_index=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.10 on 2026-10-19 15:02
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_stamps(apps, schema_editor):
+    # The manager digest used to go out on every run, so stamped rows have had it too
+    Assignment = apps.get_model('inventory', 'Assignment')
+    Assignment.objects.filter(employee_reminded_at__isnull=False).update(manager_notified_at=F('employee_reminded_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_change_event_created_at_db_default'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='assignment',
+            name='assignments_unnotified_due_idx',
+        ),
+        migrations.RenameField(
+            model_name='assignment',
+            old_name='overdue_notified_at',
+            new_name='employee_reminded_at',
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='manager_notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(copy_stamps, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('status', 'active'), models.Q(('employee_reminded_at__isnull', True), ('manager_notified_at__isnull', True), _connector='OR')), fields=['expected_return_date', 'id'], name='assignments_unnotified_due_idx'),
+        ),
+    ]
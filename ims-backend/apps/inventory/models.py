@@ -2,7 +2,9 @@
 Inventory Models
 """
 from django.db import models
+from django.db.models.functions import Now
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 
@@ -78,6 +80,12 @@ class Device(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Device'
         verbose_name_plural = 'Devices'
+        indexes = [
+            # Warranty scans read expiry ranges in (warranty_expiry, id) keyset order
+            models.Index(fields=['warranty_expiry', 'id'], name='devices_warranty_idx'),
+            # Daily rollups take back devices added since the day being built
+            models.Index(fields=['created_at'], name='devices_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.device_id} - {self.name}"
@@ -112,6 +120,7 @@ class Assignment(models.Model):
     
     # Assignment approval
     assignment_image = models.ImageField(upload_to='assignments/', null=True, blank=True)
+    assignment_image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     assignment_approved_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -124,6 +133,7 @@ class Assignment(models.Model):
     
     # Return approval
     return_image = models.ImageField(upload_to='returns/', null=True, blank=True)
+    return_image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     return_approved_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -152,20 +162,65 @@ class Assignment(models.Model):
         related_name='assignments_created'
     )
     
+    # When the employee's overdue reminder and the managers' digest went out for the current expected return date
+    employee_reminded_at = models.DateTimeField(null=True, blank=True, editable=False)
+    manager_notified_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
     class Meta:
         db_table = 'assignments'
         ordering = ['-assigned_date']
         verbose_name = 'Assignment'
         verbose_name_plural = 'Assignments'
+        indexes = [
+            # Overdue list: active assignments by due date
+            models.Index(
+                fields=['expected_return_date'],
+                name='assignments_due_idx',
+                condition=models.Q(status='active')
+            ),
+            # Overdue reminders: only rows the employee or the managers haven't heard about yet
+            models.Index(
+                fields=['expected_return_date', 'id'],
+                name='assignments_unnotified_due_idx',
+                condition=models.Q(status='active') & (
+                    models.Q(employee_reminded_at__isnull=True) | models.Q(manager_notified_at__isnull=True)
+                )
+            ),
+            # Daily rollups read one day's starts and returns at a time
+            models.Index(fields=['assigned_date'], name='assignments_assigned_idx'),
+            models.Index(fields=['return_date'], name='assignments_returned_idx'),
+        ]
     
     def __str__(self):
         return f"{self.device.device_id} assigned to {self.employee.full_name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded due date so save() can tell when it moves
+        loaded = dict(zip(field_names, values))
+        if 'expected_return_date' in loaded:
+            instance._loaded_expected_return_date = loaded['expected_return_date']
+        return instance
+    
     def save(self, *args, **kwargs):
         """Update device status when assignment is created or updated"""
         is_new = self.pk is None
         
+        # A new due date gets its own overdue reminder and digest
+        if (
+            '_loaded_expected_return_date' in self.__dict__
+            and self._loaded_expected_return_date != self.expected_return_date
+            and (self.employee_reminded_at or self.manager_notified_at)
+        ):
+            self.employee_reminded_at = None
+            self.manager_notified_at = None
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'employee_reminded_at', 'manager_notified_at'}
+        
         super().save(*args, **kwargs)
+        self._loaded_expected_return_date = self.expected_return_date
         
         # Update device status based on assignment status
         if self.status == 'active':
@@ -200,6 +255,9 @@ class TicketRequest(models.Model):
         ('urgent', 'Urgent'),
     ]
     
+    # Higher is more urgent; `priority` itself only sorts alphabetically
+    PRIORITY_RANKS = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 4}
+    
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('in_progress', 'In Progress'),
@@ -221,6 +279,14 @@ class TicketRequest(models.Model):
     # Ticket Details
     ticket_type = models.CharField(max_length=20, choices=TICKET_TYPE_CHOICES)
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='medium')
+    priority_rank = models.GeneratedField(
+        expression=models.Case(
+            *[models.When(priority=priority, then=models.Value(rank)) for priority, rank in PRIORITY_RANKS.items()],
+            default=models.Value(0),
+        ),
+        output_field=models.SmallIntegerField(),
+        db_persist=True,
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     
     # Related Device (optional)
@@ -261,6 +327,14 @@ class TicketRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Ticket Request'
         verbose_name_plural = 'Ticket Requests'
+        indexes = [
+            # Work queue: unclaimed tickets, most urgent and then oldest first
+            models.Index(
+                fields=['-priority_rank', 'created_at', 'id'],
+                name='tickets_queue_idx',
+                condition=models.Q(status='pending', assigned_to__isnull=True)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.ticket_number} - {self.subject}"
@@ -279,6 +353,191 @@ class TicketRequest(models.Model):
         super().save(*args, **kwargs)
 
 
+class ChangeEvent(models.Model):
+    """Compact change notification delivered to live event stream clients"""
+    
+    RESOURCE_CHOICES = [
+        ('device', 'Device'),
+        ('assignment', 'Assignment'),
+        ('ticket', 'Ticket'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    action = models.CharField(max_length=30)
+    object_id = models.UUIDField()
+    payload = models.JSONField(default=dict, blank=True)
+    
+    # Employee IDs allowed to see the event; empty means everyone
+    audience = models.JSONField(default=list, blank=True)
+    
+    # Set by the database at INSERT, for the stream's settle window
+    created_at = models.DateTimeField(db_default=Now(), db_index=True)
+    
+    class Meta:
+        db_table = 'change_events'
+        ordering = ['id']
+        verbose_name = 'Change Event'
+        verbose_name_plural = 'Change Events'
+    
+    def __str__(self):
+        return f"{self.resource} {self.action} ({self.object_id})"
+
+
+class DomainEventQuerySet(models.QuerySet):
+    """Refuses bulk updates and deletes; database triggers back this up"""
+    
+    def update(self, **kwargs):
+        raise ValueError('Domain events are append-only')
+    
+    def delete(self):
+        raise ValueError('Domain events are append-only')
+
+
+class DomainEvent(models.Model):
+    """Append-only record of one state transition; rows are never updated or deleted"""
+    
+    id = models.BigAutoField(primary_key=True)
+    resource = models.CharField(max_length=20, choices=ChangeEvent.RESOURCE_CHOICES)
+    object_id = models.UUIDField()
+    action = models.CharField(max_length=30)
+    
+    # Status before and after; from_status is blank for creations
+    from_status = models.CharField(max_length=30, blank=True)
+    to_status = models.CharField(max_length=30, blank=True)
+    
+    # Employee who made the change, when known; not a foreign key so the log outlives them
+    actor_id = models.UUIDField(null=True, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    occurred_at = models.DateTimeField(default=timezone.now)
+    # Set by the database when the row is inserted, which may be later than occurred_at
+    recorded_at = models.DateTimeField(db_default=Now(), editable=False)
+    
+    objects = DomainEventQuerySet.as_manager()
+    
+    class Meta:
+        db_table = 'domain_events'
+        ordering = ['id']
+        verbose_name = 'Domain Event'
+        verbose_name_plural = 'Domain Events'
+        indexes = [
+            # Audit trail of one object
+            models.Index(fields=['resource', 'object_id', 'id'], name='domain_events_object_idx'),
+            models.Index(fields=['occurred_at'], name='domain_events_time_idx'),
+            # Events too recent for delta sync
+            models.Index(fields=['recorded_at'], name='domain_events_recorded_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.resource} {self.action}: {self.from_status or '-'} -> {self.to_status} ({self.object_id})"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Domain events are append-only')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError('Domain events are append-only')
+
+
+class MediaBlob(models.Model):
+    """A stored upload, shared by every file field holding the same content"""
+    
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    
+    # File field values (and recorded renditions) pointing at this blob
+    ref_count = models.IntegerField(default=0)
+    # Times this content was uploaded; every upload after the first was deduplicated
+    upload_count = models.IntegerField(default=1)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_uploaded_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'media_blobs'
+        verbose_name = 'Media Blob'
+        verbose_name_plural = 'Media Blobs'
+    
+    def __str__(self):
+        return self.name
+
+
+class UploadSession(models.Model):
+    """A resumable upload being assembled chunk by chunk in a staging file"""
+    
+    TARGET_CHOICES = [
+        ('ticket_attachment', 'Ticket Attachment'),
+        ('device_image', 'Device Image'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    
+    # Record the finished file is attached to
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    target_id = models.UUIDField()
+    
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    checksum = models.CharField(max_length=64, help_text='Expected SHA-256, hex encoded')
+    received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'upload_sessions'
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
+class DeviceDailyRollup(models.Model):
+    """End-of-day device counts and assignment activity for one device type and location"""
+    
+    date = models.DateField()
+    device_type = models.CharField(max_length=20, choices=Device.DEVICE_TYPE_CHOICES)
+    location = models.CharField(max_length=200, blank=True)
+    
+    # Devices in each status at the end of the day
+    available = models.IntegerField(default=0)
+    assigned = models.IntegerField(default=0)
+    maintenance = models.IntegerField(default=0)
+    retired = models.IntegerField(default=0)
+    
+    # Assignments created and returned during the day
+    assignments_started = models.IntegerField(default=0)
+    assignments_returned = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'device_daily_rollups'
+        ordering = ['date', 'device_type', 'location']
+        verbose_name = 'Device Daily Rollup'
+        verbose_name_plural = 'Device Daily Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'device_type', 'location'],
+                name='device_daily_rollups_unique_day'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.device_type} {self.location or '-'}"
+
+
 class DashboardStats(models.Model):
     """Model to cache dashboard statistics (optional optimization)"""
     
@@ -0,0 +1,241 @@
+"""
+Overdue Returns
+
+An active assignment is overdue once its expected return date has
+passed. Days overdue are computed by the database from the due date.
+
+`scan_overdue_assignments` reminds people in batches: each employee gets
+one email listing their overdue devices, and the managers of each
+department get one email covering their department. Admins get the
+departments that have no manager. The two channels are stamped
+separately: `employee_reminded_at` once the employee's reminder went out
+and `manager_notified_at` once every digest covering the department did,
+so a failed send is retried on the next run without repeating the one
+that succeeded. The scan reads through a partial index that only holds
+active rows missing either stamp. Each run therefore only touches
+assignments that became overdue or failed to send since the last one,
+however many are still outstanding. Moving the expected return date
+clears both stamps.
+"""
+from django.conf import settings
+from django.db.models import DateField, DurationField, ExpressionWrapper, F, Q, Value
+from django.utils import timezone
+from django.utils.html import escape
+from apps.authentication.models import Employee
+from apps.authentication.utils import send_email_via_apps_script
+from config.background import submit
+from .models import Assignment
+
+
+REMINDER_FIELDS = [
+    'id', 'expected_return_date', 'days_overdue',
+    'device__device_id', 'device__name',
+    'employee_id', 'employee__email', 'employee__first_name', 'employee__last_name',
+    'employee__department', 'employee_reminded_at', 'manager_notified_at',
+]
+
+
+def days_overdue(today):
+    """SQL expression for how long the assignment is past its due date"""
+    return ExpressionWrapper(
+        Value(today, output_field=DateField()) - F('expected_return_date'),
+        output_field=DurationField()
+    )
+
+
+def overdue_assignments(queryset=None, today=None):
+    """Active assignments due before `today`, annotated with `days_overdue`"""
+    today = today or timezone.localdate()
+    queryset = Assignment.objects.all() if queryset is None else queryset
+    return queryset.filter(
+        status='active',
+        expected_return_date__lt=today,
+    ).annotate(days_overdue=days_overdue(today))
+
+
+def iter_newly_overdue(today, chunk_size):
+    """Overdue rows the employee or the managers weren't told about, one (expected_return_date, id) keyset page at a time"""
+    queryset = overdue_assignments(
+        Assignment.objects.filter(Q(employee_reminded_at__isnull=True) | Q(manager_notified_at__isnull=True)),
+        today
+    ).order_by('expected_return_date', 'id').values(*REMINDER_FIELDS)
+
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(expected_return_date__gte=last['expected_return_date']).filter(
+                Q(expected_return_date__gt=last['expected_return_date']) | Q(id__gt=last['id'])
+            )
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1]
+
+
+def overdue_item(row):
+    return {
+        'device_id': row['device__device_id'],
+        'device_name': row['device__name'],
+        'employee_name': f"{row['employee__first_name']} {row['employee__last_name']}",
+        'expected_return_date': row['expected_return_date'],
+        'days_overdue': row['days_overdue'].days,
+    }
+
+
+def collect_reminders(today, chunk_size=None, items_per_department=None):
+    """
+    (employee reminders, department summaries, assignment ids) for every
+    overdue assignment still missing a reminder or a digest. Reminders and
+    summaries only cover the rows missing that channel's stamp, and list
+    their own assignment ids to be stamped once they have been sent
+    """
+    chunk_size = chunk_size or settings.OVERDUE_SCAN_CHUNK_SIZE
+    items_per_department = items_per_department or settings.OVERDUE_DIGEST_ITEMS_PER_DEPARTMENT
+
+    employees = {}
+    departments = {}
+    ids = []
+    for rows in iter_newly_overdue(today, chunk_size):
+        for row in rows:
+            ids.append(row['id'])
+            item = overdue_item(row)
+
+            if row['employee_reminded_at'] is None:
+                reminder = employees.setdefault(row['employee_id'], {
+                    'email': row['employee__email'],
+                    'first_name': row['employee__first_name'],
+                    'items': [],
+                    'assignment_ids': [],
+                })
+                reminder['items'].append(item)
+                reminder['assignment_ids'].append(row['id'])
+
+            if row['manager_notified_at'] is None:
+                summary = departments.setdefault(
+                    row['employee__department'], {'count': 0, 'items': [], 'assignment_ids': []}
+                )
+                summary['count'] += 1
+                summary['assignment_ids'].append(row['id'])
+                if len(summary['items']) < items_per_department:
+                    summary['items'].append(item)
+
+    return employees, departments, ids
+
+
+def manager_digests(departments):
+    """{email: (first name, [(department, summary), ...])} with one entry per manager or admin"""
+    digests = {}
+    managed = set()
+    managers = Employee.objects.filter(
+        role='manager', is_active=True, department__in=[name for name in departments if name]
+    ).only('email', 'first_name', 'department')
+    for manager in managers:
+        managed.add(manager.department)
+        digests[manager.email] = (manager.first_name, [(manager.department, departments[manager.department])])
+
+    unmanaged = [(name, summary) for name, summary in departments.items() if name not in managed]
+    if unmanaged:
+        for admin in Employee.objects.filter(role='admin', is_active=True).only('email', 'first_name'):
+            first_name, sections = digests.get(admin.email, (admin.first_name, []))
+            digests[admin.email] = (first_name, sections + unmanaged)
+    return digests
+
+
+def item_line(item, with_employee=False):
+    who = f"{item['employee_name']}: " if with_employee else ''
+    return (
+        f"{who}{item['device_id']} {item['device_name']}, due {item['expected_return_date']:%d %b %Y} "
+        f"({item['days_overdue']} day{'s' if item['days_overdue'] != 1 else ''} overdue)"
+    )
+
+
+def send_employee_reminder(reminder):
+    count = len(reminder['items'])
+    subject = f"{count} device{'s' if count != 1 else ''} past the return date"
+    lines = [item_line(item) for item in reminder['items']]
+
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <p>Hi {escape(reminder['first_name'])},</p>
+        <p>The following devices assigned to you are past their expected return date:</p>
+        <ul>{''.join(f'<li>{escape(line)}</li>' for line in lines)}</ul>
+        <p>Please return them or ask an administrator to extend the assignment.</p>
+        <p><a href="{settings.FRONTEND_URL}/">Open your dashboard</a></p>
+        <p>Best regards,<br>IMS Team</p>
+    </body>
+    </html>
+    """
+    text_content = (
+        f"Hi {reminder['first_name']},\n\n"
+        "The following devices assigned to you are past their expected return date:\n"
+        + '\n'.join(f"  - {line}" for line in lines)
+        + "\n\nPlease return them or ask an administrator to extend the assignment.\n\n"
+        "Best regards,\nIMS Team\n"
+    )
+    return send_email_via_apps_script(reminder['email'], subject, html_content, text_content)
+
+
+def send_manager_digest(email, first_name, sections):
+    total = sum(summary['count'] for _, summary in sections)
+    subject = f"{total} device assignment{'s' if total != 1 else ''} became overdue"
+
+    html_sections = []
+    text_sections = []
+    for department, summary in sections:
+        heading = f"{department or 'No department'} ({summary['count']})"
+        lines = [item_line(item, with_employee=True) for item in summary['items']]
+        more = summary['count'] - len(summary['items'])
+        if more:
+            lines.append(f"and {more} more")
+        html_sections.append(
+            f"<h3>{escape(heading)}</h3><ul>{''.join(f'<li>{escape(line)}</li>' for line in lines)}</ul>"
+        )
+        text_sections.append(heading + '\n' + '\n'.join(f"  - {line}" for line in lines))
+
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <p>Hi {escape(first_name)},</p>
+        <p>These assignments passed their expected return date since the last reminder:</p>
+        {''.join(html_sections)}
+        <p><a href="{settings.FRONTEND_URL}/admin">Open the admin dashboard</a></p>
+        <p>Best regards,<br>IMS Team</p>
+    </body>
+    </html>
+    """
+    text_content = (
+        f"Hi {first_name},\n\n"
+        "These assignments passed their expected return date since the last reminder:\n\n"
+        + '\n\n'.join(text_sections)
+        + "\n\nBest regards,\nIMS Team\n"
+    )
+    return send_email_via_apps_script(email, subject, html_content, text_content)
+
+
+def queue_overdue_reminders(employees, departments):
+    """
+    Queue employee reminders and manager digests on a background thread
+    pool. Returns ({email: future}, {email: (future, departments covered)})
+    """
+    reminders = {
+        reminder['email']: submit('overdue', send_employee_reminder, reminder)
+        for reminder in employees.values()
+    }
+    digests = {
+        email: (submit('overdue', send_manager_digest, email, first_name, sections), [name for name, _ in sections])
+        for email, (first_name, sections) in manager_digests(departments).items()
+    }
+    return reminders, digests
+
+
+def mark_sent(ids, field, chunk_size=None):
+    """Stamp `field` on the given assignments with one UPDATE per chunk"""
+    chunk_size = chunk_size or settings.OVERDUE_SCAN_CHUNK_SIZE
+    now = timezone.now()
+    for start in range(0, len(ids), chunk_size):
+        Assignment.objects.filter(pk__in=ids[start:start + chunk_size]).update(**{field: now})
@@ -0,0 +1,231 @@
+"""
+Device Utilization Rollups
+
+One DeviceDailyRollup row per day, device type and location holds the
+end-of-day number of devices in each status and the assignments started
+and returned that day. The analytics endpoints read only these rows, so a
+quarter of history is a few hundred small rows instead of a replay of
+every assignment.
+
+A build starts from the live device counts and walks back one day at a
+time, undoing each day's status moves to get the counts at the end of the
+day before. Since the domain event log started recording devices, its
+transitions are the moves: creations, assignments, maintenance and
+retirement, each from the status before to the status after. Before
+that, the only dated records are assignment starts (available to
+assigned), returns (assigned to available) and device creation, so
+maintenance and retirement are carried back as they are now. A device
+created in the range is removed from whatever status it holds at that
+point in the walk, and a device type and location with no devices left
+has no counts. Deleted devices are not in the live counts, so their moves
+are skipped.
+
+`rollup_device_utilization` runs nightly and builds only the days after
+the latest rollup. `backfill_device_utilization` rebuilds a range.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Device, Assignment, DeviceDailyRollup, DomainEvent
+
+
+STATUSES = ['available', 'assigned', 'maintenance', 'retired']
+ACTIVITY = ['assignments_started', 'assignments_returned']
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def live_counts():
+    """{(device_type, location): Counter of statuses} for the devices table as it is now"""
+    counts = defaultdict(Counter)
+    rows = Device.objects.order_by().values('device_type', 'location', 'status').annotate(
+        count=Count('id')
+    ).values_list('device_type', 'location', 'status', 'count')
+    for device_type, location, device_status, count in rows:
+        counts[device_type, location][device_status] = count
+    return counts
+
+
+def daily_deltas(queryset, date_field, device_prefix=''):
+    """{day: {(device_type, location): rows}} for `queryset` grouped by the local day of `date_field`"""
+    deltas = defaultdict(dict)
+    rows = queryset.annotate(day=TruncDate(date_field)).order_by().values(
+        'day', f'{device_prefix}device_type', f'{device_prefix}location'
+    ).annotate(count=Count('pk')).values_list(
+        'day', f'{device_prefix}device_type', f'{device_prefix}location', 'count'
+    )
+    for day, device_type, location, count in rows:
+        deltas[day][device_type, location] = count
+    return deltas
+
+
+def logged_since():
+    """When the domain event log started recording device transitions, or None"""
+    return DomainEvent.objects.filter(resource='device').aggregate(first=Min('occurred_at'))['first']
+
+
+def logged_moves(since):
+    """(time, device, key, from, to) for each logged transition of a live device since `since`"""
+    device = Device.objects.filter(pk=OuterRef('object_id'))
+    rows = DomainEvent.objects.filter(resource='device', occurred_at__gte=since).annotate(
+        device_type=Subquery(device.values('device_type')),
+        device_location=Subquery(device.values('location')),
+    ).filter(device_type__isnull=False).values_list(
+        'occurred_at', 'object_id', 'device_type', 'device_location', 'from_status', 'to_status'
+    )
+    for occurred_at, device_id, device_type, location, from_status, to_status in rows:
+        yield occurred_at, device_id, (device_type, location), from_status, to_status
+
+
+def unlogged_moves(since, until):
+    """
+    Moves from assignments and device creation from `since` until `until`
+    (None for no end). A creation's status is None: it is whatever the
+    device holds when the walk reaches it
+    """
+    def in_range(moment):
+        return moment is not None and since <= moment and (until is None or moment < until)
+
+    assigned_in_range = Q(assigned_date__gte=since)
+    returned_in_range = Q(return_date__gte=since)
+    created_in_range = Q(created_at__gte=since)
+    if until is not None:
+        assigned_in_range &= Q(assigned_date__lt=until)
+        returned_in_range &= Q(return_date__lt=until)
+        created_in_range &= Q(created_at__lt=until)
+
+    rows = Assignment.objects.filter(assigned_in_range | returned_in_range).values_list(
+        'device_id', 'device__device_type', 'device__location', 'assigned_date', 'return_date'
+    )
+    for device_id, device_type, location, assigned_date, return_date in rows:
+        if in_range(assigned_date):
+            yield assigned_date, device_id, (device_type, location), 'available', 'assigned'
+        if in_range(return_date):
+            yield return_date, device_id, (device_type, location), 'assigned', 'available'
+
+    devices = Device.objects.filter(created_in_range).values_list('created_at', 'id', 'device_type', 'location')
+    for created_at, device_id, device_type, location in devices:
+        yield created_at, device_id, (device_type, location), '', None
+
+
+def build_rollups(first_day, last_day, now=None):
+    """Rebuild the rollups for `first_day`..`last_day`, which must have ended; returns the rows written"""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    if last_day >= today:
+        raise ValueError('Rollups can only be built for days that have ended')
+
+    since = day_start(first_day)
+    with transaction.atomic():
+        counts = live_counts()
+        starts = daily_deltas(Assignment.objects.filter(assigned_date__gte=since), 'assigned_date', 'device__')
+        returns = daily_deltas(Assignment.objects.filter(return_date__gte=since), 'return_date', 'device__')
+
+        logged_from = logged_since()
+        if logged_from is None:
+            moves = list(unlogged_moves(since, None))
+        else:
+            moves = list(logged_moves(max(since, logged_from)))
+            if since < logged_from:
+                moves.extend(unlogged_moves(since, logged_from))
+        # Status now of each device whose creation isn't logged, for undoing it
+        held = dict(Device.objects.filter(
+            id__in=[device_id for _, device_id, _, _, to_status in moves if to_status is None]
+        ).values_list('id', 'status'))
+
+    moves.sort(key=lambda move: move[0], reverse=True)
+    position = 0
+    rollups = []
+    day = today
+    while day >= first_day:
+        day_starts = starts.get(day, {})
+        day_returns = returns.get(day, {})
+
+        if day <= last_day:
+            for key in set(counts) | set(day_starts) | set(day_returns):
+                device_type, location = key
+                row = DeviceDailyRollup(
+                    date=day,
+                    device_type=device_type,
+                    location=location,
+                    assignments_started=day_starts.get(key, 0),
+                    assignments_returned=day_returns.get(key, 0),
+                    **{name: counts[key][name] for name in STATUSES},
+                )
+                if any(getattr(row, name) for name in STATUSES + ACTIVITY):
+                    rollups.append(row)
+
+        # Undo the day's moves, latest first, to get the counts at the end of the one before
+        boundary = day_start(day)
+        while position < len(moves) and moves[position][0] >= boundary:
+            _, device_id, key, from_status, to_status = moves[position]
+            position += 1
+            if to_status is None:
+                to_status = held.pop(device_id, None)
+            elif device_id in held:
+                held[device_id] = from_status
+
+            if to_status:
+                counts[key][to_status] -= 1
+            if from_status:
+                counts[key][from_status] += 1
+            if not sum(counts[key].values()):
+                del counts[key]
+
+        day -= timedelta(days=1)
+
+    with transaction.atomic():
+        DeviceDailyRollup.objects.filter(date__range=(first_day, last_day)).delete()
+        DeviceDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def latest_rollup_date():
+    return DeviceDailyRollup.objects.aggregate(latest=Max('date'))['latest']
+
+
+def pending_days(today=None):
+    """(first, last) ended days after the latest rollup, or None when up to date"""
+    today = today or timezone.localdate()
+    yesterday = today - timedelta(days=1)
+    latest = latest_rollup_date()
+    first = latest + timedelta(days=1) if latest else yesterday
+    return (first, yesterday) if first <= yesterday else None
+
+
+def rollup_totals(queryset, group_fields, **extra):
+    """Summed rollup columns per `group_fields`, with utilization = assigned / devices in service"""
+    rows = queryset.order_by(*group_fields).values(*group_fields).annotate(
+        **{name: Sum(name) for name in STATUSES + ACTIVITY},
+        **extra,
+    )
+    for row in rows:
+        in_service = row['available'] + row['assigned'] + row['maintenance']
+        row['utilization'] = round(row['assigned'] / in_service, 4) if in_service else None
+        yield row
+
+
+def utilization_series(first_day, last_day, device_type=None, location=None, group_by=None):
+    """Per-day totals for the range, optionally split by device type or location"""
+    queryset = DeviceDailyRollup.objects.filter(date__range=(first_day, last_day))
+    if device_type:
+        queryset = queryset.filter(device_type=device_type)
+    if location is not None:
+        queryset = queryset.filter(location=location)
+
+    return list(rollup_totals(queryset, ['date'] + ([group_by] if group_by else [])))
+
+
+def utilization_breakdown(first_day, last_day, by):
+    """
+    Range totals per device type or location. Status columns are summed
+    over the days, so utilization is the average share of devices in
+    service that were assigned
+    """
+    queryset = DeviceDailyRollup.objects.filter(date__range=(first_day, last_day))
+    return list(rollup_totals(queryset, [by], days=Count('date', distinct=True)))
@@ -1,9 +1,47 @@
 """
 Inventory Serializers
 """
+import re
+from django.conf import settings
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from apps.authentication.models import full_name_expression
 from apps.authentication.serializers import EmployeeSerializer
-from .models import Device, Assignment, TicketRequest
+from config.fieldsets import SparseFieldsetSerializerMixin
+from .models import Device, Assignment, TicketRequest, UploadSession
+
+
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """
+    URLs of the renditions recorded by the image pipeline, either all sizes
+    or just `size`; None until the photo has been processed
+    """
+    
+    def __init__(self, size=None, **kwargs):
+        self.size = size
+        super().__init__(**kwargs)
+    
+    def to_representation(self, value):
+        request = self.context.get('request')
+        
+        def url(name):
+            path = default_storage.url(name)
+            return request.build_absolute_uri(path) if request else path
+        
+        renditions = {
+            size_name: {
+                'width': entry['width'],
+                'height': entry['height'],
+                'webp': url(entry['webp']),
+                'jpeg': url(entry['jpeg']),
+            }
+            for size_name, entry in value.items()
+            if size_name != 'source' and (self.size is None or size_name == self.size)
+        }
+        
+        if self.size is not None:
+            return renditions.get(self.size)
+        return renditions or None
 
 
 class DeviceSerializer(serializers.ModelSerializer):
@@ -29,7 +67,11 @@ class DeviceSerializer(serializers.ModelSerializer):
         return None
     
     def get_current_assignment(self, obj):
-        assignment = obj.assignments.filter(status='active').first()
+        # Use active assignments prefetched by the caller when available
+        if hasattr(obj, 'active_assignments'):
+            assignment = obj.active_assignments[0] if obj.active_assignments else None
+        else:
+            assignment = obj.assignments.filter(status='active').first()
         if assignment:
             return {
                 'id': str(assignment.id),
@@ -40,7 +82,7 @@ class DeviceSerializer(serializers.ModelSerializer):
         return None
 
 
-class DeviceListSerializer(serializers.ModelSerializer):
+class DeviceListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Lightweight serializer for device list"""
     
     class Meta:
@@ -59,6 +101,8 @@ class AssignmentSerializer(serializers.ModelSerializer):
     assigned_by_name = serializers.SerializerMethodField()
     assignment_approved_by_name = serializers.SerializerMethodField()
     return_approved_by_name = serializers.SerializerMethodField()
+    assignment_image_renditions = ImageRenditionsField()
+    return_image_renditions = ImageRenditionsField()
     
     class Meta:
         model = Assignment
@@ -67,9 +111,11 @@ class AssignmentSerializer(serializers.ModelSerializer):
             'assigned_date', 'return_date', 'expected_return_date',
             'status', 'assignment_notes', 'return_notes',
             'assigned_by', 'assigned_by_name',
-            'assignment_image', 'assignment_approved_by', 'assignment_approved_by_name',
+            'assignment_image', 'assignment_image_renditions',
+            'assignment_approved_by', 'assignment_approved_by_name',
             'assignment_approved_date', 'assignment_undertaking',
-            'return_image', 'return_approved_by', 'return_approved_by_name',
+            'return_image', 'return_image_renditions',
+            'return_approved_by', 'return_approved_by_name',
             'return_approved_date', 'device_condition_on_return', 'device_broken'
         ]
         read_only_fields = [
@@ -114,7 +160,7 @@ class AssignmentSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class AssignmentListSerializer(serializers.ModelSerializer):
+class AssignmentListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Lightweight serializer for assignment list"""
     
     device_name = serializers.CharField(source='device.name', read_only=True)
@@ -126,6 +172,7 @@ class AssignmentListSerializer(serializers.ModelSerializer):
         read_only=True,
         allow_null=True
     )
+    assignment_thumbnail = ImageRenditionsField(source='assignment_image_renditions', size='thumb')
     
     class Meta:
         model = Assignment
@@ -133,8 +180,44 @@ class AssignmentListSerializer(serializers.ModelSerializer):
             'id', 'device', 'device_name', 'device_id',
             'employee', 'employee_name', 'employee_email',
             'assigned_date', 'status', 'assignment_approved_by_name',
-            'assignment_image', 'assignment_undertaking'
+            'assignment_image', 'assignment_thumbnail', 'assignment_undertaking'
         ]
+        sparse_sources = {
+            'employee_name': ['employee.first_name', 'employee.last_name'],
+            'assignment_approved_by_name': [
+                'assignment_approved_by.first_name',
+                'assignment_approved_by.last_name',
+            ],
+        }
+        values_expressions = {
+            'employee_name': full_name_expression('employee__'),
+            'assignment_approved_by_name': full_name_expression('assignment_approved_by__'),
+        }
+
+
+class DaysField(serializers.ReadOnlyField):
+    """Whole days of a duration"""
+
+    def to_representation(self, value):
+        return value.days
+
+
+class OverdueAssignmentSerializer(AssignmentListSerializer):
+    """Assignment list row with its due date and how many days it is overdue"""
+
+    # Annotated by overdue.overdue_assignments()
+    days_overdue = DaysField()
+
+    class Meta(AssignmentListSerializer.Meta):
+        fields = AssignmentListSerializer.Meta.fields + ['expected_return_date', 'days_overdue']
+        sparse_sources = {
+            **AssignmentListSerializer.Meta.sparse_sources,
+            'days_overdue': ['expected_return_date'],
+        }
+        values_expressions = {
+            **AssignmentListSerializer.Meta.values_expressions,
+            'days_overdue': 'days_overdue',
+        }
 
 
 class TicketRequestSerializer(serializers.ModelSerializer):
@@ -156,7 +239,7 @@ class TicketRequestSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'ticket_number', 'requested_by', 'created_at', 'updated_at']
 
 
-class TicketRequestListSerializer(serializers.ModelSerializer):
+class TicketRequestListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Lightweight serializer for ticket list"""
     
     requested_by_name = serializers.CharField(source='requested_by.full_name', read_only=True)
@@ -169,6 +252,73 @@ class TicketRequestListSerializer(serializers.ModelSerializer):
             'ticket_type', 'priority', 'status', 'device', 'device_name',
             'subject', 'created_at'
         ]
+        sparse_sources = {
+            'requested_by_name': ['requested_by.first_name', 'requested_by.last_name'],
+        }
+        values_expressions = {
+            'requested_by_name': full_name_expression('requested_by__'),
+        }
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable upload sessions"""
+    
+    offset = serializers.IntegerField(source='received', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'target', 'target_id', 'filename', 'size', 'checksum',
+            'offset', 'chunk_size', 'status', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'status', 'created_at', 'updated_at']
+    
+    def get_chunk_size(self, obj):
+        return settings.UPLOAD_CHUNK_SIZE
+    
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Size must be positive")
+        if value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Uploads are limited to {settings.UPLOAD_MAX_SIZE} bytes")
+        return value
+    
+    def validate_checksum(self, value):
+        value = value.lower()
+        if not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError("Checksum must be a hex encoded SHA-256")
+        return value
+
+
+class BulkDeviceSelectionSerializer(serializers.Serializer):
+    """Devices picked for a bulk status change, by id or by filter"""
+
+    FILTER_FIELDS = ['status', 'device_type', 'condition', 'location']
+
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    filter = serializers.DictField(child=serializers.CharField(), required=False, allow_empty=False)
+
+    def validate_ids(self, value):
+        if len(value) > settings.BULK_STATUS_MAX_DEVICES:
+            raise serializers.ValidationError(
+                f"At most {settings.BULK_STATUS_MAX_DEVICES} devices can be changed at once"
+            )
+        # Keep the caller's order for the results, without repeats
+        return list(dict.fromkeys(value))
+
+    def validate_filter(self, value):
+        unknown = sorted(set(value) - set(self.FILTER_FIELDS))
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown filter fields: {', '.join(unknown)}. Use {', '.join(self.FILTER_FIELDS)}"
+            )
+        return value
+
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError("Provide either ids or filter")
+        return data
 
 
 class DashboardStatsSerializer(serializers.Serializer):
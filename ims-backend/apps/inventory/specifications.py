@@ -0,0 +1,175 @@
+"""
+Device Specification Filters
+
+`?spec=` clauses filter devices on keys of the free-form `specifications`
+JSON, e.g. `?device_type=laptop&spec=ram_gb>=16&spec=storage_type=ssd`.
+Each clause is `key`, `key=value`, `key!=value` or a numeric comparison
+(`>`, `>=`, `<`, `<=`). Nested keys are joined with dots, as in
+`display.size_in<15`. Values are read as JSON when they parse, so `16`,
+`true` and `null` are typed, and as plain strings otherwise. Clauses can
+be repeated or comma separated, and all of them must match.
+
+The clauses compile to SQL that indexes can serve:
+- PostgreSQL: equality is JSON containment (`@>`), which the GIN
+  `jsonb_path_ops` index on `specifications` serves for any key.
+  Comparisons read the key as a number, guarded by its JSON type.
+- SQLite: every clause reads the key with `json_extract`, guarded by
+  `json_type`.
+
+`sync_spec_indexes` creates an expression index on exactly those
+expressions for each key in DEVICE_SPEC_INDEXED_KEYS. Hot keys are then
+served by index range scans instead of a full scan of the table.
+"""
+import json
+import re
+from django.db import connections
+from django.db.models import BooleanField, CharField, FloatField, Func, Q
+from django.db.models.lookups import Exact, GreaterThan, GreaterThanOrEqual, In, IsNull, LessThan, LessThanOrEqual
+
+
+KEY_PATTERN = re.compile(r'[A-Za-z0-9_]+(\.[A-Za-z0-9_]+){0,3}$')
+CLAUSE_PATTERN = re.compile(r'(?P<key>[^<>=!]+?)\s*(?:(?P<op>>=|<=|!=|=|>|<)\s*(?P<value>.*))?$')
+COMPARISONS = {'>': GreaterThan, '>=': GreaterThanOrEqual, '<': LessThan, '<=': LessThanOrEqual}
+
+# JSON types (as SQLite's json_type names them) and the field to compare each Python value as
+VALUE_TYPES = {
+    bool: (['true', 'false'], BooleanField),
+    int: (['integer', 'real'], FloatField),
+    float: (['integer', 'real'], FloatField),
+    str: (['text'], CharField),
+}
+
+INDEX_PREFIX = 'devices_spec_'
+
+
+class SpecificationFilterError(ValueError):
+    pass
+
+
+def key_path(key):
+    if not KEY_PATTERN.match(key):
+        raise SpecificationFilterError(
+            f'Invalid specification key "{key}": use letters, digits and _, up to 4 levels joined with dots'
+        )
+    return key.split('.')
+
+
+def json_path(path):
+    return '$' + ''.join(f'."{part}"' for part in path)
+
+
+def value_sql(vendor, column, path):
+    """SQL for the value at `path`: a number (or NULL) on PostgreSQL, the JSON scalar elsewhere"""
+    if vendor == 'postgresql':
+        pg_path = '{' + ','.join(path) + '}'
+        return (
+            f"(CASE WHEN jsonb_typeof({column} #> '{pg_path}') = 'number' "
+            f"THEN ({column} #>> '{pg_path}')::float8 END)"
+        )
+    return f"json_extract({column}, '{json_path(path)}')"
+
+
+class SpecificationValue(Func):
+    """
+    The specifications value at `path` (or its JSON type with kind='type'),
+    rendered as the same SQL as its expression index. Keys are validated by
+    key_path(), so the path is safe to inline
+    """
+
+    def __init__(self, path, kind='value', **kwargs):
+        self.path = path
+        self.kind = kind
+        super().__init__('specifications', **kwargs)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.source_expressions[0])
+        if self.kind == 'type':
+            return f"json_type({column}, '{json_path(self.path)}')", params
+        return value_sql(connection.vendor, column, self.path), params
+
+
+def parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def nested(path, value):
+    for part in reversed(path):
+        value = {part: value}
+    return value
+
+
+def typed(vendor, path, types, condition):
+    """On SQLite, also require the JSON type, so true doesn't equal 1 and "32GB" isn't above 16"""
+    if vendor == 'postgresql':
+        return condition
+    return condition & Q(In(SpecificationValue(path, kind='type', output_field=CharField()), types))
+
+
+def clause_q(vendor, clause):
+    """Q for one `key`, `key=value`, `key!=value` or `key>=number` clause"""
+    match = CLAUSE_PATTERN.match(clause.strip())
+    if not match:
+        raise SpecificationFilterError(f'Invalid specification filter "{clause}"')
+    path = key_path(match['key'])
+    op = match['op']
+
+    if op is None:
+        return Q(**{'__'.join(['specifications', *path[:-1], 'has_key']): path[-1]})
+
+    value = parse_value(match['value'])
+    if op in COMPARISONS:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise SpecificationFilterError(f'"{op}" compares numbers; got "{match["value"]}"')
+        comparison = COMPARISONS[op](SpecificationValue(path, output_field=FloatField()), value)
+        return typed(vendor, path, VALUE_TYPES[float][0], Q(comparison))
+
+    if type(value) not in VALUE_TYPES:
+        raise SpecificationFilterError(
+            f'"{match["key"]}" can only be compared with a number, string or boolean; '
+            f'use "{match["key"]}" alone to test that the key exists'
+        )
+
+    if vendor == 'postgresql':
+        condition = Q(specifications__contains=nested(path, value))
+        return ~condition if op == '!=' else condition
+
+    types, field = VALUE_TYPES[type(value)]
+    condition = typed(vendor, path, types, Q(Exact(SpecificationValue(path, output_field=field()), value)))
+    if op == '!=':
+        # As with containment, devices without the key don't equal the value
+        missing = IsNull(SpecificationValue(path, kind='type', output_field=CharField()), True)
+        return ~condition | Q(missing)
+    return condition
+
+
+def spec_clauses(params):
+    """Individual clauses from repeated and comma separated ?spec= values"""
+    return [clause for param in params for clause in param.split(',') if clause.strip()]
+
+
+def filter_specifications(queryset, params):
+    """Apply ?spec= clauses to a Device queryset; raises SpecificationFilterError"""
+    clauses = spec_clauses(params)
+    if not clauses:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    condition = Q()
+    for clause in clauses:
+        condition &= clause_q(vendor, clause)
+    return queryset.filter(condition)
+
+
+def index_name(key):
+    return INDEX_PREFIX + key.replace('.', '__').lower() + '_idx'
+
+
+def index_sql(vendor, key):
+    """CREATE INDEX statement for the expression `?spec=` compiles `key` to"""
+    expression = value_sql(vendor, 'specifications', key_path(key))
+    if vendor == 'postgresql':
+        return f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(key)} ON devices (({expression}))'
+    return f'CREATE INDEX IF NOT EXISTS {index_name(key)} ON devices ({expression})'
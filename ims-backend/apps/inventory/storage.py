@@ -0,0 +1,336 @@
+"""
+Content-Addressed Media Storage
+
+Uploads are hashed while they stream to disk and stored once under
+blobs/<sha256>, however many times the same photo or PDF is uploaded.
+MediaBlob rows count the file fields pointing at each blob, so blobs that
+are no longer referenced can be removed by `python manage.py gc_media`.
+Files saved before this storage was enabled keep their original names and
+are left alone.
+
+A blob's file is only placed or removed inside a transaction that has
+already written its MediaBlob row, so uploads and garbage collection of
+the same blob take the same row lock (or SQLite's write lock) and never
+interleave. Files left by uploads whose transaction rolled back have no
+row; gc_media removes them once they are older than its grace period.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+
+BLOB_DIRECTORY = 'blobs'
+INCOMING_DIRECTORY = '.incoming'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(f'{BLOB_DIRECTORY}/')
+
+
+def media_blob_model():
+    return apps.get_model('inventory', 'MediaBlob')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names every upload after the SHA-256 of its content"""
+
+    def get_available_name(self, name, max_length=None):
+        # The stored name comes from the content, so there is nothing to make unique
+        return name
+
+    def blob_name(self, digest, name):
+        extension = os.path.splitext(name)[1].lower()[:10]
+        return f'{BLOB_DIRECTORY}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def _save(self, name, content):
+        if hasattr(content, 'temporary_file_path'):
+            return self._save_file_on_disk(name, content.temporary_file_path())
+
+        incoming = self.path(INCOMING_DIRECTORY)
+        os.makedirs(incoming, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=incoming)
+
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+                    size += len(chunk)
+
+            blob_name = self.blob_name(digest.hexdigest(), name)
+            blob_path = self.path(blob_name)
+
+            with transaction.atomic():
+                # Lock the row first so gc_media can't remove the file under us
+                record_upload(blob_name, size)
+                if os.path.exists(blob_path):
+                    # Already stored: this upload costs no extra disk space
+                    os.remove(temp_path)
+                else:
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(temp_path, self.file_permissions_mode)
+                    os.replace(temp_path, blob_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return blob_name
+
+    def _save_file_on_disk(self, name, path):
+        """Hash a file that is already on disk and move it into place rather than copying it"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        size = os.path.getsize(path)
+
+        blob_name = self.blob_name(digest.hexdigest(), name)
+        blob_path = self.path(blob_name)
+        with transaction.atomic():
+            record_upload(blob_name, size)
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                file_move_safe(path, blob_path, allow_overwrite=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(blob_path, self.file_permissions_mode)
+
+        return blob_name
+
+    def delete(self, name):
+        # Blobs may be shared between rows; gc_media removes unreferenced ones
+        if not is_blob(name):
+            super().delete(name)
+
+    def delete_blob(self, name):
+        super().delete(name)
+
+
+def record_upload(name, size):
+    """
+    Create the MediaBlob for a newly stored blob, or count another upload
+    of it. Either write locks the row until the caller's transaction ends
+    """
+    MediaBlob = media_blob_model()
+    uploaded = {'upload_count': F('upload_count') + 1, 'last_uploaded_at': timezone.now()}
+
+    if MediaBlob.objects.filter(name=name).update(**uploaded):
+        return
+
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(name=name, size=size)
+    except IntegrityError:
+        # Stored concurrently by another request
+        MediaBlob.objects.filter(name=name).update(**uploaded)
+
+
+def adjust_references(names, delta):
+    """Add `delta` to the reference count of every blob in `names`"""
+    by_count = defaultdict(list)
+    for name, count in Counter(name for name in names if is_blob(name)).items():
+        by_count[count].append(name)
+
+    for count, group in by_count.items():
+        media_blob_model().objects.filter(name__in=group).update(
+            ref_count=F('ref_count') + delta * count
+        )
+
+
+@lru_cache(maxsize=None)
+def reference_fields(model):
+    """File fields of `model`, plus the JSON fields recording image renditions"""
+    return tuple(
+        field for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+        or (isinstance(field, models.JSONField) and field.name.endswith('_renditions'))
+    )
+
+
+def file_references(instance):
+    """{attname: [blob names]} for the loaded reference fields of `instance`"""
+    from .images import rendition_names
+
+    references = {}
+    for field in reference_fields(type(instance)):
+        if field.attname not in instance.__dict__:
+            continue
+        value = instance.__dict__[field.attname]
+        if isinstance(field, models.FileField):
+            names = [getattr(value, 'name', value)]
+        else:
+            names = rendition_names(value or {})
+        references[field.attname] = [name for name in names if is_blob(name)]
+    return references
+
+
+def snapshot_references(sender, instance, **kwargs):
+    """post_init receiver: remember which blobs the row pointed at when loaded"""
+    instance._file_references = file_references(instance)
+
+
+def handle_references_saved(sender, instance, **kwargs):
+    """post_save receiver: move references from replaced blobs to new ones"""
+    previous = instance.__dict__.get('_file_references', {})
+    current = file_references(instance)
+    added, removed = [], []
+
+    for attname, names in current.items():
+        # Fields deferred at load time have no baseline; recount_references covers them
+        if attname in previous and previous[attname] != names:
+            added.extend(names)
+            removed.extend(previous[attname])
+
+    adjust_references(added, 1)
+    adjust_references(removed, -1)
+    instance._file_references = current
+
+
+def handle_references_deleted(sender, instance, **kwargs):
+    """post_delete receiver"""
+    adjust_references(
+        [name for names in file_references(instance).values() for name in names],
+        -1
+    )
+
+
+def models_with_references():
+    return [model for model in apps.get_models() if reference_fields(model)]
+
+
+def recount_references():
+    """Rebuild every reference count from the rows; returns the number of referenced blobs"""
+    counts = Counter()
+    for model in models_with_references():
+        attnames = [field.attname for field in reference_fields(model)]
+        for instance in model._base_manager.only('pk', *attnames).iterator():
+            for names in file_references(instance).values():
+                counts.update(names)
+
+    MediaBlob = media_blob_model()
+    by_count = defaultdict(list)
+    for name, count in counts.items():
+        by_count[count].append(name)
+
+    with transaction.atomic():
+        MediaBlob.objects.update(ref_count=0)
+        for count, group in by_count.items():
+            MediaBlob.objects.filter(name__in=group).update(ref_count=count)
+
+    return len(counts)
+
+
+def collect_garbage(grace_period, dry_run=False):
+    """
+    Delete unreferenced blobs not uploaded within `grace_period`, plus
+    abandoned partial uploads
+
+    Returns:
+        tuple: (blobs removed, bytes freed)
+    """
+    MediaBlob = media_blob_model()
+    storage = storages['default']
+    cutoff = timezone.now() - grace_period
+    removed = freed = 0
+
+    for blob in MediaBlob.objects.filter(ref_count__lte=0, last_uploaded_at__lt=cutoff).iterator():
+        if not dry_run:
+            with transaction.atomic():
+                # Re-check inside the transaction in case it was referenced or re-uploaded meanwhile.
+                # The delete locks the row, so the file goes before an upload can see it
+                deleted, _ = MediaBlob.objects.filter(
+                    pk=blob.pk, ref_count__lte=0, last_uploaded_at__lt=cutoff
+                ).delete()
+                if not deleted:
+                    continue
+                storage.delete_blob(blob.name)
+        removed += 1
+        freed += blob.size
+
+    for name, size in orphaned_blobs(storage, cutoff):
+        if dry_run or remove_orphan(storage, name, size):
+            removed += 1
+            freed += size
+
+    incoming = storage.path(INCOMING_DIRECTORY)
+    if not dry_run and os.path.isdir(incoming):
+        for filename in os.listdir(incoming):
+            path = os.path.join(incoming, filename)
+            if os.path.getmtime(path) < time.time() - grace_period.total_seconds():
+                os.remove(path)
+
+    return removed, freed
+
+
+def orphaned_blobs(storage, cutoff, batch_size=1000):
+    """(name, size) of blob files older than `cutoff` that no MediaBlob row points at"""
+    root = storage.path(BLOB_DIRECTORY)
+    before = cutoff.timestamp()
+
+    def orphans(batch):
+        known = set(media_blob_model().objects.filter(name__in=batch).values_list('name', flat=True))
+        return [(name, size) for name, size in batch.items() if name not in known]
+
+    batch = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            stat = os.stat(path)
+            if stat.st_mtime >= before:
+                continue
+            batch[os.path.relpath(path, storage.location).replace(os.sep, '/')] = stat.st_size
+            if len(batch) >= batch_size:
+                yield from orphans(batch)
+                batch = {}
+    if batch:
+        yield from orphans(batch)
+
+
+def remove_orphan(storage, name, size):
+    """
+    Delete a blob file with no row. A placeholder row holds the name while
+    the file goes, so an upload of the same content waits and then stores
+    it again; returns False if a row appeared meanwhile
+    """
+    MediaBlob = media_blob_model()
+    try:
+        with transaction.atomic():
+            placeholder = MediaBlob.objects.create(name=name, size=size, upload_count=0)
+            storage.delete_blob(name)
+            placeholder.delete()
+    except IntegrityError:
+        return False
+    return True
+
+
+def storage_stats():
+    """Totals for the media volume, including the bytes saved by deduplication"""
+    totals = media_blob_model().objects.aggregate(
+        blobs=Count('id'),
+        stored_bytes=Sum('size'),
+        uploaded_bytes=Sum(F('size') * F('upload_count')),
+        unreferenced=Count('id', filter=models.Q(ref_count__lte=0)),
+    )
+    stored_bytes = totals['stored_bytes'] or 0
+    uploaded_bytes = totals['uploaded_bytes'] or 0
+
+    return {
+        'blobs': totals['blobs'],
+        'unreferenced_blobs': totals['unreferenced'],
+        'stored_bytes': stored_bytes,
+        'uploaded_bytes': uploaded_bytes,
+        'saved_bytes': uploaded_bytes - stored_bytes,
+    }
@@ -1,3 +1,697 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, time, timedelta
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.core.files.storage import storages
+from django.db import DatabaseError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.authentication.models import Employee
+from config.replicas import PIN_COOKIE, ReplicaMiddleware, health, read_alias
+from .async_views import device_list, event_stream, my_assignments
+from .batch import BatchView
+from .event_log import DomainEventWriter, settled_events
+from .events import change_events_after, missed_events, stream_ticket_user_id
+from .management.commands.benchmark_ticket_claims import create_queue
+from .models import Assignment, ChangeEvent, Device, DeviceDailyRollup, DomainEvent, MediaBlob, TicketRequest
+from .rollups import build_rollups
+from .storage import ContentAddressedStorage, collect_garbage
+from .warranty import warranty_report
+from .work_queue import ClaimLimitReached, claim_next_ticket
 
-# Create your tests here.
+
+class BatchViewTests(TestCase):
+    """Sub-requests of /api/batch/ against streamed and paginated lists"""
+
+    def setUp(self):
+        self.user = Employee.objects.create_user(
+            email='admin@example.com', password='pw', first_name='Ada', last_name='Admin', role='admin'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for n in range(3):
+            Device.objects.create(
+                device_id=f'DEV{n:03d}', name=f'Laptop {n}', device_type='laptop',
+                brand='Acme', model='X1', created_by=self.user
+            )
+
+    def batch(self, *urls):
+        response = self.client.post(
+            '/api/batch/', {'requests': [{'id': url, 'url': url} for url in urls]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['responses']
+
+    def test_streamed_list(self):
+        streamed, = self.batch('/api/inventory/devices/available/')
+        self.assertEqual(streamed['status'], 200)
+        self.assertEqual(len(streamed['body']), 3)
+
+    def test_streamed_and_paginated_lists_agree(self):
+        streamed, paginated = self.batch(
+            '/api/inventory/devices/available/', '/api/inventory/devices/available/?page=1'
+        )
+        self.assertEqual(
+            [device['id'] for device in streamed['body']],
+            [device['id'] for device in paginated['body']['results']],
+        )
+
+    def test_bad_sub_response_is_an_item_error(self):
+        with mock.patch('apps.inventory.batch.json') as json_module, self.assertLogs('apps.inventory.batch'):
+            json_module.loads.side_effect = RuntimeError('boom')
+            broken, = self.batch('/api/inventory/devices/available/')
+        self.assertEqual(broken['status'], 500)
+        self.assertEqual(broken['body'], {'detail': 'Server error.'})
+
+    def test_identical_sub_requests_run_once(self):
+        with mock.patch.object(BatchView, 'run', autospec=True, side_effect=BatchView.run) as run:
+            response = self.client.post('/api/batch/', {'requests': [
+                {'id': 'a', 'url': '/api/inventory/devices/available/'},
+                {'id': 'b', 'url': '/api/inventory/devices/available/'},
+            ]}, format='json')
+        self.assertEqual(run.call_count, 1)
+        first, second = response.json()['responses']
+        self.assertEqual((first['id'], second['id']), ('a', 'b'))
+        self.assertEqual(first['body'], second['body'])
+
+    def test_parallel_sub_requests_keep_the_batch_context(self):
+        def run(view, request, sub):
+            return {'id': sub.get('id'), 'status': 200, 'body': read_alias.get()}
+
+        request = APIRequestFactory().post('/api/batch/', {'parallel': True, 'requests': [
+            {'url': '/api/inventory/devices/'}, {'url': '/api/inventory/assignments/'},
+        ]}, format='json')
+        force_authenticate(request, self.user)
+        token = read_alias.set('replica_1')
+        try:
+            with mock.patch.object(BatchView, 'run', autospec=True, side_effect=run):
+                response = BatchView.as_view()(request)
+        finally:
+            read_alias.reset(token)
+        self.assertEqual([item['body'] for item in response.data['responses']], ['replica_1', 'replica_1'])
+
+
+class AsyncDeviceListTests(TestCase):
+    """The ASGI device list answers like DeviceViewSet.list"""
+
+    def setUp(self):
+        self.user = Employee.objects.create_user(
+            email='admin@example.com', password='pw', first_name='Ada', last_name='Admin', role='admin'
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for n, status in enumerate(['available', 'available', 'maintenance']):
+            Device.objects.create(
+                device_id=f'DEV{n:03d}', name=f'Laptop {n}', device_type='laptop', brand='Acme',
+                model='X1', status=status, specifications={'ram_gb': 8 * (n + 1)}
+            )
+
+    async def get_async(self, query):
+        request = AsyncRequestFactory().get(
+            f'/api/inventory/devices/?{query}', headers={'Authorization': f'Bearer {self.token}'}
+        )
+        return await device_list(request)
+
+    async def assert_same_response(self, query):
+        sync_response = await sync_to_async(self.client.get)(f'/api/inventory/devices/?{query}')
+        async_response = await self.get_async(query)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+
+    async def test_matches_sync_list(self):
+        await self.assert_same_response('ordering=name')
+
+    async def test_facets(self):
+        await self.assert_same_response('facets=status&ordering=name')
+        response = await self.get_async('facets=status')
+        self.assertEqual(json.loads(response.content)['facets'], {'status': {'available': 2, 'maintenance': 1}})
+
+    async def test_sparse_fieldset(self):
+        await self.assert_same_response('fields=id,name&ordering=name')
+
+    async def test_invalid_page(self):
+        await self.assert_same_response('page=9')
+
+    async def test_specification_filter(self):
+        await self.assert_same_response('spec=ram_gb>=16&ordering=name')
+        response = await self.get_async('spec=ram_gb>=16')
+        self.assertEqual(json.loads(response.content)['count'], 2)
+
+    async def test_bad_specification_is_a_400(self):
+        await self.assert_same_response('spec=bad%20key')
+        response = await self.get_async('spec=bad%20key')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('spec', json.loads(response.content))
+
+
+class OwnListActionTests(TestCase):
+    """my_assignments and friends keep their own filter; list query params don't narrow it"""
+
+    def setUp(self):
+        self.user = Employee.objects.create_user(
+            email='emp@example.com', password='pw', first_name='Em', last_name='Ployee'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        device = Device.objects.create(
+            device_id='DEV000', name='Laptop 0', device_type='laptop', brand='Acme', model='X1', status='assigned'
+        )
+        Device.objects.create(
+            device_id='DEV001', name='Laptop 1', device_type='laptop', brand='Acme', model='X1'
+        )
+        self.assignment = Assignment.objects.create(device=device, employee=self.user, status='active')
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in json.loads(b''.join(response.streaming_content))]
+
+    def test_list_params_are_ignored(self):
+        self.assertEqual(self.ids('/api/inventory/assignments/my_assignments/?status=returned'), [str(self.assignment.pk)])
+        self.assertEqual(len(self.ids('/api/inventory/devices/available/?status=maintenance')), 1)
+
+    async def test_async_handler_ignores_list_params(self):
+        token = str(RefreshToken.for_user(self.user).access_token)
+        request = AsyncRequestFactory().get(
+            '/api/inventory/assignments/my_assignments/?status=returned',
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        response = await my_assignments(request)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([row['id'] for row in json.loads(body)], [str(self.assignment.pk)])
+
+
+class WarrantyReportTests(TestCase):
+    """devices/warranty_expiring pages the groups the digest would report"""
+
+    def setUp(self):
+        self.user = Employee.objects.create_user(
+            email='admin@example.com', password='pw', first_name='Ada', last_name='Admin', role='admin'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        today = timezone.localdate()
+        layout = [('HQ', 'laptop', 5), ('HQ', 'laptop', 1), ('HQ', 'laptop', 9), ('', 'monitor', 3), ('Depot', 'phone', 40)]
+        for n, (location, device_type, days) in enumerate(layout):
+            Device.objects.create(
+                device_id=f'DEV{n:03d}', name=f'Device {n}', device_type=device_type, brand='Acme',
+                model='X1', location=location, warranty_expiry=today + timedelta(days=days)
+            )
+
+    @override_settings(WARRANTY_DIGEST_DEVICES_PER_GROUP=2)
+    def test_pages_match_the_digest_report(self):
+        with mock.patch('rest_framework.pagination.PageNumberPagination.page_size', 1):
+            first = self.client.get('/api/inventory/devices/warranty_expiring/?days=30').json()
+            second = self.client.get(first['next']).json()
+
+        self.assertEqual((first['total'], first['count']), (4, 2))
+        report = json.loads(json.dumps(warranty_report(30), default=str))
+        self.assertEqual(first['results'] + second['results'], report['groups'])
+        self.assertEqual([device['device_id'] for device in first['results'][0]['devices']], ['DEV001', 'DEV000'])
+        self.assertIsNone(second['next'])
+
+
+class OverdueReminderTests(TestCase):
+    """scan_overdue_assignments stamps each channel only once its email went out"""
+
+    def setUp(self):
+        today = timezone.localdate()
+        self.assignments = {}
+        Employee.objects.create_user(
+            email='manager@example.com', password='pw', first_name='Man', last_name='Ager',
+            role='manager', department='IT'
+        )
+        for n, email in enumerate(['sent@example.com', 'bounced@example.com']):
+            employee = Employee.objects.create_user(
+                email=email, password='pw', first_name='Em', last_name=f'Ployee{n}', department='IT'
+            )
+            device = Device.objects.create(
+                device_id=f'DEV{n:03d}', name=f'Laptop {n}', device_type='laptop', brand='Acme',
+                model='X1', status='assigned'
+            )
+            self.assignments[email] = Assignment.objects.bulk_create([Assignment(
+                device=device, employee=employee, status='active',
+                expected_return_date=today - timedelta(days=2)
+            )])[0]
+
+    def scan(self, failing):
+        def send(email, *args):
+            return email not in failing
+
+        with mock.patch('apps.inventory.overdue.send_email_via_apps_script', side_effect=send):
+            call_command('scan_overdue_assignments', stdout=io.StringIO(), stderr=io.StringIO())
+
+    def rescan(self):
+        """Scan again with every send succeeding; returns (employees reminded, digest recipients)"""
+        with mock.patch('apps.inventory.overdue.send_employee_reminder', return_value=True) as reminder:
+            with mock.patch('apps.inventory.overdue.send_manager_digest', return_value=True) as digest:
+                call_command('scan_overdue_assignments', stdout=io.StringIO(), stderr=io.StringIO())
+        return (
+            [call.args[0]['email'] for call in reminder.call_args_list],
+            [call.args[0] for call in digest.call_args_list],
+        )
+
+    def stamped(self, email, field):
+        return getattr(Assignment.objects.get(pk=self.assignments[email].pk), field) is not None
+
+    def test_failed_reminders_are_retried(self):
+        self.scan({'bounced@example.com'})
+        self.assertTrue(self.stamped('sent@example.com', 'employee_reminded_at'))
+        self.assertFalse(self.stamped('bounced@example.com', 'employee_reminded_at'))
+        self.assertTrue(self.stamped('bounced@example.com', 'manager_notified_at'))
+
+        # The manager already heard about the bounced assignment
+        self.assertEqual(self.rescan(), (['bounced@example.com'], []))
+        self.assertTrue(self.stamped('bounced@example.com', 'employee_reminded_at'))
+        self.assertEqual(self.rescan(), ([], []))
+
+    def test_failed_digests_are_retried(self):
+        self.scan({'manager@example.com'})
+        for email in self.assignments:
+            self.assertTrue(self.stamped(email, 'employee_reminded_at'))
+            self.assertFalse(self.stamped(email, 'manager_notified_at'))
+
+        self.assertEqual(self.rescan(), ([], ['manager@example.com']))
+        for email in self.assignments:
+            self.assertTrue(self.stamped(email, 'manager_notified_at'))
+
+    def test_new_due_date_clears_both_stamps(self):
+        self.scan(set())
+        assignment = Assignment.objects.get(pk=self.assignments['sent@example.com'].pk)
+        assignment.expected_return_date -= timedelta(days=1)
+        assignment.save(update_fields=['expected_return_date'])
+        self.assertFalse(self.stamped('sent@example.com', 'employee_reminded_at'))
+        self.assertFalse(self.stamped('sent@example.com', 'manager_notified_at'))
+
+
+class RollupTests(TestCase):
+    """Walking back from today's device counts"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+
+    def at(self, days_ago, hour=9):
+        return timezone.make_aware(datetime.combine(self.today - timedelta(days=days_ago), time(hour)))
+
+    def add_device(self, device_id, status):
+        return Device.objects.create(
+            device_id=device_id, name=device_id, device_type='laptop', brand='Acme', model='X1',
+            location='HQ', status=status
+        )
+
+    def rollups(self):
+        return {
+            (self.today - row.date).days: (row.available, row.assigned, row.maintenance, row.retired)
+            for row in DeviceDailyRollup.objects.all()
+        }
+
+    def test_devices_added_today_have_no_history(self):
+        for device_id, status in [('D1', 'available'), ('D2', 'maintenance'), ('D3', 'retired'), ('D4', 'assigned')]:
+            self.add_device(device_id, status)
+        build_rollups(self.today - timedelta(days=5), self.today - timedelta(days=1))
+        self.assertEqual(self.rollups(), {})
+
+    def test_logged_transitions(self):
+        device = self.add_device('D1', 'maintenance')
+        Device.objects.filter(pk=device.pk).update(created_at=self.at(5))
+        DomainEvent.objects.bulk_create([
+            DomainEvent(resource='device', object_id=device.pk, action='created',
+                        to_status='available', occurred_at=self.at(5)),
+            DomainEvent(resource='device', object_id=device.pk, action='mark_maintenance',
+                        from_status='available', to_status='maintenance', occurred_at=self.at(2)),
+        ])
+        build_rollups(self.today - timedelta(days=6), self.today - timedelta(days=1))
+        self.assertEqual(self.rollups(), {
+            5: (1, 0, 0, 0),
+            4: (1, 0, 0, 0),
+            3: (1, 0, 0, 0),
+            2: (0, 0, 1, 0),
+            1: (0, 0, 1, 0),
+        })
+
+
+class DomainEventLogTests(TestCase):
+    """Delta sync and the append-only guarantee"""
+
+    def add_event(self, recorded_at):
+        event = DomainEvent(
+            resource='device', object_id=uuid.uuid4(), action='created', to_status='available',
+            recorded_at=recorded_at
+        )
+        DomainEvent.objects.bulk_create([event])
+        return DomainEvent.objects.order_by('-id').first()
+
+    @override_settings(DOMAIN_EVENT_SETTLE_SECONDS=60)
+    def test_sync_stops_below_events_still_settling(self):
+        old = timezone.now() - timedelta(hours=1)
+        first = self.add_event(old)
+        self.add_event(timezone.now())
+        # Committed after the recent one, with a later id: must not be served ahead of it
+        self.add_event(old)
+        self.assertEqual(list(settled_events().values_list('id', flat=True)), [first.id])
+
+    @override_settings(DOMAIN_EVENT_SETTLE_SECONDS=0)
+    def test_settled_events_are_served(self):
+        self.add_event(timezone.now() - timedelta(seconds=1))
+        self.add_event(timezone.now() - timedelta(seconds=1))
+        self.assertEqual(settled_events().count(), 2)
+
+    def test_bulk_changes_are_refused(self):
+        event = self.add_event(timezone.now())
+        with self.assertRaises(ValueError):
+            DomainEvent.objects.filter(pk=event.pk).update(action='changed')
+        with self.assertRaises(ValueError):
+            DomainEvent.objects.filter(pk=event.pk).delete()
+
+    @mock.patch('apps.inventory.event_log.close_old_connections')
+    def test_writer_retries_failed_batches(self, _):
+        writer = DomainEventWriter(retries=2, retry_delay=0)
+        batch = [
+            DomainEvent(resource='device', object_id=uuid.uuid4(), action='created', to_status='available')
+            for _ in range(3)
+        ]
+        bulk_create = DomainEvent.objects.bulk_create
+        attempts = []
+
+        def flaky_bulk_create(events):
+            attempts.append(len(events))
+            if len(attempts) == 1:
+                raise DatabaseError('busy')
+            return bulk_create(events)
+
+        with mock.patch.object(DomainEvent.objects, 'bulk_create', side_effect=flaky_bulk_create):
+            with self.assertLogs('apps.inventory.event_log', 'WARNING'):
+                self.assertTrue(writer.write_batch(batch))
+        self.assertEqual(attempts, [3, 3])
+        self.assertEqual(DomainEvent.objects.count(), 3)
+
+    @mock.patch('apps.inventory.event_log.close_old_connections')
+    def test_writer_falls_back_to_single_inserts(self, _):
+        writer = DomainEventWriter(retries=1, retry_delay=0)
+        batch = [
+            DomainEvent(resource='device', object_id=uuid.uuid4(), action='created', to_status='available')
+            for _ in range(3)
+        ]
+        with mock.patch.object(DomainEvent.objects, 'bulk_create', side_effect=DatabaseError('down')) as bulk_create:
+            with self.assertLogs('apps.inventory.event_log', 'WARNING') as logs:
+                self.assertFalse(writer.write_batch(batch))
+            writer.write_each(batch)
+        self.assertEqual(bulk_create.call_count, 2)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(DomainEvent.objects.count(), 3)
+
+    def test_database_refuses_changes(self):
+        event = self.add_event(timezone.now())
+        for sql in ['UPDATE domain_events SET action = %s WHERE id = %s', 'DELETE FROM domain_events WHERE action <> %s AND id = %s']:
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, ['changed', event.pk])
+        self.assertTrue(DomainEvent.objects.filter(pk=event.pk, action='created').exists())
+
+
+class ChangeEventStreamTests(TestCase):
+    """The live stream reads change events in commit-safe id order"""
+
+    def add_event(self, created_at):
+        ChangeEvent.objects.bulk_create([
+            ChangeEvent(resource='device', action='updated', object_id=uuid.uuid4(), created_at=created_at)
+        ])
+        return ChangeEvent.objects.order_by('-id').first()
+
+    @override_settings(EVENT_STREAM_SETTLE_SECONDS=60)
+    def test_stream_stops_below_events_still_settling(self):
+        old = timezone.now() - timedelta(hours=1)
+        first = self.add_event(old)
+        self.add_event(timezone.now())
+        self.add_event(old)
+        self.assertEqual([event.id for event in change_events_after(0, 10)], [first.id])
+        self.assertEqual(change_events_after(first.id, 10), [])
+
+    @override_settings(EVENT_STREAM_SETTLE_SECONDS=0)
+    def test_resume_too_far_behind_is_a_reset(self):
+        old = timezone.now() - timedelta(hours=1)
+        first, second, third = [self.add_event(old) for _ in range(3)]
+        self.assertEqual([event.id for event in missed_events(first.id, 2)], [second.id, third.id])
+        self.assertIsNone(missed_events(first.id, 1))
+        ChangeEvent.objects.filter(pk=first.pk).delete()
+        self.assertEqual(len(missed_events(first.id, 2)), 2)
+        self.assertIsNone(missed_events(0, 5))
+
+
+class StreamTicketTests(TestCase):
+    """The event stream opens with a short-lived ticket, not the access token"""
+
+    def setUp(self):
+        self.user = Employee.objects.create_user(
+            email='emp@example.com', password='pw', first_name='Em', last_name='Ployee'
+        )
+
+    def issue_ticket(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/inventory/events/ticket/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['ticket']
+
+    async def open_stream(self, query):
+        return await event_stream(AsyncRequestFactory().get(f'/api/inventory/events/stream/?{query}'))
+
+    def test_ticket_names_the_user(self):
+        ticket = self.issue_ticket()
+        self.assertEqual(stream_ticket_user_id(ticket), str(self.user.pk))
+        self.assertIsNone(stream_ticket_user_id(('x' if ticket[0] != 'x' else 'y') + ticket[1:]))
+        with mock.patch('django.core.signing.time.time', return_value=timezone.now().timestamp() + 3600):
+            self.assertIsNone(stream_ticket_user_id(ticket))
+
+    async def test_stream_takes_a_ticket_not_a_token(self):
+        ticket = await sync_to_async(self.issue_ticket)()
+        token = str(RefreshToken.for_user(self.user).access_token)
+        self.assertEqual((await self.open_stream(f'token={token}')).status_code, 401)
+        response = await self.open_stream(f'ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+
+class MediaGarbageCollectionTests(TestCase):
+    """gc_media against the content-addressed blob store"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = storages['default']
+        if not isinstance(self.storage, ContentAddressedStorage):
+            self.skipTest('MEDIA_DEDUPLICATION is disabled')
+
+    def age(self, name, hours=48):
+        old = (timezone.now() - timedelta(hours=hours)).timestamp()
+        os.utime(self.storage.path(name), (old, old))
+        MediaBlob.objects.filter(name=name).update(last_uploaded_at=timezone.now() - timedelta(hours=hours))
+
+    def write_orphan(self, name):
+        path = self.storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'orphan')
+
+    def test_unreferenced_blob_is_removed_inside_its_transaction(self):
+        name = self.storage.save('photo.jpg', ContentFile(b'photo'))
+        self.age(name)
+        delete_blob = self.storage.delete_blob
+
+        def delete_while_locked(blob_name):
+            # Still holding the row lock, so no upload can reuse the file meanwhile
+            self.assertTrue(connection.in_atomic_block)
+            self.assertFalse(MediaBlob.objects.filter(name=blob_name).exists())
+            delete_blob(blob_name)
+
+        with mock.patch.object(self.storage, 'delete_blob', side_effect=delete_while_locked):
+            removed, _ = collect_garbage(timedelta(hours=24))
+        self.assertEqual(removed, 1)
+        self.assertFalse(self.storage.exists(name))
+
+    def test_upload_after_collection_stores_the_file_again(self):
+        name = self.storage.save('photo.jpg', ContentFile(b'photo'))
+        self.age(name)
+        collect_garbage(timedelta(hours=24))
+        self.assertEqual(self.storage.save('again.jpg', ContentFile(b'photo')), name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertTrue(MediaBlob.objects.filter(name=name).exists())
+
+    def test_orphaned_files_are_swept(self):
+        old_orphan = 'blobs/aa/bb/aabb0000.jpg'
+        new_orphan = 'blobs/cc/dd/ccdd0000.jpg'
+        self.write_orphan(old_orphan)
+        self.write_orphan(new_orphan)
+        self.age(old_orphan)
+        referenced = self.storage.save('kept.jpg', ContentFile(b'kept'))
+        MediaBlob.objects.filter(name=referenced).update(ref_count=1)
+        self.age(referenced)
+
+        removed, freed = collect_garbage(timedelta(hours=24))
+        self.assertEqual((removed, freed), (1, len(b'orphan')))
+        self.assertFalse(self.storage.exists(old_orphan))
+        self.assertTrue(self.storage.exists(new_orphan))
+        self.assertTrue(self.storage.exists(referenced))
+        self.assertFalse(MediaBlob.objects.filter(name=old_orphan).exists())
+
+
+class TicketClaimTests(TestCase):
+    """The in-progress limit on claim_next, and the claim benchmark's rows"""
+
+    def setUp(self):
+        self.technician = Employee.objects.create_user(
+            email='tech@example.com', password='pw', first_name='Tess', last_name='Tech', role='manager'
+        )
+        for n in range(3):
+            TicketRequest.objects.create(
+                requested_by=self.technician, ticket_type='repair', priority='medium',
+                subject=f'Ticket {n}', description='Broken.'
+            )
+
+    @override_settings(TICKET_CLAIM_MAX_IN_PROGRESS=1)
+    def test_claim_limit_is_checked_in_the_claim(self):
+        self.assertIsNotNone(claim_next_ticket(self.technician))
+        with self.assertRaises(ClaimLimitReached):
+            claim_next_ticket(self.technician)
+        self.assertEqual(TicketRequest.objects.filter(assigned_to=self.technician).count(), 1)
+        self.assertIsNotNone(claim_next_ticket(self.technician, limit=0))
+
+    @override_settings(TICKET_CLAIM_MAX_IN_PROGRESS=1)
+    def test_claim_limit_is_a_conflict(self):
+        client = APIClient()
+        client.force_authenticate(self.technician)
+        self.assertEqual(client.post('/api/inventory/tickets/claim_next/').status_code, 200)
+        response = client.post('/api/inventory/tickets/claim_next/')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('1 tickets in progress', response.json()['error'])
+
+    @override_settings(DEBUG=False)
+    def test_benchmark_refuses_without_debug(self):
+        TicketRequest.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('benchmark_ticket_claims', '--tickets', '1', stdout=io.StringIO())
+
+    def test_benchmark_rows_do_not_move_id_allocation(self):
+        employee_id = Employee.objects.allocate_employee_ids()[0]
+        ticket_number = TicketRequest.objects.create(
+            requested_by=self.technician, ticket_type='repair', priority='low',
+            subject='Before', description='Broken.'
+        ).ticket_number
+        create_queue(tickets=5, technicians=2)
+        self.assertEqual(Employee.objects.allocate_employee_ids()[0], employee_id)
+        following = TicketRequest.objects.create(
+            requested_by=self.technician, ticket_type='repair', priority='low',
+            subject='After', description='Broken.'
+        ).ticket_number
+        self.assertEqual(int(following[3:]), int(ticket_number[3:]) + 1)
+
+
+class ReplicaRoutingTests(TestCase):
+    """Reads through a second SQLite database standing in for a replica"""
+
+    # replica_1 only exists once setUpClass adds it, after the runner has set up the test databases
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        replica = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(cls.replica_dir, 'replica.sqlite3')}
+        # connections.settings is settings.DATABASES, so replica_aliases() sees it too
+        connections.settings['replica_1'] = connections.configure_settings(
+            {'default': connections.settings['default'], 'replica_1': replica}
+        )['replica_1']
+        with connections['replica_1'].schema_editor() as editor:
+            for model in django_apps.get_models():
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica_1'].close()
+        del connections['replica_1']
+        del connections.settings['replica_1']
+        shutil.rmtree(cls.replica_dir)
+
+    def setUp(self):
+        health.unavailable_until.clear()
+        health.checked_at.clear()
+        self.user = Employee.objects.create_user(
+            email='admin@example.com', password='pw', first_name='Ada', last_name='Admin', role='admin'
+        )
+        # The replica holds a copy of the user and an older name for the device
+        Employee.objects.using('replica_1').bulk_create([Employee.objects.get(pk=self.user.pk)])
+        self.device = Device.objects.create(
+            device_id='DEV001', name='Primary', device_type='laptop', brand='Acme', model='X1'
+        )
+        Device.objects.using('replica_1').bulk_create([Device(
+            pk=self.device.pk, device_id='DEV001', name='Replica', device_type='laptop', brand='Acme', model='X1'
+        )])
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def device_name(self):
+        response = self.client.get('/api/inventory/devices/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results'][0]['name']
+
+    def write(self, **headers):
+        response = self.client.post(f'/api/inventory/devices/{self.device.pk}/mark_maintenance/', **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.cookies[PIN_COOKIE]
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.device_name(), 'Replica')
+
+    def test_write_pins_user_to_primary(self):
+        cookie = self.write()
+        self.assertEqual(cookie['samesite'], 'Lax')
+        self.assertEqual(self.device_name(), 'Primary')
+
+    def test_cross_origin_pin_is_sent_with_credentials(self):
+        cookie = self.write(HTTP_ORIGIN='https://app.example.com')
+        self.assertEqual(cookie['samesite'], 'None')
+        self.assertTrue(cookie['secure'])
+
+    def test_expired_or_tampered_pin_is_ignored(self):
+        self.write()
+        later = timezone.now().timestamp() + settings.REPLICA_PIN_SECONDS + 1
+        with mock.patch('django.core.signing.time.time', return_value=later):
+            self.assertEqual(self.device_name(), 'Replica')
+        self.client.cookies[PIN_COOKIE] = f'{self.user.pk}:forged:signature'
+        self.assertEqual(self.device_name(), 'Replica')
+
+    def test_failed_replica_falls_back_to_primary(self):
+        with connections['replica_1'].cursor() as cursor:
+            cursor.execute('DROP TABLE devices')
+        self.assertEqual(self.device_name(), 'Primary')
+        self.assertIn('replica_1', health.unavailable_until)
+
+    def test_failed_replica_falls_back_for_async_views(self):
+        async def view(request):
+            return HttpResponse(read_alias.get() or 'default')
+
+        request = APIRequestFactory().get('/api/inventory/devices/')
+        request.replica_view = (view, (), {})
+        token = read_alias.set('replica_1')
+        try:
+            response = ReplicaMiddleware(view).process_exception(request, DatabaseError('gone'))
+        finally:
+            read_alias.reset(token)
+        self.assertEqual(response.content, b'default')
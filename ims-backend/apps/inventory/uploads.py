@@ -0,0 +1,280 @@
+"""
+Resumable Uploads
+
+Large ticket attachments and device images are sent in chunks: the client
+creates an upload session with the file's size and SHA-256, PUTs each
+chunk with its byte offset, and completes the session once every byte has
+arrived. Chunks are streamed straight from the request into a staging file
+under MEDIA_ROOT/.incoming, so memory use does not grow with the file, and
+a dropped connection resumes from the last stored offset.
+"""
+import hashlib
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .models import Device, TicketRequest, UploadSession
+from .serializers import DeviceSerializer, TicketRequestSerializer, UploadSessionSerializer
+from .storage import INCOMING_DIRECTORY
+
+
+COPY_BUFFER_SIZE = 1024 * 1024
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+class StagedFile(File):
+    """A finished upload on disk, which storages move into place instead of copying"""
+
+    def __init__(self, path, name):
+        super().__init__(open(path, 'rb'), name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def staging_path(session):
+    return default_storage.path(f'{INCOMING_DIRECTORY}/upload-{session.pk}.part')
+
+
+def staged_offset(session):
+    """
+    Bytes of `session` safely on disk; rewinds the session if its staging
+    file was lost (e.g. collected by gc_media after sitting idle)
+    """
+    path = staging_path(session)
+    on_disk = os.path.getsize(path) if os.path.exists(path) else 0
+
+    if on_disk < session.received:
+        session.received = on_disk
+        UploadSession.objects.filter(pk=session.pk).update(received=on_disk)
+    return session.received
+
+
+def upload_target(user, target, target_id):
+    """
+    The ticket or device `user` may attach an upload to
+
+    Returns:
+        tuple: (instance or None, error response or None)
+    """
+    if target == 'device_image':
+        # Devices are edited by admins only, as in DeviceViewSet
+        if user.role != 'admin':
+            return None, Response({
+                'error': 'Only admins can change device images'
+            }, status=status.HTTP_403_FORBIDDEN)
+        instance = Device.objects.filter(pk=target_id).first()
+    else:
+        tickets = TicketRequest.objects.all()
+        if user.role not in ['admin', 'manager']:
+            tickets = tickets.filter(Q(requested_by=user) | Q(assigned_to=user))
+        instance = tickets.filter(pk=target_id).first()
+
+    if instance is None:
+        return None, Response({
+            'error': 'Upload target not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return instance, None
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def expire_upload_sessions(max_age=None):
+    """Delete unfinished sessions idle for longer than `max_age` along with their staging files"""
+    max_age = max_age or timedelta(hours=settings.UPLOAD_SESSION_HOURS)
+    expired = UploadSession.objects.filter(
+        status='uploading',
+        updated_at__lt=timezone.now() - max_age
+    )
+
+    count = 0
+    for session in expired.iterator():
+        path = staging_path(session)
+        if os.path.exists(path):
+            os.remove(path)
+        session.delete()
+        count += 1
+    return count
+
+
+class UploadViewSet(viewsets.GenericViewSet):
+    """Create, resume and complete chunked uploads"""
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadSessionSerializer
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        _, error = upload_target(request.user, data['target'], data['target_id'])
+        if error:
+            return error
+
+        if data['target'] == 'device_image' and not data['filename'].lower().endswith(IMAGE_EXTENSIONS):
+            return Response({
+                'error': 'Device images must be JPG, PNG, GIF or WebP files'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer.save(owner=request.user, filename=os.path.basename(data['filename']))
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        """Session state; `offset` is where the next chunk must start"""
+        session = self.get_object()
+        if session.status == 'uploading':
+            staged_offset(session)
+        return Response(self.get_serializer(session).data)
+
+    def destroy(self, request, pk=None):
+        """Abandon an upload"""
+        session = self.get_object()
+        path = staging_path(session)
+        if os.path.exists(path):
+            os.remove(path)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        """Append the raw request body at the `Upload-Offset` header (or `?offset=`)"""
+        session = self.get_object()
+        if session.status != 'uploading':
+            return Response({
+                'error': 'Upload is already complete'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            offset = int(request.headers.get('Upload-Offset', request.query_params.get('offset')))
+            length = int(request.headers.get('Content-Length') or 0)
+        except (TypeError, ValueError):
+            return Response({
+                'error': 'Upload-Offset header is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if offset != staged_offset(session):
+            return Response({
+                'error': 'Chunk does not start at the current offset',
+                'offset': session.received
+            }, status=status.HTTP_409_CONFLICT)
+
+        if length <= 0:
+            return Response({
+                'error': 'Chunk is empty'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if length > settings.UPLOAD_CHUNK_SIZE:
+            return Response({
+                'error': f'Chunks are limited to {settings.UPLOAD_CHUNK_SIZE} bytes'
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        if offset + length > session.size:
+            return Response({
+                'error': 'Chunk extends past the declared upload size'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        path = staging_path(session)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        remaining = length
+
+        # The request body is read in pieces rather than through request.data
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as staged:
+            # Drop whatever an interrupted chunk left past the stored offset
+            staged.truncate(offset)
+            staged.seek(offset)
+            while remaining:
+                data = request.stream.read(min(COPY_BUFFER_SIZE, remaining))
+                if not data:
+                    break
+                staged.write(data)
+                remaining -= len(data)
+
+        if remaining:
+            return Response({
+                'error': 'Chunk was shorter than its Content-Length',
+                'offset': offset
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Conditional on the offset, in case the same chunk was sent twice concurrently
+        if not UploadSession.objects.filter(pk=session.pk, received=offset).update(
+            received=offset + length,
+            updated_at=timezone.now()
+        ):
+            session.refresh_from_db()
+            return Response({
+                'error': 'Chunk does not start at the current offset',
+                'offset': session.received
+            }, status=status.HTTP_409_CONFLICT)
+
+        return Response({'offset': offset + length, 'size': session.size})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Verify the checksum and attach the file to the ticket or device"""
+        session = self.get_object()
+        if session.status != 'uploading':
+            return Response({
+                'error': 'Upload is already complete'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if staged_offset(session) != session.size:
+            return Response({
+                'error': 'Upload is incomplete',
+                'offset': session.received
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        path = staging_path(session)
+        if file_checksum(path) != session.checksum:
+            os.remove(path)
+            UploadSession.objects.filter(pk=session.pk).update(received=0)
+            return Response({
+                'error': 'Checksum mismatch; the upload must be restarted',
+                'offset': 0
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        instance, error = upload_target(request.user, session.target, session.target_id)
+        if error:
+            return error
+
+        if session.target == 'device_image':
+            field, key, serializer_class = instance.image, 'device', DeviceSerializer
+        else:
+            field, key, serializer_class = instance.attachment, 'ticket', TicketRequestSerializer
+        instance._change_action = f'upload_{field.field.name}'
+        instance._change_actor = request.user
+
+        staged = StagedFile(path, session.filename)
+        try:
+            with transaction.atomic():
+                # The storage moves the staging file into place and saves the row
+                field.save(session.filename, staged, save=True)
+                session.status = 'complete'
+                session.save(update_fields=['status', 'updated_at'])
+        finally:
+            staged.close()
+            if os.path.exists(path):
+                os.remove(path)
+
+        return Response({
+            'message': 'Upload complete',
+            key: serializer_class(instance, context={'request': request}).data
+        })
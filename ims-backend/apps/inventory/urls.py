@@ -9,13 +9,19 @@ from .views import (
     TicketRequestViewSet,
     DashboardViewSet,
 )
+from .uploads import UploadViewSet
+from .event_log import EventLogViewSet
+from .events import StreamTicketView
 
 router = DefaultRouter()
 router.register(r'devices', DeviceViewSet, basename='device')
 router.register(r'assignments', AssignmentViewSet, basename='assignment')
 router.register(r'tickets', TicketRequestViewSet, basename='ticket')
 router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'uploads', UploadViewSet, basename='upload')
+router.register(r'event-log', EventLogViewSet, basename='event-log')
 
 urlpatterns = [
+    path('events/ticket/', StreamTicketView.as_view(), name='event_stream_ticket'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,11 +1,16 @@
 """
 Inventory Views
 """
+from datetime import date, timedelta
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, Count, Exists, OuterRef
 from django.utils import timezone
 from .models import Device, Assignment, TicketRequest
 from apps.authentication.models import Employee
@@ -14,25 +19,96 @@ from .serializers import (
     DeviceListSerializer,
     AssignmentSerializer,
     AssignmentListSerializer,
+    OverdueAssignmentSerializer,
     TicketRequestSerializer,
     TicketRequestListSerializer,
+    BulkDeviceSelectionSerializer,
     DashboardStatsSerializer,
 )
 from .permissions import IsAdminOrReadOnly, IsAdminOrManager
+from .images import queue_image_processing
+from .events import record_changes, record_transitions
+from .warranty import expiring_devices, expiring_groups, with_first_devices
+from .overdue import overdue_assignments
+from .history import InvalidTimelineQuery, timeline_response_data
+from .work_queue import ClaimLimitReached, claim_next_ticket
+from .rollups import latest_rollup_date, utilization_series, utilization_breakdown
+from .specifications import SpecificationFilterError, filter_specifications
+from config.fieldsets import SparseFieldsetMixin
+from config.streaming import StreamingListMixin
+from config.values_serializers import ValuesListMixin
 
 
-class DeviceViewSet(viewsets.ModelViewSet):
+class FacetedListMixin:
+    """
+    Adds per-value counts to list responses with `?facets=true` (all of
+    `facet_fields`) or `?facets=status,location` (a subset). Counts cover
+    the current filter set and come from a single grouped query.
+    """
+    
+    facet_fields = []
+    
+    def get_requested_facets(self):
+        param = self.request.query_params.get('facets', '')
+        if param.lower() in ['', 'false', '0']:
+            return []
+        if param.lower() in ['true', '1']:
+            return list(self.facet_fields)
+        return [field for field in param.split(',') if field in self.facet_fields]
+    
+    def get_facets(self, queryset, fields):
+        facets = {field: {} for field in fields}
+        rows = queryset.order_by().values(*fields).annotate(facet_count=Count('pk'))
+        for row in rows:
+            for field in fields:
+                counts = facets[field]
+                counts[row[field]] = counts.get(row[field], 0) + row['facet_count']
+        return facets
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        fields = self.get_requested_facets()
+        if fields and isinstance(response.data, dict):
+            queryset = self.filter_queryset(self.get_queryset())
+            response.data['facets'] = self.get_facets(queryset, fields)
+        return response
+
+
+class TicketOrderingFilter(filters.OrderingFilter):
+    """`?ordering=priority` sorts tickets by urgency (priority_rank) rather than alphabetically"""
+    
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [term + '_rank' if term.lstrip('-') == 'priority' else term for term in ordering]
+
+
+class SpecificationFilter(filters.BaseFilterBackend):
+    """`?spec=ram_gb>=16&spec=storage_type=ssd` filters devices by specification keys"""
+    
+    def filter_queryset(self, request, queryset, view):
+        try:
+            return filter_specifications(queryset, request.query_params.getlist('spec'))
+        except SpecificationFilterError as e:
+            raise ValidationError({'spec': [str(e)]})
+
+
+class DeviceViewSet(FacetedListMixin, SparseFieldsetMixin, ValuesListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ViewSet for Device model"""
     
     queryset = Device.objects.all()
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    read_replica = True
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter, SpecificationFilter]
     search_fields = ['device_id', 'name', 'brand', 'model', 'serial_number']
     ordering_fields = ['created_at', 'name', 'status']
     ordering = ['-created_at']
+    facet_fields = ['status', 'device_type', 'condition', 'location']
+    sparse_fieldset_actions = ['list', 'available']
     
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ['list', 'available']:
             return DeviceListSerializer
         return DeviceSerializer
     
@@ -62,15 +138,62 @@ class DeviceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def available(self, request):
         """Get all available devices"""
-        devices = self.queryset.filter(status='available')
-        serializer = DeviceListSerializer(devices, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.queryset.filter(status='available'))
+    
+    @action(detail=False, methods=['get'])
+    def warranty_expiring(self, request):
+        """Devices whose warranty expires within `days`, grouped by location and type"""
+        if request.user.role not in ['admin', 'manager']:
+            return Response({
+                'error': 'Only admin/manager can view warranty reports'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            days = int(request.query_params.get('days', settings.WARRANTY_NOTICE_DAYS))
+        except ValueError:
+            days = -1
+        if not 0 <= days <= 3650:
+            return Response({
+                'error': 'days must be a whole number between 0 and 3650'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        today = timezone.localdate()
+        page = self.paginate_queryset(expiring_groups(days, today))
+        response = self.get_paginated_response(with_first_devices(page, days, today))
+        response.data.update({
+            'days': days,
+            'from': today,
+            'to': today + timedelta(days=days),
+            'total': expiring_devices(days, today).count(),
+        })
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Custody timeline: assignments, approvals, returns and tickets for this device"""
+        if request.user.role not in ['admin', 'manager']:
+            return Response({
+                'error': 'Only admin/manager can view device history'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        device = self.get_object()
+        try:
+            data = timeline_response_data(
+                request,
+                Assignment.objects.filter(device=device),
+                TicketRequest.objects.filter(device=device),
+            )
+        except InvalidTimelineQuery as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
     
     @action(detail=True, methods=['post'])
     def mark_maintenance(self, request, pk=None):
         """Mark device as under maintenance"""
         device = self.get_object()
         device.status = 'maintenance'
+        device._change_action = 'mark_maintenance'
+        device._change_actor = request.user
         device.save()
         serializer = self.get_serializer(device)
         return Response({
@@ -90,27 +213,127 @@ class DeviceViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         device.status = 'available'
+        device._change_action = 'mark_available'
+        device._change_actor = request.user
         device.save()
         serializer = self.get_serializer(device)
         return Response({
             'message': 'Device marked as available',
             'device': serializer.data
         })
+    
+    def bulk_status_change(self, request, new_status, change_action, block_active_assignments):
+        """
+        Move the selected devices to `new_status` with one anti-joined
+        SELECT and one UPDATE, and report what happened to each device
+        """
+        selection = BulkDeviceSelectionSerializer(data=request.data)
+        selection.is_valid(raise_exception=True)
+        ids = selection.validated_data.get('ids')
+        limit = settings.BULK_STATUS_MAX_DEVICES
+        
+        active_assignments = Assignment.objects.filter(device=OuterRef('pk'), status='active')
+        devices = Device.objects.filter(pk__in=ids) if ids is not None else (
+            Device.objects.filter(**selection.validated_data['filter'])
+        )
+        rows = list(
+            devices.annotate(has_active_assignment=Exists(active_assignments))
+            .values_list('pk', 'device_id', 'status', 'has_active_assignment')[:limit + 1]
+        )
+        if len(rows) > limit:
+            return Response({
+                'error': f'The filter matches more than {limit} devices. Narrow it down or send ids.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = {}
+        eligible = {}
+        previous_status = {}
+        for pk, device_id, current_status, has_active_assignment in rows:
+            previous_status[pk] = current_status
+            if current_status == new_status:
+                result = 'unchanged'
+            elif block_active_assignments and has_active_assignment:
+                result = 'has_active_assignment'
+            else:
+                result = 'updated'
+                eligible[pk] = device_id
+            results[pk] = {'id': pk, 'device_id': device_id, 'status': current_status, 'result': result}
+        
+        with transaction.atomic():
+            updated = Device.objects.filter(pk__in=list(eligible))
+            if block_active_assignments:
+                # Recheck in the UPDATE itself in case a device was assigned meanwhile
+                updated = updated.filter(~Exists(active_assignments))
+            count = updated.update(status=new_status, updated_at=timezone.now())
+            
+            if count != len(eligible):
+                changed_ids = set(
+                    Device.objects.filter(pk__in=list(eligible), status=new_status).values_list('pk', flat=True)
+                )
+                for pk in set(eligible) - changed_ids:
+                    results[pk]['result'] = 'has_active_assignment'
+                    del eligible[pk]
+            
+            for pk in eligible:
+                results[pk]['status'] = new_status
+            changed_devices = [
+                Device(pk=pk, device_id=device_id, status=new_status) for pk, device_id in eligible.items()
+            ]
+            record_changes(changed_devices, change_action)
+            record_transitions(
+                [(device, previous_status[device.pk]) for device in changed_devices],
+                change_action,
+                request.user
+            )
+        
+        if ids is not None:
+            results = [
+                results.get(pk, {'id': pk, 'device_id': None, 'status': None, 'result': 'not_found'})
+                for pk in ids
+            ]
+        else:
+            results = list(results.values())
+        
+        return Response({
+            'message': f'{len(eligible)} of {len(results)} devices updated',
+            'updated': len(eligible),
+            'results': results
+        })
+    
+    @action(detail=False, methods=['post'])
+    def bulk_mark_maintenance(self, request):
+        """Mark several devices as under maintenance"""
+        return self.bulk_status_change(request, 'maintenance', 'mark_maintenance', block_active_assignments=False)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_mark_available(self, request):
+        """Mark several devices as available, skipping those with active assignments"""
+        return self.bulk_status_change(request, 'available', 'mark_available', block_active_assignments=True)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_retire(self, request):
+        """Retire several devices, skipping those with active assignments"""
+        return self.bulk_status_change(request, 'retired', 'retire', block_active_assignments=True)
 
 
-class AssignmentViewSet(viewsets.ModelViewSet):
+class AssignmentViewSet(FacetedListMixin, SparseFieldsetMixin, ValuesListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ViewSet for Assignment model"""
     
     queryset = Assignment.objects.all()
     permission_classes = [IsAuthenticated, IsAdminOrManager]
+    read_replica = True
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['device__device_id', 'device__name', 'employee__first_name', 'employee__last_name']
-    ordering_fields = ['assigned_date', 'return_date']
+    ordering_fields = ['assigned_date', 'return_date', 'expected_return_date']
     ordering = ['-assigned_date']
+    facet_fields = ['status', 'device__device_type', 'device__location']
+    sparse_fieldset_actions = ['list', 'my_assignments', 'overdue']
     
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ['list', 'my_assignments']:
             return AssignmentListSerializer
+        if self.action == 'overdue':
+            return OverdueAssignmentSerializer
         return AssignmentSerializer
     
     def get_queryset(self):
@@ -170,7 +393,10 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         assignment.assignment_approved_by = request.user
         assignment.assignment_approved_date = timezone.now()
         assignment.status = 'active'
+        assignment._change_action = 'approve_assignment'
+        assignment._change_actor = request.user
         assignment.save()
+        queue_image_processing(assignment, ['assignment_image'])
         
         serializer = self.get_serializer(assignment)
         return Response({
@@ -190,6 +416,8 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         
         assignment.status = 'pending_return'
         assignment.return_notes = request.data.get('return_notes', '')
+        assignment._change_action = 'request_return'
+        assignment._change_actor = request.user
         assignment.save()
         
         serializer = self.get_serializer(assignment)
@@ -231,7 +459,10 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         assignment.return_approved_date = timezone.now()
         assignment.return_date = timezone.now()
         assignment.status = 'returned'
+        assignment._change_action = 'approve_return'
+        assignment._change_actor = request.user
         assignment.save()
+        queue_image_processing(assignment, ['return_image'])
         
         serializer = self.get_serializer(assignment)
         return Response({
@@ -252,6 +483,8 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         assignment.status = 'returned'
         assignment.return_date = timezone.now()
         assignment.return_notes = request.data.get('return_notes', '')
+        assignment._change_action = 'return_device'
+        assignment._change_actor = request.user
         assignment.save()
         
         serializer = self.get_serializer(assignment)
@@ -263,23 +496,32 @@ class AssignmentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_assignments(self, request):
         """Get current user's assignments"""
-        assignments = self.queryset.filter(employee=request.user, status='active')
-        serializer = AssignmentListSerializer(assignments, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.queryset.filter(employee=request.user, status='active'))
+    
+    @action(detail=False, methods=['get'])
+    def overdue(self, request):
+        """Active assignments past their expected return date, most overdue first"""
+        queryset = self.filter_queryset(overdue_assignments(self.get_queryset()))
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('expected_return_date', 'id')
+        return self.list_response(queryset)
 
 
-class TicketRequestViewSet(viewsets.ModelViewSet):
+class TicketRequestViewSet(FacetedListMixin, SparseFieldsetMixin, ValuesListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ViewSet for TicketRequest model"""
     
     queryset = TicketRequest.objects.all()
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    read_replica = True
+    filter_backends = [filters.SearchFilter, TicketOrderingFilter]
     search_fields = ['ticket_number', 'subject', 'description']
     ordering_fields = ['created_at', 'priority', 'status']
     ordering = ['-created_at']
+    facet_fields = ['status', 'priority', 'ticket_type']
+    sparse_fieldset_actions = ['list', 'my_tickets']
     
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ['list', 'my_tickets']:
             return TicketRequestListSerializer
         return TicketRequestSerializer
     
@@ -327,6 +569,8 @@ class TicketRequestViewSet(viewsets.ModelViewSet):
             employee = Employee.objects.get(id=employee_id)
             ticket.assigned_to = employee
             ticket.status = 'in_progress'
+            ticket._change_action = 'assign'
+            ticket._change_actor = request.user
             ticket.save()
             
             serializer = self.get_serializer(ticket)
@@ -339,6 +583,39 @@ class TicketRequestViewSet(viewsets.ModelViewSet):
                 'error': 'Employee not found'
             }, status=status.HTTP_404_NOT_FOUND)
     
+    @action(detail=False, methods=['post'])
+    def claim_next(self, request):
+        """Assign the most urgent, oldest unclaimed pending ticket to the caller"""
+        if request.user.role not in ['admin', 'manager']:
+            return Response({
+                'error': 'Only admin/manager can claim tickets'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        ticket_type = request.data.get('ticket_type')
+        if ticket_type and ticket_type not in dict(TicketRequest.TICKET_TYPE_CHOICES):
+            return Response({
+                'error': f'ticket_type must be one of {", ".join(dict(TicketRequest.TICKET_TYPE_CHOICES))}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            ticket = claim_next_ticket(request.user, ticket_type)
+        except ClaimLimitReached as e:
+            return Response({
+                'error': f'You already have {e.args[0]} tickets in progress; resolve some before claiming more'
+            }, status=status.HTTP_409_CONFLICT)
+        
+        if ticket is None:
+            return Response({
+                'message': 'No pending tickets to claim',
+                'ticket': None
+            })
+        
+        serializer = self.get_serializer(ticket)
+        return Response({
+            'message': f'Claimed ticket {ticket.ticket_number}',
+            'ticket': serializer.data
+        })
+    
     @action(detail=True, methods=['post'])
     def resolve(self, request, pk=None):
         """Mark ticket as resolved"""
@@ -353,6 +630,8 @@ class TicketRequestViewSet(viewsets.ModelViewSet):
         ticket.status = 'resolved'
         ticket.resolution_notes = resolution_notes
         ticket.resolved_at = timezone.now()
+        ticket._change_action = 'resolve'
+        ticket._change_actor = request.user
         ticket.save()
         
         serializer = self.get_serializer(ticket)
@@ -364,15 +643,14 @@ class TicketRequestViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_tickets(self, request):
         """Get current user's tickets"""
-        tickets = self.queryset.filter(requested_by=request.user)
-        serializer = TicketRequestListSerializer(tickets, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.queryset.filter(requested_by=request.user))
 
 
 class DashboardViewSet(viewsets.ViewSet):
     """ViewSet for dashboard statistics"""
     
     permission_classes = [IsAuthenticated]
+    read_replica = True
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -410,8 +688,10 @@ class DashboardViewSet(viewsets.ViewSet):
         )
         
         # Recent data
-        recent_assignments = Assignment.objects.all()[:5]
-        recent_tickets = TicketRequest.objects.all()[:5]
+        recent_assignments = Assignment.objects.select_related(
+            'device', 'employee', 'assignment_approved_by'
+        )[:5]
+        recent_tickets = TicketRequest.objects.select_related('requested_by', 'device')[:5]
         
         stats_data = {
             'total_devices': total_devices,
@@ -428,9 +708,120 @@ class DashboardViewSet(viewsets.ViewSet):
             'in_progress_tickets': in_progress_tickets,
             'resolved_tickets': resolved_tickets,
             'device_by_type': device_by_type,
-            'recent_assignments': AssignmentListSerializer(recent_assignments, many=True).data,
-            'recent_tickets': TicketRequestListSerializer(recent_tickets, many=True).data,
+            'recent_assignments': recent_assignments,
+            'recent_tickets': recent_tickets,
         }
         
         serializer = DashboardStatsSerializer(stats_data)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+    
+    ROLLUP_GROUPS = ['device_type', 'location']
+    
+    def rollup_range(self, request):
+        """(first day, last day, error response) from ?from= and ?to=, defaulting to the last 30 ended days"""
+        if request.user.role not in ['admin', 'manager']:
+            return None, None, Response({
+                'error': 'Only admin/manager can view utilization analytics'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            last_day = request.query_params.get('to')
+            last_day = date.fromisoformat(last_day) if last_day else timezone.localdate() - timedelta(days=1)
+            first_day = request.query_params.get('from')
+            first_day = date.fromisoformat(first_day) if first_day else last_day - timedelta(days=29)
+        except ValueError:
+            return None, None, Response({
+                'error': 'from and to must be dates (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if first_day > last_day:
+            return None, None, Response({
+                'error': 'from must not be after to'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if (last_day - first_day).days >= settings.ROLLUP_MAX_RANGE_DAYS:
+            return None, None, Response({
+                'error': f'Date ranges are limited to {settings.ROLLUP_MAX_RANGE_DAYS} days'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return first_day, last_day, None
+    
+    @action(detail=False, methods=['get'])
+    def utilization(self, request):
+        """Daily device counts by status and assignment activity, read from the rollups"""
+        first_day, last_day, error = self.rollup_range(request)
+        if error:
+            return error
+        
+        group_by = request.query_params.get('group_by') or None
+        if group_by is not None and group_by not in self.ROLLUP_GROUPS:
+            return Response({
+                'error': f'group_by must be one of {", ".join(self.ROLLUP_GROUPS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'from': first_day,
+            'to': last_day,
+            'rolled_up_through': latest_rollup_date(),
+            'days': utilization_series(
+                first_day,
+                last_day,
+                device_type=request.query_params.get('device_type'),
+                location=request.query_params.get('location'),
+                group_by=group_by,
+            ),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def utilization_breakdown(self, request):
+        """Utilization and assignment activity over a date range per device type or location"""
+        first_day, last_day, error = self.rollup_range(request)
+        if error:
+            return error
+        
+        by = request.query_params.get('by', 'device_type')
+        if by not in self.ROLLUP_GROUPS:
+            return Response({
+                'error': f'by must be one of {", ".join(self.ROLLUP_GROUPS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'from': first_day,
+            'to': last_day,
+            'rolled_up_through': latest_rollup_date(),
+            'by': by,
+            'groups': utilization_breakdown(first_day, last_day, by),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def db_pool(self, request):
+        """Get database connection pool metrics (admin only)"""
+        if request.user.role != 'admin':
+            return Response({
+                'error': 'Only admins can view connection pool metrics'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        pool = getattr(connection, 'pool', None)
+        if pool is None:
+            return Response({
+                'mode': settings.DB_CONNECTION_MODE,
+                'pooling': False,
+            })
+        
+        stats = pool.get_stats()
+        requests_queued = stats.get('requests_queued', 0)
+        
+        return Response({
+            'mode': settings.DB_CONNECTION_MODE,
+            'pooling': True,
+            'min_size': pool.min_size,
+            'max_size': pool.max_size,
+            'pool_size': stats.get('pool_size', 0),
+            'available': stats.get('pool_available', 0),
+            'checked_out': stats.get('pool_size', 0) - stats.get('pool_available', 0),
+            'requests_waiting': stats.get('requests_waiting', 0),
+            'requests_num': stats.get('requests_num', 0),
+            'requests_queued': requests_queued,
+            'requests_errors': stats.get('requests_errors', 0),
+            'average_wait_ms': round(stats.get('requests_wait_ms', 0) / requests_queued, 2) if requests_queued else 0,
+            'connections_lost': stats.get('connections_lost', 0),
+        })
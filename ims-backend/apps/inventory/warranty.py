@@ -0,0 +1,203 @@
+"""
+Warranty Expiry Scanning
+
+Finds devices whose warranty runs out within the next N days and groups
+them by location and device type. Devices are read in keyset order over
+(warranty_expiry, id), which the devices_warranty_idx index serves
+directly: each chunk is an index range scan that starts where the last
+one stopped. Only the group totals and the first few devices of each
+group stay in memory, however large the fleet.
+
+Admins get the result as one digest email each (`scan_warranty_expiry`).
+`devices/warranty_expiring/` doesn't run that scan per request: it pages
+through the groups from one grouped query and loads the first devices of
+the groups on the page only.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, F, Min, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from django.utils.html import escape
+from apps.authentication.models import Employee
+from apps.authentication.utils import send_email_via_apps_script
+from config.background import submit
+from .models import Device
+
+
+SCAN_FIELDS = ['id', 'device_id', 'name', 'device_type', 'location', 'warranty_expiry']
+
+
+def expiring_devices(days, today=None):
+    """Devices in service whose warranty expires between today and `days` from now"""
+    today = today or timezone.localdate()
+    return Device.objects.filter(
+        warranty_expiry__gte=today,
+        warranty_expiry__lte=today + timedelta(days=days),
+    ).exclude(status='retired')
+
+
+def iter_chunks(queryset, chunk_size):
+    """Rows of `queryset` in (warranty_expiry, id) order, one keyset page at a time"""
+    queryset = queryset.order_by('warranty_expiry', 'id').values(*SCAN_FIELDS)
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            # (warranty_expiry, id) > last, with a plain lower bound the index can seek to
+            page = page.filter(warranty_expiry__gte=last['warranty_expiry']).filter(
+                Q(warranty_expiry__gt=last['warranty_expiry']) | Q(id__gt=last['id'])
+            )
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1]
+
+
+def warranty_report(days, today=None, chunk_size=None, devices_per_group=None):
+    """Expiring devices grouped by location and type, soonest group first"""
+    today = today or timezone.localdate()
+    chunk_size = chunk_size or settings.WARRANTY_SCAN_CHUNK_SIZE
+    devices_per_group = devices_per_group or settings.WARRANTY_DIGEST_DEVICES_PER_GROUP
+
+    groups = {}
+    total = 0
+    for rows in iter_chunks(expiring_devices(days, today), chunk_size):
+        total += len(rows)
+        for row in rows:
+            key = (row['location'], row['device_type'])
+            group = groups.get(key)
+            if group is None:
+                # Rows arrive in expiry order, so the first one is the earliest
+                group = groups[key] = {
+                    'location': row['location'],
+                    'device_type': row['device_type'],
+                    'count': 0,
+                    'earliest_expiry': row['warranty_expiry'],
+                    'devices': [],
+                }
+            group['count'] += 1
+            if len(group['devices']) < devices_per_group:
+                group['devices'].append({
+                    'id': row['id'],
+                    'device_id': row['device_id'],
+                    'name': row['name'],
+                    'warranty_expiry': row['warranty_expiry'],
+                })
+
+    return {
+        'days': days,
+        'from': today,
+        'to': today + timedelta(days=days),
+        'total': total,
+        'groups': sorted(
+            groups.values(),
+            key=lambda group: (group['earliest_expiry'], group['location'], group['device_type'])
+        ),
+    }
+
+
+def expiring_groups(days, today=None):
+    """(location, device_type) groups of expiring devices with their count and earliest expiry"""
+    return (
+        expiring_devices(days, today)
+        .values('location', 'device_type')
+        .annotate(count=Count('id'), earliest_expiry=Min('warranty_expiry'))
+        .order_by('earliest_expiry', 'location', 'device_type')
+    )
+
+
+def with_first_devices(groups, days, today=None, devices_per_group=None):
+    """`groups` with the first devices of each filled in, from one windowed query"""
+    devices_per_group = devices_per_group or settings.WARRANTY_DIGEST_DEVICES_PER_GROUP
+    groups = [dict(group, devices=[]) for group in groups]
+    if not groups:
+        return groups
+
+    by_key = {(group['location'], group['device_type']): group for group in groups}
+    in_groups = Q()
+    for location, device_type in by_key:
+        in_groups |= Q(location=location, device_type=device_type)
+    rows = (
+        expiring_devices(days, today).filter(in_groups)
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=[F('location'), F('device_type')],
+            order_by=[F('warranty_expiry').asc(), F('id').asc()],
+        ))
+        .filter(position__lte=devices_per_group)
+        .order_by('warranty_expiry', 'id')
+        .values(*SCAN_FIELDS)
+    )
+    for row in rows:
+        by_key[(row['location'], row['device_type'])]['devices'].append({
+            'id': row['id'],
+            'device_id': row['device_id'],
+            'name': row['name'],
+            'warranty_expiry': row['warranty_expiry'],
+        })
+    return groups
+
+
+def digest_content(admin, report):
+    """(subject, html, text) of the warranty digest for one admin"""
+    subject = f"{report['total']} device warranties expire in the next {report['days']} days"
+    types = dict(Device.DEVICE_TYPE_CHOICES)
+
+    html_groups = []
+    text_groups = []
+    for group in report['groups']:
+        heading = f"{group['location'] or 'No location'} – {types.get(group['device_type'], group['device_type'])}"
+        more = group['count'] - len(group['devices'])
+        rows = ''.join(
+            f"<li>{escape(device['device_id'])} {escape(device['name'])}: {device['warranty_expiry']:%d %b %Y}</li>"
+            for device in group['devices']
+        )
+        if more:
+            rows += f"<li>and {more} more</li>"
+        html_groups.append(f"<h3>{escape(heading)} ({group['count']})</h3><ul>{rows}</ul>")
+
+        lines = [
+            f"  - {device['device_id']} {device['name']}: {device['warranty_expiry']:%d %b %Y}"
+            for device in group['devices']
+        ]
+        if more:
+            lines.append(f"  - and {more} more")
+        text_groups.append(f"{heading} ({group['count']})\n" + '\n'.join(lines))
+
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <p>Hi {escape(admin.first_name)},</p>
+        <p>{report['total']} devices have a warranty that expires between {report['from']:%d %b %Y} and {report['to']:%d %b %Y}.</p>
+        {''.join(html_groups)}
+        <p><a href="{settings.FRONTEND_URL}/devices">Open the device inventory</a></p>
+        <p>Best regards,<br>IMS Team</p>
+    </body>
+    </html>
+    """
+
+    text_content = (
+        f"Hi {admin.first_name},\n\n"
+        f"{report['total']} devices have a warranty that expires between "
+        f"{report['from']:%d %b %Y} and {report['to']:%d %b %Y}.\n\n"
+        + '\n\n'.join(text_groups)
+        + "\n\nBest regards,\nIMS Team\n"
+    )
+    return subject, html_content, text_content
+
+
+def send_warranty_digest(admin, report):
+    subject, html_content, text_content = digest_content(admin, report)
+    return send_email_via_apps_script(admin.email, subject, html_content, text_content)
+
+
+def queue_warranty_digests(report):
+    """Queue one digest per active admin on a background thread pool; returns the futures"""
+    admins = Employee.objects.filter(role='admin', is_active=True).only('email', 'first_name')
+    return {
+        admin.email: submit('warranty', send_warranty_digest, admin, report)
+        for admin in admins
+    }
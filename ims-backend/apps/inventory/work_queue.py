@@ -0,0 +1,103 @@
+"""
+Ticket Work Queue
+
+Technicians pull their next ticket with `tickets/claim_next/` instead of
+waiting for one to be handed out. The queue is every pending ticket that
+nobody has been assigned, most urgent first (by priority_rank, not the
+alphabetical `priority` string) and oldest first within a priority. A
+partial index on exactly those rows, in that order, serves each claim.
+
+On PostgreSQL the head of the queue is locked with SELECT ... FOR UPDATE
+SKIP LOCKED, so concurrent claims each take a different ticket without
+waiting on each other. SQLite has no row locks: there a claim is a
+conditional UPDATE of one of the first few tickets, which only succeeds if
+the ticket is still unclaimed, and moves on to the next one if it isn't.
+
+The claim limit (TICKET_CLAIM_MAX_IN_PROGRESS) is checked in the claim's
+transaction, after locking the technician's employee row, so concurrent
+claims by one technician are counted one after the other. SQLite runs
+write transactions one at a time anyway.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.authentication.models import Employee
+from .events import record_changes, record_transitions
+from .models import TicketRequest
+
+
+# Tickets a claim tries before giving up when every one was claimed under it
+CLAIM_CANDIDATES = 10
+
+
+def claimable_tickets(ticket_type=None):
+    """The work queue, in the order tickets are claimed"""
+    queue = TicketRequest.objects.filter(status='pending', assigned_to__isnull=True)
+    if ticket_type:
+        queue = queue.filter(ticket_type=ticket_type)
+    return queue.order_by('-priority_rank', 'created_at', 'id')
+
+
+class ClaimLimitReached(Exception):
+    pass
+
+
+def open_ticket_count(employee):
+    return TicketRequest.objects.filter(assigned_to=employee, status='in_progress').count()
+
+
+def check_claim_limit(employee, limit):
+    """Raise ClaimLimitReached if `employee` holds `limit` tickets; call inside the claim's transaction"""
+    if not limit:
+        return
+    # Claims by the same technician wait here for each other
+    list(Employee.objects.select_for_update().filter(pk=employee.pk).values_list('pk', flat=True))
+    if open_ticket_count(employee) >= limit:
+        raise ClaimLimitReached(limit)
+
+
+def claim_locked(queue, employee):
+    """Lock the first ticket no other claim holds and assign it"""
+    ticket = queue.select_for_update(skip_locked=True, of=('self',)).first()
+    if ticket is None:
+        return None
+
+    ticket.assigned_to = employee
+    ticket.status = 'in_progress'
+    ticket._change_action = 'claim'
+    ticket._change_actor = employee
+    ticket.save()
+    return ticket
+
+
+def claim_conditional(queue, employee):
+    """Assign the first candidate that is still unclaimed when the UPDATE runs"""
+    for pk in queue.values_list('pk', flat=True)[:CLAIM_CANDIDATES]:
+        claimed = queue.filter(pk=pk).update(
+            assigned_to=employee,
+            status='in_progress',
+            updated_at=timezone.now(),
+        )
+        if claimed:
+            ticket = TicketRequest.objects.get(pk=pk)
+            # update() sends no signals, so log the change as the bulk updates do
+            record_changes([ticket], 'claim')
+            record_transitions([(ticket, 'pending')], 'claim', employee)
+            return ticket
+    return None
+
+
+def claim_next_ticket(employee, ticket_type=None, limit=None):
+    """
+    Assign the next ticket in the queue to `employee`; None when the queue
+    is empty. Raises ClaimLimitReached when they already hold `limit`
+    tickets in progress (default TICKET_CLAIM_MAX_IN_PROGRESS, 0 for none)
+    """
+    if limit is None:
+        limit = settings.TICKET_CLAIM_MAX_IN_PROGRESS
+    queue = claimable_tickets(ticket_type)
+    with transaction.atomic():
+        check_claim_limit(employee, limit)
+        if connection.features.has_select_for_update_skip_locked:
+            return claim_locked(queue, employee)
+        return claim_conditional(queue, employee)
@@ -0,0 +1,40 @@
+"""
+Background Threads
+
+Named thread pools for work that shouldn't hold up a request or a job:
+welcome emails, warranty and overdue digests, image renditions. A pool
+starts on first use. Each task closes its thread's database connections
+when it ends, as the request cycle would, so idle pool threads don't hold
+connections open.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connections, transaction
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def executor(name, workers=4):
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'ims-{name}')
+        return _executors[name]
+
+
+def _run(fn, args):
+    try:
+        return fn(*args)
+    finally:
+        connections.close_all()
+
+
+def submit(name, fn, *args, workers=4):
+    """Run fn(*args) on the `name` pool; returns its future"""
+    return executor(name, workers).submit(_run, fn, args)
+
+
+def submit_after_commit(name, fn, *args, workers=4):
+    """submit() once the current transaction commits, or right away outside one"""
+    transaction.on_commit(lambda: submit(name, fn, *args, workers=workers))
@@ -0,0 +1,145 @@
+"""
+Sparse Fieldsets
+
+List endpoints accept `?fields=id,name,status` to return only those
+fields, or `?omit=specifications,notes` to leave some out. The queryset is
+narrowed to match: `.only()` loads just the columns the remaining fields
+read, and `.select_related()` joins just the relations they read through,
+so smaller responses also mean smaller rows and no per-row lookups.
+
+Serializers trace each field's `source` back to model columns. Fields
+backed by properties declare their columns in `Meta.sparse_sources`;
+anything that can't be traced leaves the queryset unprojected.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def requested_fields(request):
+    """(fields, omit) from the query string; fields is None when not given"""
+    def names(param):
+        return {name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()}
+
+    return names('fields') or None, names('omit')
+
+
+class SparseFieldsetSerializerMixin:
+    """Keep only the fields selected by the view's `fieldset` context entry"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+
+        # Nested serializers share the context but always render in full
+        parent = getattr(self, 'parent', None)
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if fieldset is None or parent is not None:
+            return fields
+
+        selected, omitted = fieldset
+        names = [
+            name for name in fields
+            if (selected is None or name in selected) and name not in omitted
+        ]
+        # Unknown names are ignored, like unknown facets; nothing valid means everything
+        if not names:
+            return fields
+        return {name: fields[name] for name in names}
+
+
+def field_paths(serializer, name, field):
+    """Dotted model paths read by one serializer field, or None if unknown"""
+    sparse_sources = getattr(getattr(serializer, 'Meta', None), 'sparse_sources', {})
+    if name in sparse_sources:
+        return sparse_sources[name]
+    if isinstance(field, (serializers.SerializerMethodField, serializers.BaseSerializer)):
+        return None
+    if field.source == '*':
+        return None
+    return [field.source]
+
+
+def projection(serializer, model):
+    """
+    (columns, relations) to pass to .only() and .select_related() for the
+    fields of `serializer`, or None when some field can't be traced
+    """
+    columns = {model._meta.pk.name}
+    relations = set()
+    # Joined rows read through a property are loaded with every column
+    full_relations = set()
+
+    for name, field in serializer.fields.items():
+        paths = field_paths(serializer, name, field)
+        if paths is None:
+            return None
+
+        for path in paths:
+            current = model
+            lookup = []
+            for part in path.split('.'):
+                try:
+                    model_field = current._meta.get_field(part)
+                except FieldDoesNotExist:
+                    if not lookup:
+                        return None
+                    full_relations.add('__'.join(lookup))
+                    relations.add('__'.join(lookup))
+                    break
+
+                if model_field.many_to_many or model_field.one_to_many:
+                    return None
+
+                lookup.append(part)
+                if not model_field.is_relation:
+                    break
+                current = model_field.related_model
+
+            # Every foreign key walked through is joined
+            for depth in range(1, len(lookup) + 1):
+                columns.add('__'.join(lookup[:depth]))
+            if len(lookup) > 1:
+                relations.add('__'.join(lookup[:-1]))
+
+    columns = {
+        column for column in columns
+        if not any(column.startswith(f'{relation}__') for relation in full_relations)
+    }
+    return columns, relations
+
+
+def project_queryset(queryset, serializer):
+    """Narrow `queryset` to the columns and joins `serializer` reads"""
+    traced = projection(serializer, queryset.model)
+    if traced is None:
+        return queryset
+    columns, relations = traced
+    if relations:
+        queryset = queryset.select_related(*sorted(relations))
+    return queryset.only(*sorted(columns))
+
+
+class SparseFieldsetMixin:
+    """
+    View mixin applying `?fields=` / `?omit=` to the serializer and the
+    queryset of the actions in `sparse_fieldset_actions`
+    """
+
+    sparse_fieldset_actions = ['list']
+
+    def uses_sparse_fieldset(self):
+        # Plain generic views have no action; they are only routed for lists here
+        return getattr(self, 'action', 'list') in self.sparse_fieldset_actions
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.uses_sparse_fieldset():
+            context['fieldset'] = requested_fields(self.request)
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.uses_sparse_fieldset():
+            queryset = project_queryset(queryset, self.get_serializer())
+        return queryset
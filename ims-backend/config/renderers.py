@@ -0,0 +1,81 @@
+"""
+Fast JSON Rendering and Parsing
+
+Drop-in replacements for DRF's JSONRenderer and JSONParser that encode
+and decode with orjson when it is installed. Output matches DRF byte for
+byte: UUIDs, Decimals, dates and datetimes that reach the renderer are
+converted by DRF's own encoder, and U+2028/U+2029 are escaped the same
+way. The only difference is how very large or very small floats are
+spelled (`1e16` rather than `1e+16`); they parse to the same value.
+
+Requests for indented or ASCII-only output, values orjson can't encode,
+and installs without orjson all fall back to the DRF classes.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Datetimes are passed to DRF's encoder, which writes UTC as `Z` like DRF does
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+)
+
+_drf_default = JSONEncoder().default
+
+
+def encode(data):
+    """orjson-encoded `data`, formatted like DRF's compact JSON output"""
+    content = orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS)
+    # JavaScript treats these as line terminators inside strings
+    if b'\xe2\x80' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding with orjson where the output would be identical"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            return encode(data)
+        except TypeError:
+            # Integers beyond 64 bits and other values orjson rejects
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser decoding UTF-8 request bodies with orjson"""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            # orjson rejects NaN and Infinity, like DRF's strict parsing
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,221 @@
+"""
+Read Replica Routing
+
+Safe requests to views with `read_replica = True` read from one of the
+databases configured in DATABASE_REPLICA_URLS; everything else uses the
+primary. A user who has just written is pinned to the primary for
+REPLICA_PIN_SECONDS so they see their own changes, and replicas that fail
+or fall more than REPLICA_MAX_LAG_SECONDS behind are skipped until they
+recover.
+
+The pin travels with the client as a signed cookie naming the user, so
+it holds whichever worker serves the next request. A frontend on another
+origin sends it with cross-site XHR, so there the cookie is set with
+SameSite=None; Secure.
+
+When a replica fails mid-request the view is run again on the primary;
+async views (ASGI) are re-run the same way.
+"""
+import asyncio
+import contextvars
+import random
+import time
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connections, DatabaseError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+# Replica chosen for the current request, None for the primary
+read_alias = contextvars.ContextVar('read_alias', default=None)
+# Whether the current request has written to the primary
+wrote = contextvars.ContextVar('wrote', default=False)
+
+jwt_authentication = JWTAuthentication()
+
+PIN_COOKIE = 'replica_pin'
+
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+def replica_lag(alias):
+    """Return how many seconds `alias` is behind the primary"""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(REPLICA_LAG_SQL)
+            return float(cursor.fetchone()[0])
+        cursor.execute('SELECT 1')
+        return 0.0
+
+
+class ReplicaHealth:
+    """Per-process record of which replicas are currently usable"""
+
+    def __init__(self):
+        self.unavailable_until = {}
+        self.checked_at = {}
+
+    def mark_failed(self, alias):
+        self.unavailable_until[alias] = time.monotonic() + settings.REPLICA_CHECK_INTERVAL
+
+    def is_available(self, alias):
+        now = time.monotonic()
+        if self.unavailable_until.get(alias, 0) > now:
+            return False
+
+        if now - self.checked_at.get(alias, float('-inf')) < settings.REPLICA_CHECK_INTERVAL:
+            return True
+
+        self.checked_at[alias] = now
+        try:
+            lag = replica_lag(alias)
+        except DatabaseError as e:
+            print(f"Replica {alias} is unavailable: {str(e)}")
+            self.mark_failed(alias)
+            return False
+
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            print(f"Replica {alias} is {lag:.1f}s behind, reading from primary")
+            self.mark_failed(alias)
+            return False
+
+        return True
+
+    def choose(self):
+        """Return a usable replica alias, or None if there is none"""
+        aliases = [alias for alias in replica_aliases() if self.is_available(alias)]
+        return random.choice(aliases) if aliases else None
+
+
+health = ReplicaHealth()
+
+
+def request_user_id(request):
+    """Return the user id from the request's bearer token without a DB lookup"""
+    header = jwt_authentication.get_header(request)
+    raw_token = jwt_authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+
+    try:
+        validated_token = jwt_authentication.get_validated_token(raw_token)
+        return str(validated_token[api_settings.USER_ID_CLAIM])
+    except (InvalidToken, KeyError):
+        return None
+
+
+def is_pinned(request, user_id):
+    """Whether `request` carries an unexpired pin for `user_id`"""
+    pinned_user = request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_COOKIE, max_age=settings.REPLICA_PIN_SECONDS
+    )
+    return pinned_user == user_id
+
+
+def is_cross_origin(request):
+    origin = request.headers.get('Origin')
+    return bool(origin) and urlsplit(origin).netloc != request.get_host()
+
+
+def pin(request, response, user_id):
+    # Lax cookies aren't sent with cross-site XHR, and SameSite=None requires Secure
+    cross_origin = is_cross_origin(request)
+    response.set_signed_cookie(
+        PIN_COOKIE,
+        user_id,
+        salt=PIN_COOKIE,
+        max_age=settings.REPLICA_PIN_SECONDS,
+        secure=cross_origin or request.is_secure(),
+        httponly=True,
+        samesite='None' if cross_origin else 'Lax',
+    )
+
+
+class ReplicaRouter:
+    """Send reads to the replica chosen for the current request"""
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaMiddleware:
+    """Pick the database for safe reads and pin users to the primary after writes"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        read_alias.set(None)
+        wrote.set(False)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.set(None)
+
+        if wrote.get() and replica_aliases():
+            user_id = request_user_id(request)
+            if user_id:
+                pin(request, response, user_id)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or not replica_aliases():
+            return None
+
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if not getattr(view_class or view_func, 'read_replica', False):
+            return None
+
+        user_id = request_user_id(request)
+        if user_id and is_pinned(request, user_id):
+            return None
+
+        alias = health.choose()
+        if alias is not None:
+            read_alias.set(alias)
+            request.replica_view = (view_func, view_args, view_kwargs)
+        return None
+
+    def process_exception(self, request, exception):
+        """Retry a read on the primary when its replica fails mid-request"""
+        alias = read_alias.get()
+        if alias is None or not isinstance(exception, DatabaseError):
+            return None
+
+        print(f"Error reading from replica {alias}: {str(exception)}")
+        health.mark_failed(alias)
+        read_alias.set(None)
+
+        view_func, view_args, view_kwargs = request.replica_view
+        if asyncio.iscoroutinefunction(view_func):
+            # Django calls this hook on a worker thread for async views
+            return async_to_sync(view_func)(request, *view_args, **view_kwargs)
+        return view_func(request, *view_args, **view_kwargs)
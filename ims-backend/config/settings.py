@@ -3,7 +3,7 @@ Django settings for Inventory Management System
 """
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import config, Csv
 import os
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,6 +44,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -68,6 +69,64 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Serve read-heavy endpoints from async-native views (enabled by config/asgi.py)
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
+
+# Batch endpoint limits (/api/batch/)
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+BATCH_MAX_WORKERS = config('BATCH_MAX_WORKERS', default=4, cast=int)
+
+# Most devices one bulk status change may touch (devices/bulk_*)
+BULK_STATUS_MAX_DEVICES = config('BULK_STATUS_MAX_DEVICES', default=1000, cast=int)
+
+# Default and largest number of suggestions from employees/autocomplete/
+EMPLOYEE_AUTOCOMPLETE_LIMIT = config('EMPLOYEE_AUTOCOMPLETE_LIMIT', default=10, cast=int)
+EMPLOYEE_AUTOCOMPLETE_MAX_LIMIT = config('EMPLOYEE_AUTOCOMPLETE_MAX_LIMIT', default=50, cast=int)
+
+# In-progress tickets a technician may hold before tickets/claim_next/ refuses more (0 = no limit)
+TICKET_CLAIM_MAX_IN_PROGRESS = config('TICKET_CLAIM_MAX_IN_PROGRESS', default=10, cast=int)
+
+# Warranty expiry digests (scan_warranty_expiry, devices/warranty_expiring/)
+WARRANTY_NOTICE_DAYS = config('WARRANTY_NOTICE_DAYS', default=30, cast=int)
+WARRANTY_SCAN_CHUNK_SIZE = config('WARRANTY_SCAN_CHUNK_SIZE', default=1000, cast=int)
+WARRANTY_DIGEST_DEVICES_PER_GROUP = config('WARRANTY_DIGEST_DEVICES_PER_GROUP', default=20, cast=int)
+
+# Overdue return reminders (scan_overdue_assignments)
+OVERDUE_SCAN_CHUNK_SIZE = config('OVERDUE_SCAN_CHUNK_SIZE', default=1000, cast=int)
+OVERDUE_DIGEST_ITEMS_PER_DEPARTMENT = config('OVERDUE_DIGEST_ITEMS_PER_DEPARTMENT', default=50, cast=int)
+
+# Longest date range the utilization analytics endpoints accept, in days
+ROLLUP_MAX_RANGE_DAYS = config('ROLLUP_MAX_RANGE_DAYS', default=731, cast=int)
+
+# Events per page of the device and employee history timelines
+HISTORY_PAGE_SIZE = config('HISTORY_PAGE_SIZE', default=50, cast=int)
+HISTORY_MAX_PAGE_SIZE = config('HISTORY_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Domain event log: events per INSERT, seconds the writer waits to fill a batch, and rows per read
+DOMAIN_EVENT_BATCH_SIZE = config('DOMAIN_EVENT_BATCH_SIZE', default=100, cast=int)
+DOMAIN_EVENT_FLUSH_INTERVAL = config('DOMAIN_EVENT_FLUSH_INTERVAL', default=0.5, cast=float)
+DOMAIN_EVENT_PAGE_SIZE = config('DOMAIN_EVENT_PAGE_SIZE', default=500, cast=int)
+# Delta sync holds back events the database recorded this recently; a commit lagging by longer can be skipped
+DOMAIN_EVENT_SETTLE_SECONDS = config('DOMAIN_EVENT_SETTLE_SECONDS', default=2, cast=float)
+# Retries of a failed event batch, the first one after this many seconds and doubling; then events are inserted one by one
+DOMAIN_EVENT_WRITE_RETRIES = config('DOMAIN_EVENT_WRITE_RETRIES', default=3, cast=int)
+DOMAIN_EVENT_RETRY_DELAY = config('DOMAIN_EVENT_RETRY_DELAY', default=0.5, cast=float)
+
+# Specification keys that get an expression index for ?spec= filters (sync_spec_indexes)
+DEVICE_SPEC_INDEXED_KEYS = config('DEVICE_SPEC_INDEXED_KEYS', default='ram_gb,storage_gb,storage_type', cast=Csv())
+
+# Seconds between change event polls for the live event stream
+EVENT_STREAM_POLL_INTERVAL = config('EVENT_STREAM_POLL_INTERVAL', default=1.0, cast=float)
+# The stream holds back change events created this recently; a commit lagging by longer can be skipped
+EVENT_STREAM_SETTLE_SECONDS = config('EVENT_STREAM_SETTLE_SECONDS', default=1.0, cast=float)
+# Seconds a stream ticket from events/ticket/ can be used to open the stream
+EVENT_STREAM_TICKET_SECONDS = config('EVENT_STREAM_TICKET_SECONDS', default=30, cast=int)
+# Missed events replayed on reconnect; further behind, the client is told to reload
+EVENT_STREAM_REPLAY_LIMIT = config('EVENT_STREAM_REPLAY_LIMIT', default=1000, cast=int)
+
+# Background threads rendering assignment photo thumbnails, per worker process
+IMAGE_PIPELINE_WORKERS = config('IMAGE_PIPELINE_WORKERS', default=2, cast=int)
+
 # Database
 # DATABASES = {
 #     'default': {
@@ -80,11 +139,39 @@ import dj_database_url
 
 DATABASE_URL = config('DATABASE_URL', default=None)
 
+# PostgreSQL connection handling (DB_CONNECTION_MODE):
+#   persistent - one long-lived connection per worker thread (default)
+#   pool       - bounded per-process psycopg pool, sized from the worker count
+#   pgbouncer  - per-request connections behind a transaction-pooling PgBouncer
+DB_CONNECTION_MODE = config('DB_CONNECTION_MODE', default='persistent')
+
+# Total connections this service may hold, shared by all gunicorn workers
+DB_MAX_CONNECTIONS = config('DB_MAX_CONNECTIONS', default=20, cast=int)
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+# SQLite tuning for multi-worker deployments. WAL lets reads run alongside
+# a write, and BEGIN IMMEDIATE takes the write lock when a transaction
+# starts, so concurrent writers wait up to `timeout` seconds (busy_timeout)
+# instead of failing with "database is locked" when upgrading a read lock.
+SQLITE_TUNED = config('SQLITE_TUNED', default=True, cast=bool)
+SQLITE_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': config('SQLITE_BUSY_TIMEOUT', default=20, cast=float),
+    'init_command': ';'.join([
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA mmap_size=134217728',
+        'PRAGMA cache_size=-20000',
+        'PRAGMA temp_store=MEMORY',
+    ]),
+}
+
 if DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.parse(
             DATABASE_URL,
             conn_max_age=600,
+            conn_health_checks=True,
             ssl_require=True
         )
     }
@@ -93,9 +180,53 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': SQLITE_OPTIONS if SQLITE_TUNED else {},
         }
     }
 
+# Read replicas, as comma-separated database URLs (see config/replicas.py)
+DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='', cast=Csv())
+
+for index, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f'replica_{index}'] = dj_database_url.parse(
+        replica_url,
+        conn_max_age=600,
+        conn_health_checks=True,
+        ssl_require=replica_url.startswith('postgres'),
+        test_options={'MIRROR': 'default'}
+    )
+
+DATABASE_ROUTERS = ['config.replicas.ReplicaRouter']
+
+# Keep a user's reads on the primary this long after they write
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=float)
+# Skip replicas further behind than this; re-checked every REPLICA_CHECK_INTERVAL
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=2, cast=float)
+REPLICA_CHECK_INTERVAL = config('REPLICA_CHECK_INTERVAL', default=5, cast=float)
+
+for database in DATABASES.values():
+    if database['ENGINE'] != 'django.db.backends.postgresql':
+        continue
+    
+    if DB_CONNECTION_MODE == 'pool':
+        pool_max_size = config(
+            'DB_POOL_MAX_SIZE',
+            default=max(2, DB_MAX_CONNECTIONS // max(1, WEB_CONCURRENCY)),
+            cast=int
+        )
+        # Pooled connections are returned on close, so persistence must be off
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=min(2, pool_max_size), cast=int),
+            'max_size': pool_max_size,
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+        }
+    elif DB_CONNECTION_MODE == 'pgbouncer':
+        # Transaction pooling: no session state may outlive a transaction
+        database['CONN_MAX_AGE'] = 0
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+
 
 
 # For production PostgreSQL (uncomment and configure)
@@ -138,11 +269,45 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media is always served through apps.inventory.media.serve_media, which
+# checks the requester may see the file. After that check the transfer is
+#   ''       - streamed by Django, with HTTP range support
+#   'nginx'  - handed to nginx with X-Accel-Redirect to MEDIA_ACCEL_PREFIX,
+#              an `internal` location aliased to MEDIA_ROOT
+#   'apache' - handed to mod_xsendfile (or lighttpd) with X-Sendfile
+MEDIA_SERVER = config('MEDIA_SERVER', default='')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+
+# Resumable uploads (apps/inventory/uploads.py). Chunks are streamed
+# straight into a staging file under MEDIA_ROOT/.incoming, so the front
+# server's body limit (nginx client_max_body_size) only has to cover one chunk
+UPLOAD_MAX_SIZE = config('UPLOAD_MAX_SIZE', default=1024 * 1024 * 1024, cast=int)
+UPLOAD_CHUNK_SIZE = config('UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+UPLOAD_SESSION_HOURS = config('UPLOAD_SESSION_HOURS', default=24, cast=int)
+
+# Uploads are stored once per distinct content under media/blobs/
+# (apps/inventory/storage.py); MEDIA_DEDUPLICATION=False restores plain naming
+MEDIA_DEDUPLICATION = config('MEDIA_DEDUPLICATION', default=True, cast=bool)
+
+STORAGES = {
+    'default': {
+        'BACKEND': (
+            'apps.inventory.storage.ContentAddressedStorage' if MEDIA_DEDUPLICATION
+            else 'django.core.files.storage.FileSystemStorage'
+        ),
+    },
+    # Plain storage on purpose: staticfiles/ is committed without a manifest
+    # and deploys don't run collectstatic, so a manifest storage would fail
+    # every {% static %} lookup. WhiteNoiseMiddleware serves STATIC_ROOT as is
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -159,6 +324,16 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # orjson-backed JSON with DRF's exact output (config/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
@@ -167,6 +342,14 @@ REST_FRAMEWORK = {
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
 }
 
+# Build list responses from .values_list() rows instead of model instances
+# where the list serializer allows it (config/values_serializers.py)
+VALUES_LIST_SERIALIZERS = config('VALUES_LIST_SERIALIZERS', default=True, cast=bool)
+
+# Rows fetched and encoded per chunk when an unpaginated list action is
+# streamed (config/streaming.py)
+STREAM_CHUNK_SIZE = config('STREAM_CHUNK_SIZE', default=500, cast=int)
+
 # Simple JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -0,0 +1,120 @@
+"""
+Streamed List Responses
+
+Custom list actions (`devices/available`, `assignments/my_assignments`,
+`tickets/my_tickets`) return every row of their own fixed queryset; the
+list's filters don't apply to them. Unless a page is asked
+for with `?page=`, `StreamingListMixin` writes them as a JSON array
+encoded STREAM_CHUNK_SIZE rows at a time from `.iterator()`. Memory stays
+flat however long the list is, and the body is the same as rendering the
+whole list at once. With `?page=` the project's paginator is used instead.
+
+Rows come from the compiled `.values_list()` form of the list serializer
+where possible (config/values_serializers.py), otherwise from model
+instances.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+from .renderers import FastJSONRenderer
+from .values_serializers import values_serializer
+
+
+renderer = FastJSONRenderer()
+
+
+def json_array_chunks(batches):
+    """Encode lists of rows as the pieces of one JSON array"""
+    yield b'['
+    first = True
+    for rows in batches:
+        # Each batch renders as `[...]`; drop the brackets and join with commas
+        content = renderer.render(rows)[1:-1]
+        yield content if first else b',' + content
+        first = False
+    yield b']'
+
+
+async def ajson_array_chunks(batches):
+    """Async form of json_array_chunks"""
+    yield b'['
+    first = True
+    async for rows in batches:
+        content = renderer.render(rows)[1:-1]
+        yield content if first else b',' + content
+        first = False
+    yield b']'
+
+
+def batch_source(queryset, serializer_class, context):
+    """(queryset to iterate, function turning a batch of its rows into dicts)"""
+    compiled = values_serializer(serializer_class(context=context), queryset.model)
+    if compiled is not None:
+        return compiled.values_queryset(queryset), compiled.to_representation
+    return queryset, lambda batch: serializer_class(batch, many=True, context=context).data
+
+
+def row_batches(queryset, represent):
+    """Rows of `queryset` passed through `represent`, STREAM_CHUNK_SIZE at a time"""
+    chunk_size = settings.STREAM_CHUNK_SIZE
+    batch = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) == chunk_size:
+            yield represent(batch)
+            batch = []
+    if batch:
+        yield represent(batch)
+
+
+async def arow_batches(queryset, represent):
+    """
+    Async form of row_batches for the ASGI handlers. aiterator() can't be
+    used: values_list() querysets run their query on the event loop.
+    """
+    batches = row_batches(queryset, represent)
+    next_batch = sync_to_async(next)
+    while (batch := await next_batch(batches, None)) is not None:
+        yield batch
+
+
+def streaming_json_response(chunks):
+    return StreamingHttpResponse(chunks, content_type='application/json')
+
+
+def pinned(queryset):
+    """
+    `queryset` bound to the database it reads from now. Streamed rows are
+    fetched after ReplicaMiddleware has reset the request's replica.
+    """
+    return queryset.using(queryset.db)
+
+
+def wants_page(request):
+    return 'page' in request.GET
+
+
+class StreamingListMixin:
+    """
+    `list_response()` for custom list actions: a page from the configured
+    paginator with `?page=`, otherwise the whole list streamed as JSON
+    """
+
+    def list_response(self, queryset):
+        """Serialize `queryset` as given; filtering is up to the action"""
+        queryset, represent = batch_source(
+            queryset,
+            self.get_serializer_class(),
+            self.get_serializer_context()
+        )
+
+        if wants_page(self.request):
+            page = self.paginate_queryset(queryset)
+            return self.get_paginated_response(represent(page))
+
+        # The browsable API renders a regular response
+        if self.request.accepted_renderer.format != 'json':
+            return Response(represent(queryset))
+
+        return streaming_json_response(json_array_chunks(row_batches(pinned(queryset), represent)))
@@ -18,16 +18,26 @@ Including another URLconf
 URL configuration for Inventory Management System
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from apps.inventory.batch import BatchView
+from apps.inventory.media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('apps.authentication.urls')),
     path('api/inventory/', include('apps.inventory.urls')),
+    path('api/batch/', BatchView.as_view(), name='batch'),
 ]
 
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Async read handlers take precedence over the DRF routes under ASGI
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = [
+        path('api/auth/', include('apps.authentication.async_urls')),
+        path('api/inventory/', include('apps.inventory.async_urls')),
+    ] + urlpatterns
+
+# Media files are only served to employees allowed to see them, in every environment
+urlpatterns += [
+    re_path(rf'^{settings.MEDIA_URL.strip("/")}/(?P<path>.+)$', serve_media, name='media'),
+]
@@ -0,0 +1,207 @@
+"""
+Values-Based List Serialization
+
+List endpoints spend most of their time in DRF building a model instance
+per row and calling each field's `get_attribute()`/`to_representation()`.
+For read-only list serializers whose fields map straight onto columns,
+`ValuesSerializer` compiles the serializer once into a `.values_list()`
+query plus one converter per field. It then builds each row's dict from
+the returned tuple, so the output is the same as `serializer.data`.
+
+Dotted sources become joins (`employee.email` -> `employee__email`).
+Property-backed fields declare an SQL equivalent in
+`Meta.values_expressions`, e.g. `Concat` for `full_name`, or the name of
+an annotation the view's queryset already carries. Serializers with
+fields that can't be compiled (method fields, nested serializers) keep
+using DRF.
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.response import Response
+
+
+# Marker for a field DRF leaves out of the row (read-only source through a missing relation)
+SKIP = object()
+
+
+def identity(value):
+    return value
+
+
+def file_url(field, model_field):
+    """FileField.to_representation for a stored name rather than a FieldFile"""
+    storage = model_field.storage
+    use_url = getattr(field, 'use_url', serializers.api_settings.UPLOADED_FILES_USE_URL)
+
+    def convert(name):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        request = field.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return convert
+
+
+def converter(field, model_field):
+    """Function turning a raw column value into the field's representation"""
+    if isinstance(field, serializers.FileField):
+        return file_url(field, model_field) if model_field is not None else None
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        # values() already yields the primary key DRF would output
+        return field.pk_field.to_representation if field.pk_field else identity
+    if isinstance(field, serializers.RelatedField):
+        return None
+    if type(field) is serializers.ReadOnlyField:
+        return identity
+    if type(field) in (serializers.CharField, serializers.EmailField):
+        return str
+    if type(field) is serializers.UUIDField and field.uuid_format == 'hex_verbose':
+        return str
+    return field.to_representation
+
+
+def missing_value(field):
+    """What DRF outputs for a field whose source runs through a NULL relation"""
+    if field.default is not empty:
+        return field.get_default()
+    if field.allow_null:
+        return None
+    if not field.required:
+        return SKIP
+    # DRF raises for required fields; leave those to DRF
+    raise LookupError
+
+
+def compile_field(model, field, expressions):
+    """
+    (values key or expression, nullable relation lookups, converter, missing
+    value) for one field, or None when it can't be read from .values()
+    """
+    if isinstance(field, (serializers.SerializerMethodField, serializers.BaseSerializer)):
+        return None
+    if field.source == '*' or field.source_attrs == []:
+        return None
+
+    current = model
+    lookup = []
+    guards = []
+    model_field = None
+
+    for part in field.source_attrs:
+        try:
+            model_field = current._meta.get_field(part)
+        except FieldDoesNotExist:
+            model_field = None
+            break
+        if model_field.many_to_many or model_field.one_to_many or not model_field.concrete:
+            return None
+        lookup.append(part)
+        if model_field.is_relation and len(lookup) < len(field.source_attrs):
+            if model_field.null:
+                guards.append('__'.join(lookup))
+            current = model_field.related_model
+
+    try:
+        missing = missing_value(field) if guards or field.field_name in expressions else SKIP
+    except LookupError:
+        return None
+
+    if field.field_name in expressions:
+        key = expressions[field.field_name]
+        # A relation property (employee.full_name) is NULL only when the relation is
+        if len(field.source_attrs) > 1:
+            relation = model._meta.get_field(field.source_attrs[0])
+            if relation.is_relation and relation.null and field.source_attrs[0] not in guards:
+                guards.append(field.source_attrs[0])
+        convert = identity if type(field) is serializers.ReadOnlyField else converter(field, None)
+    elif len(lookup) == len(field.source_attrs):
+        key = '__'.join(lookup)
+        convert = converter(field, model_field)
+    else:
+        return None
+
+    if convert is None:
+        return None
+    return key, guards, convert, missing
+
+
+class ValuesSerializer:
+    """Compiled form of a list serializer that reads rows with .values_list()"""
+
+    def __init__(self, serializer, model):
+        self.plan = []
+        self.keys = []
+        self.annotations = {}
+        self.supported = True
+
+        expressions = getattr(getattr(serializer, 'Meta', None), 'values_expressions', {})
+        fields = [field for field in serializer.fields.values() if not field.write_only]
+
+        for field in fields:
+            compiled = compile_field(model, field, expressions)
+            if compiled is None:
+                self.supported = False
+                return
+            key, guards, convert, missing = compiled
+
+            if not isinstance(key, str):
+                alias = f'values_expression_{len(self.annotations)}'
+                self.annotations[alias] = key
+                key = alias
+            guard_indexes = tuple(self.column(guard) for guard in guards)
+            self.plan.append((field.field_name, self.column(key), guard_indexes, convert, missing))
+
+    def column(self, key):
+        """Position of `key` in the values_list() tuple"""
+        if key not in self.keys:
+            self.keys.append(key)
+        return self.keys.index(key)
+
+    def values_queryset(self, queryset):
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.values_list(*self.keys)
+
+    def to_representation(self, rows):
+        plan = self.plan
+        data = []
+        for row in rows:
+            item = {}
+            for name, index, guards, convert, missing in plan:
+                if guards and any(row[guard] is None for guard in guards):
+                    if missing is not SKIP:
+                        item[name] = missing
+                    continue
+                value = row[index]
+                item[name] = None if value is None else convert(value)
+            data.append(item)
+        return data
+
+
+def values_serializer(serializer, model):
+    """A ValuesSerializer for `serializer`, or None if it has to go through DRF"""
+    if not settings.VALUES_LIST_SERIALIZERS:
+        return None
+    compiled = ValuesSerializer(serializer, model)
+    return compiled if compiled.supported else None
+
+
+class ValuesListMixin:
+    """List action built from .values_list() rows when the list serializer allows it"""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        compiled = values_serializer(self.get_serializer(), queryset.model)
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = compiled.values_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.to_representation(page))
+        return Response(compiled.to_representation(queryset))
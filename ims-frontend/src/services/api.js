@@ -7,6 +7,8 @@ const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
 // Create axios instance
 const api = axios.create({
   baseURL: API_URL,
+  // Send the backend's replica_pin cookie so reads after a write see it
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
@@ -140,6 +142,61 @@ export const employeeAPI = {
   getEmployee: (id) => api.get(`/inventory/employees/${id}/`),
 };
 
+// Batch APIs
+export const batchAPI = {
+  // Run several GET requests in one round trip.
+  // requests: [{ id: 'stats', url: '/api/inventory/dashboard/stats/' }, ...]
+  get: (requests, parallel = false) => api.post('/batch/', { requests, parallel }),
+};
+
+// Live change events (served by the ASGI deployment)
+// Calls onEvent(type, data) for each device/assignment/ticket change, and
+// onEvent('reset', null) when the client missed too much to catch up and
+// should reload its data. Returns a function that closes the connection.
+export const subscribeToChanges = (onEvent) => {
+  let source = null;
+  let lastEventId = null;
+  let closed = false;
+
+  const connect = async () => {
+    // EventSource can't send the Authorization header, so the stream is
+    // opened with a short-lived ticket instead of the access token
+    let ticket;
+    try {
+      ({ data: { ticket } } = await api.post('/inventory/events/ticket/'));
+    } catch {
+      if (!closed) setTimeout(connect, 3000);
+      return;
+    }
+    if (closed) return;
+
+    const params = new URLSearchParams({ ticket });
+    if (lastEventId) params.set('last_event_id', lastEventId);
+    source = new EventSource(`${API_URL}/inventory/events/stream/?${params}`);
+
+    ['device', 'assignment', 'ticket'].forEach((type) => {
+      source.addEventListener(type, (event) => {
+        lastEventId = event.lastEventId;
+        onEvent(type, JSON.parse(event.data));
+      });
+    });
+    source.addEventListener('reset', () => onEvent('reset', null));
+
+    // The ticket expires, so reconnect with a new one rather than letting
+    // EventSource retry the old URL
+    source.onerror = () => {
+      source.close();
+      if (!closed) setTimeout(connect, 3000);
+    };
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    if (source) source.close();
+  };
+};
+
 // Helper function to handle file uploads
 export const uploadFile = async (endpoint, file, additionalData = {}) => {
   const formData = new FormData();